@@ -0,0 +1,211 @@
+"""Capacity-constrained student-project allocation from matching scores
+
+Two solvers share one input shape, `weights = {student: {project: weight}}` plus `capacities = {project: seats}`:
+
+* `deferred_acceptance()` - student-proposing deferred acceptance (Gale-Shapley). The result is stable:
+  no student and project would both rather be matched to each other than keep their assignment.
+* `max_weight_assignment()` - maximizes the total weight of the assignment with shortest augmenting
+  paths (Jonker-Volgenant style, sparse, with per-project prices). Students may stay unassigned when
+  every project they rank is full of students with a stronger claim.
+"""
+import heapq
+from collections import defaultdict
+from functools import total_ordering
+
+
+def build_preferences(weights):
+    """Student preference lists (best first) and project priorities (higher weight = stronger claim)"""
+    preferences = {}
+    priorities = defaultdict(dict)
+    for student, row in weights.items():
+        preferences[student] = sorted(row, key=lambda project: (-row[project], project))
+        for project, weight in row.items():
+            priorities[project][student] = weight
+    return preferences, priorities
+
+
+def deferred_acceptance(preferences, capacities, priorities=None):
+    """Student-proposing deferred acceptance, returning {student: project} for matched students
+
+    `priorities[project][student]` ranks applicants (higher wins, ties go to the smaller student key);
+    without priorities every project prefers smaller student keys. Projects missing from `capacities`
+    have no seats.
+    """
+    priorities = priorities or {}
+    next_choice = {student: 0 for student in preferences}
+    held = defaultdict(list)  # project -> min-heap of (priority, tie-break, student); weakest on top
+    free = list(preferences)
+    assignment = {}
+    while free:
+        student = free.pop()
+        choices = preferences[student]
+        while next_choice[student] < len(choices):
+            project = choices[next_choice[student]]
+            next_choice[student] += 1
+            capacity = capacities.get(project, 0)
+            if capacity <= 0:
+                continue
+            entry = (priorities.get(project, {}).get(student, 0), _tie_break(student), student)
+            seats = held[project]
+            if len(seats) < capacity:
+                heapq.heappush(seats, entry)
+                assignment[student] = project
+                break
+            if entry > seats[0]:
+                rejected = heapq.heapreplace(seats, entry)[2]
+                del assignment[rejected]
+                assignment[student] = project
+                free.append(rejected)
+                break
+    return assignment
+
+
+def _tie_break(student):
+    # Higher tuples win in the held heaps, so invert the order of student keys
+    return _Reversed(student)
+
+
+@total_ordering
+class _Reversed:
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def blocking_pairs(assignment, preferences, capacities, priorities=None):
+    """(student, project) pairs that would rather be matched together; empty when `assignment` is stable"""
+    priorities = priorities or {}
+    members = defaultdict(list)
+    for student, project in assignment.items():
+        members[project].append(student)
+
+    def claim(project, student):
+        return priorities.get(project, {}).get(student, 0), _tie_break(student)
+
+    weakest = {project: min(claim(project, s) for s in students) for project, students in members.items()}
+    pairs = []
+    for student, choices in preferences.items():
+        current = assignment.get(student)
+        for project in choices:
+            if project == current:
+                break
+            if capacities.get(project, 0) <= 0:
+                continue
+            if len(members[project]) < capacities[project] or claim(project, student) > weakest[project]:
+                pairs.append((student, project))
+    return pairs
+
+
+def max_weight_assignment(weights, capacities):
+    """Assignment maximizing the sum of weights, returning {student: project} for matched students
+
+    Each student is added in turn and routed along a shortest augmenting path through full projects
+    (possibly moving other students or leaving one unassigned), with prices kept as dual potentials
+    so every search runs Dijkstra on non-negative reduced costs. Searches stop at the first project
+    with a free seat, so uncontested students cost a single heap pop.
+    """
+    projects = sorted({project for row in weights.values() for project in row if capacities.get(project, 0) > 0})
+    column = {project: index for index, project in enumerate(projects)}
+    students = list(weights)
+    outside = len(projects)  # columns >= outside are each student's private "unassigned" option
+
+    # Costs are negated weights; only positive weights to projects with seats are edges
+    edges = [
+        {column[project]: -weight for project, weight in weights[student].items() if weight > 0 and project in column}
+        for student in students
+    ]
+    seats = [capacities[project] for project in projects]
+    price = [0.0] * len(projects)  # column potentials of projects; outside options stay at 0
+    members = [[] for _ in projects]  # rows currently assigned to each project column
+    full = [0] * len(projects)
+    assigned = [None] * len(students)  # row -> column
+    inf = float('inf')
+    dist = [inf] * (outside + len(students))
+    pred = [None] * (outside + len(students))
+    scanned_cols = set()
+
+    for row in range(len(students)):
+        touched = [outside + row]
+        dist[outside + row] = bound = 0.0
+        pred[outside + row] = row
+        # Heap entries are (distance, full, column): on equal distance a free seat is popped first,
+        # which ends the search early on the many ties that rubric scores produce
+        heap = [(0.0, 0, outside + row)]
+        for col, cost in edges[row].items():
+            d = dist[col] = cost - price[col]
+            pred[col] = row
+            touched.append(col)
+            heap.append((d, full[col], col))
+            if not full[col] and d < bound:
+                bound = d
+        heapq.heapify(heap)
+
+        scanned = []
+        while True:
+            d, is_full, col = heapq.heappop(heap)
+            if d > dist[col] or (is_full and col in scanned_cols):
+                continue
+            if not is_full:
+                sink, mu = col, d
+                break
+            scanned.append(col)
+            scanned_cols.add(col)
+            # Full project: try moving each of its students elsewhere, or to their outside option.
+            # Columns at or beyond the nearest free seat found so far (`bound`) can never be scanned.
+            for other in members[col]:
+                base = d - (edges[other][col] - price[col])
+                for next_col, cost in edges[other].items():
+                    nd = base + cost - price[next_col]
+                    if nd < dist[next_col] and nd < bound and next_col not in scanned_cols:
+                        if dist[next_col] == inf:
+                            touched.append(next_col)
+                        dist[next_col] = nd
+                        pred[next_col] = other
+                        heapq.heappush(heap, (nd, full[next_col], next_col))
+                        if not full[next_col]:
+                            bound = nd
+                if base < bound:
+                    touched.append(outside + other)
+                    dist[outside + other] = bound = base
+                    pred[outside + other] = other
+                    heapq.heappush(heap, (base, 0, outside + other))
+
+        for col in scanned:
+            price[col] += dist[col] - mu
+
+        # Augment: walk back from the sink, moving each student on the path one column forward
+        col = sink
+        while True:
+            moving = pred[col]
+            previous = assigned[moving]
+            if col < outside:
+                members[col].append(moving)
+                full[col] = 1 if len(members[col]) >= seats[col] else 0
+            assigned[moving] = col
+            if previous is not None and previous < outside:
+                members[previous].remove(moving)
+                full[previous] = 1 if len(members[previous]) >= seats[previous] else 0
+            if moving == row:
+                break
+            col = previous
+
+        scanned_cols.clear()
+        for col in touched:
+            dist[col] = inf
+
+    return {
+        students[row]: projects[col]
+        for row, col in enumerate(assigned)
+        if col is not None and col < outside
+    }
+
+
+def assignment_weight(assignment, weights):
+    return sum(weights[student][project] for student, project in assignment.items())
@@ -0,0 +1,66 @@
+"""Interest demand counters: `project.interest_count` and daily `interest_activity` rows
+
+Both are maintained incrementally by record_interest() and cancel_interest() in the same transaction as the
+interest row, so analytics read counters (one row per project, one per project and day) instead of
+scanning student_interest. recount_interest_counters() rebuilds them from the interest rows.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+TIMELINE_MAX_DAYS = 366
+
+
+def as_date(value):
+    """date of a DATE/DATETIME column value (SQLite returns strings for raw SQL)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def recount_interest_counters(connection):
+    """Rebuild interest_count and interest_activity from student_interest; returns the interest rows counted
+
+    Cancellations are not recorded in student_interest, so rebuilt activity only has selections.
+    """
+    connection.execute(text(
+        "UPDATE project SET interest_count = "
+        "(SELECT COUNT(*) FROM student_interest WHERE student_interest.project_id = project.id)"
+    ))
+    days = defaultdict(int)
+    rows = connection.execute(text("SELECT project_id, timestamp FROM student_interest")).all()
+    for project_id, timestamp in rows:
+        days[(as_date(timestamp or datetime.utcnow()), project_id)] += 1
+    connection.execute(text("DELETE FROM interest_activity"))
+    if days:
+        connection.execute(
+            text("INSERT INTO interest_activity (day, project_id, selections, cancellations) "
+                 "VALUES (:day, :project_id, :selections, 0)"),
+            [{'day': day, 'project_id': project_id, 'selections': count} for (day, project_id), count in days.items()]
+        )
+    return len(rows)
+
+
+def timeline(rows, start, end):
+    """[{date, selections, cancellations, net}] for every day from start to end, from (day, selections,
+    cancellations) rows; days without activity are zero"""
+    totals = defaultdict(lambda: [0, 0])
+    for day, selections, cancellations in rows:
+        entry = totals[as_date(day)]
+        entry[0] += selections or 0
+        entry[1] += cancellations or 0
+    days = []
+    day = start
+    while day <= end:
+        selections, cancellations = totals.get(day, (0, 0))
+        days.append({
+            'date': day.isoformat(),
+            'selections': selections,
+            'cancellations': cancellations,
+            'net': selections - cancellations
+        })
+        day += timedelta(days=1)
+    return days
@@ -1,43 +1,195 @@
 # mypy: ignore-errors
 # type: ignore
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, g, make_response
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import bindparam, event, func, or_, text, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 import os
 import json
-from datetime import datetime
+import logging
+import uuid
+import contextvars
+import hashlib
+import heapq
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from openai import OpenAI
+import click
+from llm_client import CircuitBreaker, LLMClient
+from instrumentation import configure_logging, current_spans, lazy_json, metrics, record_token_usage, request_id_var, span, start_request_trace
+from migrations import migrate, schema_version
+from search import fts_available, fts_match_expression, query_terms, search_project_ids
+from database import engine_options, install_sqlite_pragmas, pool_stats, sqlite_pragmas
+from caching import SQLiteCacheTier, TieredCache, TTLCache, normalize_message
+from conversations import ConversationStore, classify_refinement, merge_requirements, refinement_terms
+from matching import AVAILABLE_FIELDS, SCORE_THRESHOLD, LocalScorer, ProjectIndex, compact_project, fuse_rankings, pack_chunks, shortlist_projects, tokenize
+from passwords import HasherBusy, PasswordHasher
+from semantic import VectorIndex
+from analytics import TIMELINE_MAX_DAYS, recount_interest_counters, timeline
+from project_io import FORMATS as IMPORT_FORMATS, ImportFormatError, detect_format, export_chunks, iter_project_rows, parse_capacity, validate_project_row
+from skills import SkillTaxonomy, add_project_skills, backfill_project_skills, canonical_skills, load_aliases, project_skill_rows, seed_aliases, set_project_skills
+from throttling import TokenBucketLimiter
+from warmstart import merge_changed_scores, top_items, usable_requirements
+from allocation import assignment_weight, blocking_pairs, build_preferences, deferred_acceptance, max_weight_assignment
 
 # Load environment variables
 load_dotenv()
 
+configure_logging(os.getenv('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger('app')
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f'sqlite:///{os.path.abspath("instance/test.db")}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool size/pre-ping for server databases (DB_POOL_*); SQLite instead gets WAL and other pragmas on connect
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
 # Configure OpenAI
 api_key = os.getenv('DEEPSEEK_API_KEY')
-print(f"API Key configured: {'Yes' if api_key else 'No'}")
-client = OpenAI(
+logger.info("API Key configured: %s", 'Yes' if api_key else 'No')
+# Shared pooled client with per-call deadlines, jittered retries on 429/5xx, a cap on in-flight
+# requests and a circuit breaker that makes callers fall back to local ranking while the API is down
+llm = LLMClient(
     api_key=api_key,
-    base_url="https://api.deepseek.com/v1"
+    base_url=os.getenv('DEEPSEEK_BASE_URL', "https://api.deepseek.com/v1"),
+    timeout=float(os.getenv('LLM_TIMEOUT', '20')),
+    deadline=float(os.getenv('LLM_DEADLINE', '45')),
+    max_retries=int(os.getenv('LLM_MAX_RETRIES', '2')),
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '8')),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('LLM_BREAKER_THRESHOLD', '5')),
+        reset_timeout=float(os.getenv('LLM_BREAKER_RESET', '30'))
+    )
+)
+
+# Maximum number of projects sent to the LLM for ranking
+SHORTLIST_SIZE = int(os.getenv('MATCH_SHORTLIST_SIZE', '20'))
+
+# Ranking prompt budget: tokens per project, tokens of project data per call, and projects per call
+# (the latter keeps each call's ranked output within max_tokens); larger shortlists are ranked in parallel chunks
+RANK_PROJECT_TOKENS = int(os.getenv('RANK_PROJECT_TOKENS', '120'))
+RANK_PROMPT_TOKENS = int(os.getenv('RANK_PROMPT_TOKENS', '2400'))
+RANK_CHUNK_SIZE = int(os.getenv('RANK_CHUNK_SIZE', '12'))
+
+# Largest page size accepted by /api/projects/search
+SEARCH_MAX_PER_PAGE = int(os.getenv('SEARCH_MAX_PER_PAGE', '100'))
+
+# Default and largest page sizes of the keyset-paginated list APIs (/api/projects, /api/teacher/interests)
+LIST_DEFAULT_LIMIT = int(os.getenv('LIST_DEFAULT_LIMIT', '50'))
+LIST_MAX_LIMIT = int(os.getenv('LIST_MAX_LIMIT', '200'))
+
+# Ranking mode: 'llm' asks DeepSeek to apply the rubric, 'local' applies it in Python
+RANKING_MODE = os.getenv('RANKING_MODE', 'llm')
+
+# Local inverted index used to pre-filter projects before LLM ranking
+project_index = ProjectIndex()
+
+# Hashed char-n-gram project vectors in a memory-mapped matrix next to the database, searched alongside
+# the inverted index; rows are embedded when a project is written and mapped (not read) by create_app()
+semantic_index = VectorIndex(
+    os.getenv('SEMANTIC_INDEX_PATH', os.path.abspath('instance/project_vectors')),
+    dim=int(os.getenv('SEMANTIC_DIM', '1024'))
+)
+
+# Canonical skill bitsets per project (from the project_skill table) for instant skill coverage
+skill_taxonomy = SkillTaxonomy()
+
+# Offline implementation of the ranking rubric, also used when the API is unavailable
+local_scorer = LocalScorer()
+
+# Cache of analyze_user_requirements() results keyed on the normalized message;
+# set REQUIREMENTS_CACHE_PATH to also persist entries in a SQLite file across restarts
+REQUIREMENTS_CACHE_TTL = int(os.getenv('REQUIREMENTS_CACHE_TTL', '86400'))
+requirements_cache = TieredCache(
+    TTLCache(maxsize=int(os.getenv('REQUIREMENTS_CACHE_SIZE', '2048')), ttl=REQUIREMENTS_CACHE_TTL),
+    SQLiteCacheTier(os.getenv('REQUIREMENTS_CACHE_PATH'), ttl=REQUIREMENTS_CACHE_TTL) if os.getenv('REQUIREMENTS_CACHE_PATH') else None
+)
+
+# Cache of rank_projects() results keyed on catalog version + requirements; cleared when the catalog changes
+ranking_cache = TTLCache(maxsize=int(os.getenv('RANKING_CACHE_SIZE', '1024')), ttl=int(os.getenv('RANKING_CACHE_TTL', '3600')))
+ranking_cache_version = None
+
+# Recent chat conversations (requirements + ranked candidates) so follow-up messages refine the previous
+# results; kept in process memory, bounded by CONVERSATION_MAX and evicted after CONVERSATION_TTL seconds
+conversation_store = ConversationStore(
+    maxsize=int(os.getenv('CONVERSATION_MAX', '1000')),
+    ttl=int(os.getenv('CONVERSATION_TTL', '1800')),
+    max_items=int(os.getenv('CONVERSATION_CANDIDATES', '50'))
+)
+
+# Password hashing runs on PASSWORD_HASH_WORKERS threads so login bursts cannot take every core; at most
+# PASSWORD_HASH_QUEUE more logins wait, the rest get 503. Hashes made with other parameters are
+# replaced with PASSWORD_HASH_METHOD ones at the next successful login.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+password_hasher = PasswordHasher(
+    method=PASSWORD_HASH_METHOD,
+    workers=int(os.getenv('PASSWORD_HASH_WORKERS', '2')),
+    queue=int(os.getenv('PASSWORD_HASH_QUEUE', '32')),
+    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+)
+
+# Failed login attempts per client IP and per email, as token buckets held in process memory. Every
+# attempt takes a token from both and a successful login gives them back, so a campus behind one NAT
+# address only shares its typos; the per-email bucket is what stops password guessing on an account.
+# The buckets are per worker process: with N workers a client gets up to N times these rates and bursts.
+login_ip_limiter = TokenBucketLimiter(
+    rate=float(os.getenv('LOGIN_IP_RATE', '1')),
+    burst=float(os.getenv('LOGIN_IP_BURST', '100')),
+    maxsize=int(os.getenv('LOGIN_THROTTLE_MAX_KEYS', '10000'))
 )
+login_email_limiter = TokenBucketLimiter(
+    rate=float(os.getenv('LOGIN_EMAIL_RATE', '0.1')),
+    burst=float(os.getenv('LOGIN_EMAIL_BURST', '5')),
+    maxsize=int(os.getenv('LOGIN_THROTTLE_MAX_KEYS', '10000'))
+)
+
+# Worker threads for chat pipeline stages that overlap with request handling
+pipeline_executor = ThreadPoolExecutor(max_workers=int(os.getenv('PIPELINE_WORKERS', '8')), thread_name_prefix='match-pipeline')
+
+# Worker threads for ranking prompt chunks (separate pool so chunks never wait behind pipeline stages)
+ranking_executor = ThreadPoolExecutor(max_workers=int(os.getenv('RANK_CHUNK_WORKERS', '4')), thread_name_prefix='rank-chunk')
 
-# Available project fields
-AVAILABLE_FIELDS = ['Healthcare', 'Blockchain', 'Artificial Intelligence', 'IoT', 'Big Data', 'Cloud Computing', 'Cybersecurity']
+# Cohort batch matching: students per chunk (one scoring pass and one commit each), parallel
+# requirement extractions, projects kept per student, and the largest batch the API accepts
+BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', '100'))
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+BATCH_TOP_N = int(os.getenv('BATCH_TOP_N', '5'))
+BATCH_MAX_RECORDS = int(os.getenv('BATCH_MAX_RECORDS', '2000'))
 
-def call_deepseek_api(messages):
+# Warm-start recommendations: projects shown on the student dashboard before the first message, projects
+# kept per profile (the extra ones absorb edits without a full rescore), and how long chat waits for
+# requirement analysis before answering from the warm list instead
+WARM_START_SIZE = int(os.getenv('WARM_START_SIZE', '6'))
+WARM_START_CANDIDATES = int(os.getenv('WARM_START_CANDIDATES', '20'))
+WARM_START_FALLBACK_TIMEOUT = float(os.getenv('WARM_START_FALLBACK_TIMEOUT', '8'))
+# One background thread refreshes warm lists after catalog and profile changes
+warm_start_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='warm-start')
+
+# Bulk project import: projects inserted per transaction (each batch bumps the catalog version once)
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '100'))
+
+# Weight added to the project a student expressed interest in when building allocation preferences
+ALLOCATION_INTEREST_BONUS = float(os.getenv('ALLOCATION_INTEREST_BONUS', '2'))
+
+# Seconds to wait for requirement analysis before degrading to the lexical match
+EXTRACTION_TIMEOUT = float(os.getenv('EXTRACTION_TIMEOUT', '30'))
+
+def call_deepseek_api(messages, purpose='chat'):
     """Call DeepSeek API for conversation"""
+    logger.debug("Starting DeepSeek API call (%s), messages: %s", purpose, lazy_json(messages))
+    start = time.perf_counter()
     try:
-        print("\n" + "="*50)
-        print("Starting DeepSeek API call")
-        print(f"Request messages: {json.dumps(messages, ensure_ascii=False, indent=2)}")
-        print("-"*50)
-        
-        response = client.chat.completions.create(
+        response = llm.create(
             model="deepseek-chat",
             messages=messages,
             temperature=1.0,
@@ -48,24 +200,84 @@ def call_deepseek_api(messages):
             stream=False,
             response_format={"type": "json_object"}  # Force JSON format return
         )
-        # New API response format
-        if response.choices and len(response.choices) > 0:
-            content = response.choices[0].message.content
-            print(f"API response: {content}")
-            print("="*50 + "\n")
-            return content
-        else:
-            print("API response format error")
-            print("="*50 + "\n")
-            return None
     except Exception as e:
-        print(f"API call error: {str(e)}")
-        print("="*50 + "\n")
+        metrics.inc('llm_calls_total', call=purpose, outcome=type(e).__name__)
+        logger.warning("API call error (%s): %s", purpose, e)
         return None
+    finally:
+        metrics.observe('llm_call_seconds', time.perf_counter() - start, call=purpose)
+    record_token_usage(response.usage, purpose)
+    # New API response format
+    if response.choices and len(response.choices) > 0:
+        metrics.inc('llm_calls_total', call=purpose, outcome='ok')
+        content = response.choices[0].message.content
+        logger.debug("API response (%s): %s", purpose, content)
+        return content
+    metrics.inc('llm_calls_total', call=purpose, outcome='empty')
+    logger.warning("API response format error (%s)", purpose)
+    return None
+
+def stream_deepseek_api(messages, purpose='rank_stream'):
+    """Call DeepSeek API with stream=True, yielding content fragments as they arrive"""
+    logger.debug("Starting streaming DeepSeek API call (%s), messages: %s", purpose, lazy_json(messages))
+    metrics.inc('llm_calls_total', call=purpose, outcome='started')
+    # Closing this generator early (e.g. client disconnected) closes the HTTP stream
+    for chunk in llm.stream(
+        model="deepseek-chat",
+        messages=messages,
+        temperature=1.0,
+        max_tokens=1000,
+        top_p=0.9,
+        frequency_penalty=0.0,
+        presence_penalty=0.0,
+        response_format={"type": "json_object"},
+        stream_options={"include_usage": True}
+    ):
+        record_token_usage(getattr(chunk, 'usage', None), purpose)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def iter_streamed_array_items(fragments):
+    """Incrementally parse {"key": [{...}, {...}]} text, yielding each array object once it is complete"""
+    buffer = ''
+    depth = 0
+    in_string = False
+    escaped = False
+    item_start = None
+    position = 0
+    for fragment in fragments:
+        buffer += fragment
+        while position < len(buffer):
+            char = buffer[position]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in '{[':
+                if char == '{' and depth == 2:
+                    item_start = position
+                depth += 1
+            elif char in '}]':
+                depth -= 1
+                if char == '}' and depth == 2 and item_start is not None:
+                    yield json.loads(buffer[item_start:position + 1])
+                    item_start = None
+            position += 1
 
 def analyze_user_requirements(user_input):
     """Analyze user requirements, extract keywords and fields"""
-    print(f"\nStarting user requirement analysis: {user_input}")
+    logger.debug("Starting user requirement analysis: %s", user_input)
+    
+    cache_key = normalize_message(user_input)
+    cached = requirements_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        logger.debug("Requirement analysis cache hit")
+        return cached
     
     messages = [
         {
@@ -113,44 +325,207 @@ Must output valid JSON format:
         }
     ]
     
-    print("Calling DeepSeek API for requirement analysis...")
-    response = call_deepseek_api(messages)
+    response = call_deepseek_api(messages, 'extract')
     if not response:
-        print("API call failed, returning None")
+        logger.warning("Requirement analysis API call failed, returning None")
         return None
         
     try:
         result = json.loads(response)
-        print(f"Requirement analysis result: {json.dumps(result, ensure_ascii=False, indent=2)}")
+        logger.debug("Requirement analysis result: %s", lazy_json(result))
         
         # Check if result is empty AND user input seems generic
         is_result_empty = not (result.get('fields') or result.get('keywords') or result.get('features') or result.get('skills'))
         is_input_generic = any(keyword in user_input for keyword in ['what projects', 'show projects', 'all projects', 'view projects', 'project recommendations'])
         
         if is_result_empty and is_input_generic:
-            print("AI failed to extract specific requirements, and user input seems like generic query, returning None")
+            logger.info("AI failed to extract specific requirements, and user input seems like generic query, returning None")
             return None
             
+        if cache_key:
+            requirements_cache.set(cache_key, result)
         return result
     except Exception as e:
-        print(f"Requirement analysis failed: {str(e)}")
-        print(f"API response content: {response}")
+        logger.warning("Requirement analysis failed: %s; API response content: %s", e, response)
         return None
 
-def rank_projects(requirements, projects):
-    """Rank projects based on user requirements"""
-    print(f"\nStarting project ranking...")
+def rank_projects(requirements, projects, catalog_version=None):
+    """Rank projects based on user requirements; results are cached per catalog_version when given"""
+    ranked_items = score_projects(requirements, projects, catalog_version)
+    if ranked_items is None:
+        return projects
+    return apply_ranking(ranked_items, projects)
+
+def score_projects(requirements, projects, catalog_version=None):
+    """{id, score, reasoning} items for rank_projects, or None when there are no specific requirements"""
     # Ensure requirements is a dict, even if some keys are missing
     req_data = requirements if isinstance(requirements, dict) else {}
-    print(f"User requirements: {json.dumps(req_data, ensure_ascii=False)}")
-    print(f"Available projects: {[{'id': p.id, 'name': p.name, 'field': p.field, 'skills': p.skill_requirements} for p in projects]}")
-    
+    logger.debug("Ranking %d projects for requirements: %s", len(projects), lazy_json(req_data))
+
     # If no requirements (or fields, keywords, skills are all empty), return all projects
     if not req_data or (not req_data.get('fields') and not req_data.get('keywords') and not req_data.get('skills')):
-        print("No specific requirements (fields, keywords, skills all empty), returning all projects")
-        return projects
+        logger.debug("No specific requirements (fields, keywords, skills all empty), returning all projects")
+        return None
+
+    cache_key = None
+    if catalog_version is not None:
+        cache_key = ranking_cache_key(req_data, projects, catalog_version)
+        cached_items = get_cached_ranking(cache_key, catalog_version)
+        if cached_items is not None:
+            logger.debug("Project ranking cache hit")
+            return cached_items
+
+    complete = True
+    if RANKING_MODE == 'local':
+        ranked_items = local_scorer.score(req_data, projects)
+    else:
+        ranked_items, complete = llm_rank_projects(req_data, projects)
+        if ranked_items is None:
+            logger.warning("LLM ranking unavailable, falling back to local scoring")
+            # Fallback results are not cached so the LLM is retried once it recovers
+            return local_scorer.score(req_data, projects)
+    # A ranking with locally scored chunks is not cached either
+    if cache_key is not None and complete:
+        ranking_cache.set(cache_key, ranked_items)
+    return ranked_items
+
+def canonical_requirements(req_data):
+    """Order-, case- and whitespace-insensitive form of an analyze_user_requirements() result"""
+    return {
+        key: sorted({' '.join(str(v).lower().split()) for v in req_data.get(key) or []})
+        for key in ('fields', 'keywords', 'features', 'skills')
+    }
+
+def ranking_cache_key(req_data, projects, catalog_version):
+    """Canonical hash of the requirements and candidate set, scoped to a catalog version"""
+    canonical = canonical_requirements(req_data)
+    canonical['mode'] = RANKING_MODE
+    canonical['projects'] = sorted(p.id for p in projects)
+    digest = hashlib.sha256(json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+    return (catalog_version, digest)
+
+def get_cached_ranking(cache_key, catalog_version):
+    """Look up a cached ranking, dropping every entry from older catalog versions first"""
+    global ranking_cache_version
+    if ranking_cache_version != catalog_version:
+        ranking_cache.clear()
+        ranking_cache_version = catalog_version
+        return None
+    return ranking_cache.get(cache_key)
+
+def ranking_chunks(projects):
+    """Compact projects to the per-project budget and split them into prompt-sized chunks"""
+    compacted = [compact_project(p, RANK_PROJECT_TOKENS) for p in projects]
+    return pack_chunks(compacted, RANK_PROMPT_TOKENS, RANK_CHUNK_SIZE)
+
+def llm_rank_projects(req_data, projects):
+    """Ask DeepSeek to score projects, returning (its ranked_projects list or None on failure, complete)
+
+    Projects that do not fit one prompt are ranked in concurrent chunks (map) and the per-chunk
+    rankings are combined with a k-way merge on score (reduce). A failed chunk is scored locally,
+    and `complete` is then False: the result mixes two scoring scales and should not be cached.
+    """
+    chunks = ranking_chunks(projects)
+    if len(chunks) <= 1:
+        ranked_items = llm_rank_chunk(req_data, chunks[0] if chunks else [])
+        return ranked_items, ranked_items is not None
     
-    messages = [
+    logger.debug("Ranking %d projects in %d chunks", len(projects), len(chunks))
+    by_id = {p.id: p for p in projects}
+    futures = [ranking_executor.submit(llm_rank_chunk, req_data, chunk) for chunk in chunks]
+    rankings = []
+    failed = 0
+    for chunk, future in zip(chunks, futures):
+        items = future.result()
+        if items is None:
+            failed += 1
+            items = local_scorer.score(req_data, [by_id[entry['id']] for entry in chunk])
+        rankings.append(sorted(items, key=lambda item: -item.get('score', 0)))
+    if failed == len(chunks):
+        return None, False
+    if failed:
+        logger.warning("%d of %d ranking chunks failed and were scored locally", failed, len(chunks))
+    return list(heapq.merge(*rankings, key=lambda item: -item.get('score', 0))), not failed
+
+def llm_rank_chunk(req_data, compact_projects):
+    """Rank one chunk of compacted projects with a single API call"""
+    messages = build_ranking_messages(req_data, compact_projects)
+    response = call_deepseek_api(messages, 'rank')
+    if not response:
+        return None
+        
+    try:
+        result = json.loads(response)
+        logger.debug("Project matching result: %s", lazy_json(result))
+        return list(result['ranked_projects'])
+    except Exception as e:
+        logger.warning("Error in project matching process: %s; API response content: %s", e, response)
+        return None
+
+def iter_rank_projects(req_data, projects, catalog_version=None):
+    """Streaming counterpart of rank_projects, yielding {id, score, reasoning} items as they are scored"""
+    cache_key = None
+    if catalog_version is not None:
+        cache_key = ranking_cache_key(req_data, projects, catalog_version)
+        cached_items = get_cached_ranking(cache_key, catalog_version)
+        if cached_items is not None:
+            logger.debug("Project ranking cache hit")
+            yield from cached_items
+            return
+    
+    if RANKING_MODE == 'local':
+        ranked_items = local_scorer.score(req_data, projects)
+        yield from ranked_items
+    elif len(projects) > RANK_CHUNK_SIZE:
+        # Chunked ranking is already parallel; stream its merged result
+        ranked_items, complete = llm_rank_projects(req_data, projects)
+        if ranked_items is None:
+            logger.warning("LLM ranking unavailable, falling back to local scoring")
+            yield from local_scorer.score(req_data, projects)
+            return
+        yield from ranked_items
+        if not complete:
+            return
+    else:
+        ranked_items = []
+        received = []
+        compacted = [compact_project(p, RANK_PROJECT_TOKENS) for p in projects]
+        try:
+            fragments = recorded(stream_deepseek_api(build_ranking_messages(req_data, compacted)), received)
+            for item in iter_streamed_array_items(fragments):
+                if isinstance(item, dict) and 'id' in item:
+                    ranked_items.append(item)
+                    yield item
+        except Exception as e:
+            logger.warning("Streaming project matching failed: %s", e)
+        seen = {item['id'] for item in ranked_items}
+        missing = [p for p in projects if p.id not in seen]
+        if missing or not is_ranking_response(''.join(received)):
+            # Cut off, prose or an empty array: score what the LLM did not, as llm_rank_chunk() does for
+            # unparseable output. Partial results are not cached so the LLM is asked again next time.
+            logger.warning("Streamed ranking incomplete (%d of %d projects), scoring the rest locally",
+                           len(seen), len(projects))
+            yield from local_scorer.score(req_data, missing)
+            return
+    if cache_key is not None:
+        ranking_cache.set(cache_key, ranked_items)
+
+def recorded(fragments, received):
+    """Pass streamed fragments through, appending each to `received`"""
+    for fragment in fragments:
+        received.append(fragment)
+        yield fragment
+
+def is_ranking_response(text):
+    """Whether a complete ranking call response parses to {"ranked_projects": [...]}"""
+    try:
+        return isinstance(json.loads(text).get('ranked_projects'), list)
+    except (ValueError, AttributeError):
+        return False
+
+def build_ranking_messages(req_data, compact_projects):
+    """Build the system and user messages for the ranking call from compact_project() dicts"""
+    return [
         {
             "role": "system",
             "content": """#### Role
@@ -202,36 +577,28 @@ Must output valid JSON format:
         {
             "role": "user",
             "content": f"""Student Requirements: {json.dumps(req_data, ensure_ascii=False)}
-Project List: {json.dumps([{'id': p.id, 'name': p.name, 'description': p.description, 'field': p.field, 'skill_requirements': p.skill_requirements or ''} for p in projects], ensure_ascii=False)}"""
+Project List: {json.dumps(compact_projects, ensure_ascii=False)}"""
         }
     ]
-    
-    print("Calling DeepSeek API for project matching...")
-    response = call_deepseek_api(messages)
-    if not response:
-        print("API call failed, returning all projects")
-        return projects
-        
-    try:
-        result = json.loads(response)
-        print(f"Project matching result: {json.dumps(result, ensure_ascii=False, indent=2)}")
-        # Adjust threshold based on new total score, e.g., projects with matching score >= 3 or 4
-        ranked_ids = [item['id'] for item in result['ranked_projects'] if item.get('score', 0) >= 3] # Threshold adjustable
-        if not ranked_ids:
-            print("No projects found with sufficient matching score, returning all projects")
-            return projects  # If no matching projects, return all projects
-        matched_projects = sorted(
-            [p for p in projects if p.id in ranked_ids],
-            key=lambda p: ranked_ids.index(p.id)
-        )
-        print(f"Matched projects: {[p.name for p in matched_projects]}")
-        return matched_projects
-    except Exception as e:
-        print(f"Error in project matching process: {str(e)}")
-        print(f"API response content: {response}")
-        return projects  # If error occurs, return all projects
+
+def apply_ranking(ranked_items, projects):
+    """Filter and order projects by a list of {id, score, reasoning} items"""
+    # Adjust threshold based on new total score, e.g., projects with matching score >= 3 or 4
+    ranked_ids = [item['id'] for item in ranked_items if item.get('score', 0) >= SCORE_THRESHOLD] # Threshold adjustable
+    if not ranked_ids:
+        logger.debug("No projects found with sufficient matching score, returning all projects")
+        return projects  # If no matching projects, return all projects
+    positions = {project_id: i for i, project_id in reversed(list(enumerate(ranked_ids)))}
+    matched_projects = sorted(
+        [p for p in projects if p.id in positions],
+        key=lambda p: positions[p.id]
+    )
+    logger.debug("Matched project ids: %s", [p.id for p in matched_projects])
+    return matched_projects
 
 db = SQLAlchemy(app)
+with app.app_context():
+    install_sqlite_pragmas(db.engine, sqlite_pragmas())
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'default_login'  # type: ignore
@@ -240,7 +607,7 @@ login_manager.login_view = 'default_login'  # type: ignore
 class User(UserMixin, db.Model):  # type: ignore
     id = db.Column(db.Integer, primary_key=True)  # type: ignore
     email = db.Column(db.String(120), unique=True, nullable=False)  # type: ignore
-    password_hash = db.Column(db.String(128))  # type: ignore
+    password_hash = db.Column(db.String(256))  # type: ignore
     is_teacher = db.Column(db.Boolean, default=False)  # type: ignore
     projects = db.relationship('Project', backref='teacher', lazy=True)  # type: ignore
 
@@ -250,14 +617,140 @@ class Project(db.Model):  # type: ignore
     description = db.Column(db.Text, nullable=False)  # type: ignore
     field = db.Column(db.String(50), nullable=False)  # type: ignore
     skill_requirements = db.Column(db.Text, nullable=True)  # type: ignore
-    teacher_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # type: ignore
+    capacity = db.Column(db.Integer, nullable=False, default=1)  # type: ignore  # seats filled by /api/allocation/run
+    interest_count = db.Column(db.Integer, nullable=False, default=0)  # type: ignore  # maintained by count_interest()
+    teacher_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)  # type: ignore
     interested_students = db.relationship('StudentInterest', backref='project', lazy=True)  # type: ignore
 
 class StudentInterest(db.Model):  # type: ignore
     id = db.Column(db.Integer, primary_key=True)  # type: ignore
-    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # type: ignore
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)  # type: ignore
+    # One selected project per student, enforced by the database so concurrent requests cannot both insert
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True, nullable=False)  # type: ignore
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)  # type: ignore
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)  # type: ignore
+    student = db.relationship('User', backref=db.backref('interests', lazy=True))  # type: ignore
+
+class Recommendation(db.Model):  # type: ignore
+    """Latest batch recommendation run for a student (written by /api/match/batch and `flask match-batch`)"""
+    id = db.Column(db.Integer, primary_key=True)  # type: ignore
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True, nullable=False)  # type: ignore
+    message = db.Column(db.Text, nullable=False)  # type: ignore
+    message_hash = db.Column(db.String(64), nullable=False)  # type: ignore
+    requirements = db.Column(db.Text, nullable=True)  # type: ignore  # JSON
+    results = db.Column(db.Text, nullable=False)  # type: ignore  # JSON list of {id, score, reasoning}
+    catalog_version = db.Column(db.Integer, nullable=False)  # type: ignore
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # type: ignore
+    student = db.relationship('User', backref=db.backref('recommendation', uselist=False))  # type: ignore
+
+class StudentProfile(db.Model):  # type: ignore
+    """A student's latest analyzed requirements and their precomputed warm-start recommendations"""
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)  # type: ignore
+    requirements = db.Column(db.Text, nullable=False)  # type: ignore  # JSON, from chat or batch matching
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # type: ignore
+    warm_results = db.Column(db.Text, nullable=True)  # type: ignore  # JSON list of {id, score, reasoning}, best first
+    catalog_version = db.Column(db.Integer, nullable=True)  # type: ignore  # catalog warm_results reflect; NULL = stale
+    refreshed_at = db.Column(db.DateTime, nullable=True)  # type: ignore
+
+class Allocation(db.Model):  # type: ignore
+    """Project a student was assigned by the last applied allocation run"""
+    id = db.Column(db.Integer, primary_key=True)  # type: ignore
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True, nullable=False)  # type: ignore
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)  # type: ignore
+    method = db.Column(db.String(20), nullable=False)  # type: ignore
+    weight = db.Column(db.Float, nullable=False)  # type: ignore
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # type: ignore
+    student = db.relationship('User', backref=db.backref('allocation', uselist=False))  # type: ignore
+    project = db.relationship('Project', backref=db.backref('allocations', lazy=True))  # type: ignore
+
+class InterestActivity(db.Model):  # type: ignore
+    """Selections and cancellations of a project per UTC day, counted as they happen (see analytics.py)"""
+    day = db.Column(db.Date, primary_key=True)  # type: ignore
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), primary_key=True, index=True)  # type: ignore
+    selections = db.Column(db.Integer, nullable=False, default=0)  # type: ignore
+    cancellations = db.Column(db.Integer, nullable=False, default=0)  # type: ignore
+
+class Skill(db.Model):  # type: ignore
+    """Canonical skill name; projects link to it through project_skill (maintained by skills.py)"""
+    id = db.Column(db.Integer, primary_key=True)  # type: ignore
+    name = db.Column(db.String(100), unique=True, nullable=False)  # type: ignore
+
+class SkillAlias(db.Model):  # type: ignore
+    """Alternative spelling of a skill (e.g. "k8s" for "kubernetes"), applied when project skills are normalized"""
+    alias = db.Column(db.String(100), primary_key=True)  # type: ignore
+    skill_id = db.Column(db.Integer, db.ForeignKey('skill.id'), nullable=False, index=True)  # type: ignore
+    skill = db.relationship('Skill', backref=db.backref('aliases', lazy=True))  # type: ignore
+
+project_skill = db.Table(
+    'project_skill',
+    db.Column('project_id', db.Integer, db.ForeignKey('project.id'), primary_key=True),
+    db.Column('skill_id', db.Integer, db.ForeignKey('skill.id'), primary_key=True, index=True)
+)
+
+def sync_project_indexes(projects, catalog_version):
+    """Rebuild local match indexes when another worker (or an earlier edit) changed the catalog"""
+    if not project_index.built or project_index.version != catalog_version:
+        project_index.build(projects, catalog_version)
+    if not semantic_index.built or semantic_index.version != catalog_version or len(semantic_index) != len(projects):
+        # Picks up rows written by other workers and embeds only projects whose text changed; the first
+        # sync of a process always runs, checking vectors loaded from disk against the projects' text
+        semantic_index.build(projects, catalog_version)
+    if not skill_taxonomy.built or skill_taxonomy.version != catalog_version:
+        connection = db.session.connection()  # type: ignore
+        skill_taxonomy.build(project_skill_rows(connection), load_aliases(connection), catalog_version)
+
+def refresh_project_indexes(project):
+    """Keep local match indexes in sync after a project is created or edited"""
+    catalog_version = get_catalog_version()
+    if project_index.built:
+        project_index.update(project)
+        # Stay current only if this was the sole change since the index was built
+        if project_index.version == catalog_version - 1:
+            project_index.version = catalog_version
+    # Embed at write time; only this project's row of the shared matrix is rewritten
+    semantic_index.update(project, catalog_version if semantic_index.version == catalog_version - 1 else None)
+    if skill_taxonomy.built:
+        skill_taxonomy.set_project(project.id, canonical_skills(project.skill_requirements, load_aliases(db.session.connection())))  # type: ignore
+        if skill_taxonomy.version == catalog_version - 1:
+            skill_taxonomy.version = catalog_version
+
+def save_project_skills(project):
+    """Write the project's normalized skills (project_skill rows) in the current transaction, before commit"""
+    db.session.flush()  # type: ignore
+    connection = db.session.connection()  # type: ignore
+    set_project_skills(connection, project.id, project.skill_requirements, load_aliases(connection))
+
+class DataVersion(db.Model):  # type: ignore
+    """Monotonic counters bumped whenever a dataset changes, used to invalidate caches across workers"""
+    name = db.Column(db.String(50), primary_key=True)  # type: ignore
+    version = db.Column(db.Integer, nullable=False, default=0)  # type: ignore
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # type: ignore
+
+def get_data_version(name):
+    return db.session.query(DataVersion.version).filter_by(name=name).scalar() or 0  # type: ignore
+
+def bump_data_version(name):
+    """Increment a version counter as part of the current transaction"""
+    result = db.session.execute(  # type: ignore
+        update(DataVersion).where(DataVersion.name == name).values(version=DataVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        db.session.add(DataVersion(name=name, version=1, updated_at=datetime.utcnow()))  # type: ignore
+
+def get_data_versions(*names):
+    """{name: (version, updated_at)} for several counters in one query; missing counters are (0, None)"""
+    rows = db.session.query(DataVersion).filter(DataVersion.name.in_(names)).all()  # type: ignore
+    versions = {name: (0, None) for name in names}
+    versions.update({row.name: (row.version, row.updated_at) for row in rows})
+    return versions
+
+def get_catalog_version():
+    return get_data_version('catalog')
+
+def bump_catalog_version():
+    """Bump the catalog version in the current transaction and return the new version"""
+    bump_data_version('catalog')
+    # Reads this transaction's own write; the row stays locked until commit, so the value is exact
+    return get_catalog_version()
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -266,9 +759,106 @@ def load_user(user_id):
 @app.context_processor
 def utility_processor():
     def get_user(user_id):
-        return User.query.get(user_id)
+        # Per-request identity cache so templates looking up the same user do not re-query
+        cache = g.setdefault('user_cache', {})
+        if user_id not in cache:
+            cache[user_id] = db.session.get(User, user_id)  # type: ignore
+        return cache[user_id]
     return dict(get_user=get_user)
 
+class QueryCounter:
+    """Counts SQL statements issued by the current thread, for pinning routes to a fixed query budget
+
+    with QueryCounter() as queries:
+        client.get('/teacher/dashboard')
+    queries.assert_at_most(4)
+    """
+
+    def __init__(self):
+        self.statements = []
+        self._thread_id = None
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        with app.app_context():
+            self._engine = db.engine
+        event.listen(self._engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self._engine, 'before_cursor_execute', self._record)
+        return False
+
+    def assert_at_most(self, limit):
+        assert self.count <= limit, f"Expected at most {limit} queries, got {self.count}:\n" + '\n'.join(self.statements)
+
+    def assert_count(self, expected):
+        assert self.count == expected, f"Expected {expected} queries, got {self.count}:\n" + '\n'.join(self.statements)
+
+@app.before_request
+def start_request_instrumentation():
+    g.request_started = time.perf_counter()
+    start_request_trace(request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16])
+
+@app.after_request
+def finish_request_instrumentation(response):
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.endpoint or 'unknown'
+        metrics.observe('http_request_seconds', time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        metrics.inc('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    response.headers['X-Request-ID'] = request_id_var.get()
+    spans = current_spans()
+    if spans and 'Server-Timing' not in response.headers:
+        response.headers['Server-Timing'] = ', '.join(f"{name};dur={duration:.1f}" for name, duration in spans)
+    return response
+
+def collect_app_metrics():
+    """Gauge samples read at scrape time: cache hit/miss counters, circuit breaker state and DB pool usage"""
+    requirements_stats = requirements_cache.stats()
+    ranking_stats = ranking_cache.stats()
+    return [
+        ('cache_hits', {'cache': 'requirements'}, requirements_stats['hits']),
+        ('cache_misses', {'cache': 'requirements'}, requirements_stats['misses']),
+        ('cache_entries', {'cache': 'requirements'}, requirements_stats['memory']['size']),
+        ('cache_hits', {'cache': 'ranking'}, ranking_stats['hits']),
+        ('cache_misses', {'cache': 'ranking'}, ranking_stats['misses']),
+        ('cache_entries', {'cache': 'ranking'}, ranking_stats['size']),
+        ('llm_circuit_open', {}, 1 if llm.breaker.is_open else 0),
+        ('chat_conversations', {}, len(conversation_store)),
+        ('password_hashes_in_flight', {}, password_hasher.in_flight),
+        ('login_throttle_keys', {'key': 'ip'}, len(login_ip_limiter)),
+        ('login_throttle_keys', {'key': 'email'}, len(login_email_limiter))
+    ] + [('db_pool_connections', {'state': state}, count) for state, count in pool_stats(db.engine).items()]
+
+metrics.register_collector(collect_app_metrics)
+metrics.describe('http_request_seconds', 'Request latency by endpoint')
+metrics.describe('stage_duration_seconds', 'Chat pipeline stage latency')
+metrics.describe('llm_call_seconds', 'DeepSeek API call latency including retries')
+metrics.describe('llm_calls_total', 'DeepSeek API calls by purpose and outcome')
+metrics.describe('llm_tokens_total', 'Tokens reported in DeepSeek API usage blocks')
+metrics.describe('http_not_modified_total', 'Conditional GETs answered with 304 Not Modified')
+metrics.describe('chat_turns_total', 'Chat messages by how they were answered: a new search or a refinement mode')
+metrics.describe('warm_start_refreshes_total', 'Warm-start lists refreshed, by merging changed projects or rescoring the catalog')
+metrics.describe('login_attempts_total', 'Login form submissions by outcome: ok, failed, throttled or busy')
+metrics.describe('interest_conflicts_total', 'Interest inserts rejected by the one-project-per-student constraint')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus-format metrics; set METRICS_TOKEN to require a bearer token"""
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -278,41 +868,80 @@ def default_login():
     # Default redirect to student login page
     return redirect(url_for('login', role='student'))
 
+def login_throttle_keys(email):
+    return request.remote_addr or '-', (email or '').strip().lower()
+
+def login_retry_after(email):
+    """Seconds until this client may try to log in as `email` again, or 0 (takes a token from both buckets)"""
+    ip_key, email_key = login_throttle_keys(email)
+    allowed, retry_after = login_ip_limiter.acquire(ip_key)
+    if allowed:
+        allowed, retry_after = login_email_limiter.acquire(email_key)
+        if not allowed:
+            # Attempts on a locked account are turned away before hashing; they do not drain the IP's budget
+            login_ip_limiter.refund(ip_key)
+    return 0 if allowed else retry_after
+
+def login_error(role, message, status, retry_after):
+    flash(message)
+    response = make_response(render_template('login.html', role=role), status)
+    response.headers['Retry-After'] = str(max(math.ceil(retry_after), 1))
+    return response
+
+def rehash_password(user, password):
+    """Store the password again with PASSWORD_HASH_METHOD; skipped (until the next login) when hashing is busy"""
+    try:
+        user.password_hash = password_hasher.hash(password)
+    except HasherBusy:
+        return
+    db.session.commit()  # type: ignore
+    logger.info("Rehashed password of user %s with %s", user.id, PASSWORD_HASH_METHOD)
+
 @app.route('/login/<role>', methods=['GET', 'POST'])
 def login(role):
-    print(f"Login route accessed - Method: {request.method}, Role: {role}")
-    
     if request.method == 'POST':
-        print(f"Login form data: {request.form}")
-        
         email = request.form.get('email')
         password = request.form.get('password')
         
-        print(f"Login attempt - Email: {email}, Role: {role}, Password provided: {'Yes' if password else 'No'}")
+        retry_after = login_retry_after(email)
+        if retry_after:
+            metrics.inc('login_attempts_total', outcome='throttled')
+            logger.info("Login throttled for role %s", role)
+            return login_error(role, 'Too many login attempts. Please wait a moment and try again.', 429, retry_after)
         
         user = User.query.filter_by(email=email).first()
-        print(f"User exists: {'Yes' if user else 'No'}")
         
-        if user and password and check_password_hash(user.password_hash, password):
-            print(f"Password verification passed")
-            
+        try:
+            with span('password_verify'):
+                verified = user is not None and password_hasher.verify(user.password_hash, password)
+        except HasherBusy:
+            metrics.inc('login_attempts_total', outcome='busy')
+            logger.warning("Login rejected: password hashing is saturated")
+            return login_error(role, 'Login is busy right now. Please try again in a few seconds.', 503, 1)
+        
+        if verified:
+            metrics.inc('login_attempts_total', outcome='ok')
+            ip_key, email_key = login_throttle_keys(email)
+            login_ip_limiter.refund(ip_key)
+            login_email_limiter.refund(email_key)
+            if password_hasher.needs_rehash(user.password_hash):
+                rehash_password(user, password)
             # Verify user role
             if (role == 'teacher' and not user.is_teacher) or (role == 'student' and user.is_teacher):
-                print(f"Role mismatch - User is teacher: {user.is_teacher}, Requested role: {role}")
+                logger.info("Login role mismatch for user %s (is_teacher=%s, requested role=%s)", user.id, user.is_teacher, role)
                 flash('Not authorized to login with this role.')
                 return redirect(url_for('login', role=role))
             
             login_user(user)
-            print(f"Login successful - User is teacher: {user.is_teacher}")
+            logger.info("Login successful for user %s (is_teacher=%s)", user.id, user.is_teacher)
             
             if user.is_teacher:
-                print(f"Redirecting to teacher dashboard")
                 return redirect(url_for('teacher_dashboard'))
             else:
-                print(f"Redirecting to student dashboard")
                 return redirect(url_for('student_dashboard'))
         else:
-            print(f"Password verification failed or user not found")
+            metrics.inc('login_attempts_total', outcome='failed')
+            logger.info("Login failed for role %s: password verification failed or user not found", role)
             flash('Incorrect email or password.')
             
     return render_template('login.html', role=role)
@@ -323,7 +952,10 @@ def teacher_dashboard():
     if not current_user.is_teacher:
         flash('Unauthorized access.')
         return redirect(url_for('student_dashboard'))
-    projects = Project.query.filter_by(teacher_id=current_user.id).all()
+    # Load interests and their students up front instead of one lazy load per project and student
+    projects = Project.query.filter_by(teacher_id=current_user.id).options(
+        selectinload(Project.interested_students).joinedload(StudentInterest.student)
+    ).all()
     return render_template('teacher_dashboard.html', projects=projects)
 
 @app.route('/student/dashboard')
@@ -334,8 +966,30 @@ def student_dashboard():
         return redirect(url_for('teacher_dashboard'))
     
     # Get student's selected projects
-    interests = StudentInterest.query.filter_by(student_id=current_user.id).all()
-    return render_template('student_dashboard.html', interests=interests)
+    interests = StudentInterest.query.filter_by(student_id=current_user.id).options(
+        joinedload(StudentInterest.project)
+    ).all()
+    return render_template('student_dashboard.html', interests=interests, warm_start=warm_start_matches())
+
+def warm_start_matches():
+    """The current student's stored warm-start list as chat results, best first; stale lists are shown and refreshed"""
+    profile = db.session.get(StudentProfile, current_user.id)  # type: ignore
+    if profile is None:
+        return []
+    if profile.catalog_version != get_catalog_version():
+        schedule_warm_refresh(student_ids=[current_user.id])
+    items = json.loads(profile.warm_results or '[]')[:WARM_START_SIZE]
+    if not items:
+        return []
+    by_id = {
+        p.id: p for p in Project.query.options(joinedload(Project.teacher)).filter(Project.id.in_([item['id'] for item in items]))
+    }
+    # Skill coverage needs this worker's skill bitsets, which the first chat builds; until then it is left out
+    mask = student_skill_mask(json.loads(profile.requirements)) if skill_taxonomy.built else None
+    return [
+        serialize_match(by_id[item['id']], mask, score=item['score'], reasoning=item.get('reasoning', ''))
+        for item in items if item['id'] in by_id
+    ]
 
 @app.route('/logout')
 @login_required
@@ -343,6 +997,492 @@ def logout():
     logout_user()
     return redirect(url_for('index'))
 
+class MatchPipeline:
+    """Chat matching stages, with requirement analysis running while the catalog loads
+
+    Analysis is submitted to pipeline_executor as soon as the pipeline starts. Meanwhile the request
+    thread loads the catalog and runs a cheap lexical match on the raw message, which is later fused
+    with the requirement-based shortlist. Per-stage timings (ms) are collected for Server-Timing.
+    """
+
+    def __init__(self, user_input):
+        self.user_input = user_input
+        self.timings = {}
+        self.cancelled = threading.Event()
+        self.degraded = False
+        self.catalog_version = None
+        self.projects = []
+        self.lexical_hits = []
+        self.semantic_hits = []
+        self._extraction = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            with span(name):
+                yield
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+    def start(self):
+        # Run in a copy of the request's context so logs and spans keep the request id
+        self._extraction = pipeline_executor.submit(contextvars.copy_context().run, self._extract)
+        return self
+
+    def _extract(self):
+        if self.cancelled.is_set():
+            return None
+        with self.stage('extract'):
+            return analyze_user_requirements(self.user_input)
+
+    def load_catalog(self):
+        with self.stage('catalog'):
+            self.catalog_version = get_catalog_version()
+            self.projects = Project.query.options(joinedload(Project.teacher)).all()
+            logger.debug("Projects in database: %d", len(self.projects))
+            sync_project_indexes(self.projects, self.catalog_version)
+        with self.stage('lexical'):
+            self.lexical_hits = project_index.search_terms(tokenize(self.user_input), limit=SHORTLIST_SIZE)
+        with self.stage('semantic'):
+            self.semantic_hits = semantic_index.search_text(self.user_input, limit=SHORTLIST_SIZE)
+        return self
+
+    def wait_for_requirements(self, timeout=None):
+        """Block until analysis finishes; None if it failed, was generic or exceeded `timeout` (EXTRACTION_TIMEOUT)
+
+        A timeout or an open circuit breaker marks the pipeline as degraded (lexical results only).
+        """
+        timeout = timeout or EXTRACTION_TIMEOUT
+        with self.stage('extract_wait'):
+            try:
+                requirements = self._extraction.result(timeout=timeout)
+            except FutureTimeoutError:
+                logger.warning("Requirement analysis exceeded %ss, using lexical match", timeout)
+                self._extraction.cancel()
+                self.degraded = True
+                return None
+        if requirements is None and llm.breaker.is_open:
+            logger.warning("LLM circuit breaker is open, using lexical match")
+            self.degraded = True
+        return requirements
+
+    def candidates(self, requirements):
+        """Narrow the catalog to the shortlist sent for ranking"""
+        # Only ship a bounded shortlist to the LLM; without requirements the full list is returned as before
+        if not requirements:
+            return self.projects
+        with self.stage('shortlist'):
+            projects = shortlist_projects(
+                project_index, requirements, self.projects, SHORTLIST_SIZE, [self.lexical_hits, self.semantic_hits],
+                scorer=local_scorer
+            )
+        logger.debug("Shortlisted project ids: %s", [p.id for p in projects])
+        return projects
+
+    def lexical_projects(self, fallback_ids=()):
+        """Degraded result when analysis is unavailable: projects ordered by the raw-message matches
+
+        `fallback_ids` (the student's warm-start list) follow the message's own matches.
+        """
+        by_id = {p.id: p for p in self.projects}
+        fused = fuse_rankings([self.lexical_hits, self.semantic_hits, full_text_hits(self.user_input, SHORTLIST_SIZE)])
+        matched = [by_id[project_id] for project_id in fused if project_id in by_id]
+        seen = {p.id for p in matched}
+        matched += [by_id[project_id] for project_id in fallback_ids if project_id in by_id and project_id not in seen]
+        return matched or self.projects
+
+    def cancel(self):
+        self.cancelled.set()
+        if self._extraction is not None:
+            self._extraction.cancel()
+
+    def stage_timings(self):
+        return {name: round(duration, 1) for name, duration in self.timings.items()}
+
+
+def full_text_hits(query, limit):
+    """[(project_id, score)] matching any word of `query` (as a prefix) in the FTS5 index; [] without FTS5"""
+    terms = query_terms(query)
+    if not terms or not project_search_uses_fts():
+        return []
+    with span('fts_search'):
+        rows, _ = search_project_ids(db.session.connection(), fts_match_expression(terms, any_term=True), limit=limit)  # type: ignore
+    return [(project_id, score) for project_id, score, _ in rows]
+
+_fts_available = False
+
+def project_search_uses_fts():
+    """Whether the FTS5 table exists; a negative answer is re-checked so a later migration is picked up"""
+    global _fts_available
+    if not _fts_available:
+        _fts_available = fts_available(db.session.connection())  # type: ignore
+    return _fts_available
+
+def serialize_project(p):
+    return {
+        'id': p.id,
+        'name': p.name,
+        'description': p.description,
+        'field': p.field,
+        'skill_requirements': p.skill_requirements or '',
+        'teacher_email': p.teacher.email
+    }
+
+def serialize_match(p, student_mask, **extra):
+    """serialize_project() for a chat result, plus the student's skill_coverage when their skills are known"""
+    data = dict(serialize_project(p), **extra)
+    if student_mask is not None:
+        coverage = skill_taxonomy.coverage(p.id, student_mask)
+        if coverage is not None:
+            data['skill_coverage'] = coverage
+    return data
+
+def student_skill_mask(requirements):
+    """SkillTaxonomy bitmask of the extracted student skills, or None when the student named none"""
+    skills = requirements.get('skills') if isinstance(requirements, dict) else None
+    return skill_taxonomy.mask(skills) if skills else None
+
+# Selectable fields of the list APIs: name -> getter
+PROJECT_FIELDS = {
+    'id': lambda p: p.id,
+    'name': lambda p: p.name,
+    'description': lambda p: p.description,
+    'field': lambda p: p.field,
+    'skill_requirements': lambda p: p.skill_requirements or '',
+    'capacity': lambda p: p.capacity,
+    'teacher_email': lambda p: p.teacher.email
+}
+INTEREST_FIELDS = {
+    'id': lambda i: i.id,
+    'student_id': lambda i: i.student_id,
+    'student_email': lambda i: i.student.email,
+    'project_id': lambda i: i.project_id,
+    'project_name': lambda i: i.project.name,
+    'timestamp': lambda i: i.timestamp.isoformat() if i.timestamp else None
+}
+
+class ListQueryError(ValueError):
+    pass
+
+def parse_list_args(available):
+    """(fields, after, limit) from ?fields=a,b&after=<id>&limit=<n>; raises ListQueryError on bad input"""
+    requested = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    unknown = [f for f in requested if f not in available]
+    if unknown:
+        raise ListQueryError(f"Unknown fields: {', '.join(unknown)}")
+    fields = list(dict.fromkeys(['id'] + requested)) if requested else list(available)
+    try:
+        after = int(request.args.get('after', 0))
+        limit = min(max(int(request.args.get('limit', LIST_DEFAULT_LIMIT)), 1), LIST_MAX_LIMIT)
+    except ValueError:
+        raise ListQueryError('after and limit must be integers')
+    return fields, after, limit
+
+def keyset_page(query, id_column, after, limit):
+    """Rows with id > after in id order, and the cursor for the next page (None on the last page)"""
+    rows = query.filter(id_column > after).order_by(id_column).limit(limit + 1).all()
+    return rows[:limit], (rows[limit - 1].id if len(rows) > limit else None)
+
+def conditional_json(versions, scope, build, private=False):
+    """JSON response validated by data-version counters, answering 304 before `build()` touches the data
+
+    The ETag combines the counters, `scope` (e.g. the user the data is filtered for) and the query string,
+    and Last-Modified is the newest counter update, so repeat polls cost one small query.
+    """
+    tag = hashlib.sha1(json.dumps(
+        [sorted((name, version) for name, (version, _) in versions.items()), scope, sorted(request.args.items(multi=True))]
+    ).encode('utf-8')).hexdigest()[:20]
+    modified = max((updated for _, updated in versions.values() if updated), default=None)
+    modified = modified.replace(tzinfo=timezone.utc, microsecond=0) if modified else None
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(tag)
+    else:
+        not_modified = bool(modified and request.if_modified_since and modified <= request.if_modified_since)
+    if not_modified:
+        metrics.inc('http_not_modified_total', endpoint=request.endpoint)
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(tag, weak=True)
+    if modified:
+        response.last_modified = modified
+    # Always revalidate; `private` keeps shared caches from storing per-user data
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    return response
+
+@app.route('/api/projects', methods=['GET'])
+@login_required
+def list_projects():
+    """Catalog in id order: ?fields=id,name,...&after=<cursor>&limit=<n>&field=<field>"""
+    try:
+        fields, after, limit = parse_list_args(PROJECT_FIELDS)
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    field_filter = request.args.get('field')
+    
+    def build():
+        query = Project.query
+        if 'teacher_email' in fields:
+            query = query.options(joinedload(Project.teacher))
+        if field_filter:
+            query = query.filter(db.func.lower(Project.field) == field_filter.lower())
+        projects, next_cursor = keyset_page(query, Project.id, after, limit)
+        return {
+            'projects': [{name: PROJECT_FIELDS[name](p) for name in fields} for p in projects],
+            'next_cursor': next_cursor
+        }
+    
+    return conditional_json(get_data_versions('catalog'), None, build)
+
+@app.route('/api/teacher/interests', methods=['GET'])
+@login_required
+def list_teacher_interests():
+    """Interests in the current teacher's projects, in id order; ?project_id= narrows to one project"""
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    try:
+        fields, after, limit = parse_list_args(INTEREST_FIELDS)
+        project_id = int(request.args['project_id']) if request.args.get('project_id') else None
+    except (ListQueryError, ValueError) as e:
+        return jsonify({'error': str(e) if isinstance(e, ListQueryError) else 'project_id must be an integer'}), 400
+    
+    def build():
+        query = StudentInterest.query.join(Project).filter(Project.teacher_id == current_user.id)
+        if project_id is not None:
+            query = query.filter(StudentInterest.project_id == project_id)
+        if 'student_email' in fields:
+            query = query.options(joinedload(StudentInterest.student))
+        if 'project_name' in fields:
+            query = query.options(joinedload(StudentInterest.project))
+        interests, next_cursor = keyset_page(query, StudentInterest.id, after, limit)
+        return {
+            'interests': [{name: INTEREST_FIELDS[name](i) for name in fields} for i in interests],
+            'next_cursor': next_cursor
+        }
+    
+    return conditional_json(get_data_versions('catalog', 'interests'), current_user.id, build, private=True)
+
+@app.route('/api/teacher/analytics', methods=['GET'])
+@login_required
+def teacher_analytics():
+    """Interest demand from the materialized counters: the teacher's projects, every field, and a daily timeline
+
+    ?days=<n> sets the timeline length (default 30); ?project_id= or ?field= narrows the timeline.
+    """
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    try:
+        days = int(request.args.get('days', '30'))
+        project_id = int(request.args['project_id']) if request.args.get('project_id') else None
+    except ValueError:
+        return jsonify({'error': 'days and project_id must be integers'}), 400
+    if not 1 <= days <= TIMELINE_MAX_DAYS:
+        return jsonify({'error': f'days must be between 1 and {TIMELINE_MAX_DAYS}'}), 400
+    field_filter = request.args.get('field')
+    today = datetime.utcnow().date()
+    
+    def ratio(interests, capacity):
+        return round(interests / capacity, 2) if capacity else None
+    
+    def build():
+        projects = db.session.query(  # type: ignore
+            Project.id, Project.name, Project.field, Project.capacity, Project.interest_count
+        ).filter(Project.teacher_id == current_user.id).order_by(Project.interest_count.desc(), Project.id).all()
+        fields = db.session.query(  # type: ignore
+            Project.field, func.count(Project.id), func.sum(Project.interest_count), func.sum(Project.capacity)
+        ).group_by(Project.field).order_by(func.sum(Project.interest_count).desc(), Project.field).all()
+        start = today - timedelta(days=days - 1)
+        activity = db.session.query(  # type: ignore
+            InterestActivity.day, func.sum(InterestActivity.selections), func.sum(InterestActivity.cancellations)
+        ).filter(InterestActivity.day >= start)
+        if project_id is not None:
+            activity = activity.filter(InterestActivity.project_id == project_id)
+        if field_filter:
+            activity = activity.join(Project, Project.id == InterestActivity.project_id).filter(
+                db.func.lower(Project.field) == field_filter.lower()
+            )
+        return {
+            'projects': [
+                {'id': p.id, 'name': p.name, 'field': p.field, 'capacity': p.capacity,
+                 'interest_count': p.interest_count, 'demand_ratio': ratio(p.interest_count, p.capacity)}
+                for p in projects
+            ],
+            'fields': [
+                {'field': field, 'projects': count, 'interest_count': int(interests or 0),
+                 'capacity': int(capacity or 0), 'demand_ratio': ratio(int(interests or 0), int(capacity or 0))}
+                for field, count, interests, capacity in fields
+            ],
+            'timeline': timeline(activity.group_by(InterestActivity.day).all(), start, today)
+        }
+    
+    # The day is part of the validator because the timeline window moves at midnight (UTC)
+    return conditional_json(
+        get_data_versions('catalog', 'interests'), [current_user.id, today.isoformat()], build, private=True
+    )
+
+@app.route('/api/student/selection', methods=['GET'])
+@login_required
+def get_student_selection():
+    """The current student's selected project, or null"""
+    if current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    def build():
+        interest = StudentInterest.query.options(
+            joinedload(StudentInterest.project).joinedload(Project.teacher)
+        ).filter_by(student_id=current_user.id).first()
+        if interest is None:
+            return {'selection': None}
+        return {'selection': dict(
+            serialize_project(interest.project),
+            capacity=interest.project.capacity,
+            selected_at=interest.timestamp.isoformat() if interest.timestamp else None
+        )}
+    
+    return conditional_json(get_data_versions('catalog', 'interests'), current_user.id, build, private=True)
+
+@app.route('/api/projects/search', methods=['GET'])
+@login_required
+def search_projects():
+    """Keyword search with prefix matching, field filters and pagination; no LLM involved"""
+    q = request.args.get('q', '').strip()
+    fields = [f for f in request.args.getlist('field') if f.strip()]
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), SEARCH_MAX_PER_PAGE)
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+    offset = (page - 1) * per_page
+    terms = query_terms(q)
+    match_mode = 'all'
+    
+    with span('project_search'):
+        if not terms:
+            # Browsing: every project (optionally of some fields) in creation order
+            query = Project.query
+            if fields:
+                query = query.filter(db.func.lower(Project.field).in_([f.lower() for f in fields]))
+            total = query.count()
+            hits = [(p.id, None, None) for p in query.order_by(Project.id).offset(offset).limit(per_page)]
+        elif project_search_uses_fts():
+            connection = db.session.connection()  # type: ignore
+            hits, total = search_project_ids(connection, fts_match_expression(terms), fields, per_page, offset)
+            if not total and len(terms) > 1:
+                # No project has every word: rank the projects that have some of them
+                match_mode = 'any'
+                hits, total = search_project_ids(connection, fts_match_expression(terms, any_term=True), fields, per_page, offset)
+        else:
+            # No FTS5 (e.g. Postgres): whole-word BM25 over the in-process index
+            match_mode = 'any'
+            projects = Project.query.all()
+            sync_project_indexes(projects, get_catalog_version())
+            allowed = {p.id for p in projects if not fields or p.field.lower() in {f.lower() for f in fields}}
+            ranked = [(project_id, round(score, 4), None) for project_id, score in project_index.search_terms(tokenize(q)) if project_id in allowed]
+            total = len(ranked)
+            hits = ranked[offset:offset + per_page]
+        
+        by_id = {p.id: p for p in Project.query.options(joinedload(Project.teacher)).filter(Project.id.in_([h[0] for h in hits]))}
+    
+    results = []
+    for project_id, score, snippet in hits:
+        if project_id in by_id:
+            item = serialize_project(by_id[project_id])
+            if score is not None:
+                item.update(score=score, snippet=snippet)
+            results.append(item)
+    return jsonify({
+        'query': q,
+        'fields': fields,
+        'match': match_mode,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'projects': results
+    })
+
+def chat_conversation(json_data, user_input):
+    """(stored conversation or None, refinement mode or None) for a chat request
+
+    The mode is None, meaning the message is answered as a new search, when the conversation is unknown,
+    expired or another user's, when the catalog changed since its last turn, or when the message does not
+    read as a follow-up.
+    """
+    conversation = conversation_store.get(json_data.get('conversation_id'), current_user.id)
+    if conversation is None:
+        return None, None
+    mode = classify_refinement(user_input)
+    if mode is None or conversation.catalog_version != get_catalog_version():
+        return conversation, None
+    if mode != 'extend' and not refinement_terms(user_input):
+        return conversation, None
+    return conversation, mode
+
+def refine_conversation(conversation, user_input, mode, pipeline=None):
+    """Apply a follow-up to a conversation's stored candidates, returning (requirements, items, projects by id)
+
+    'filter' and 'exclude' keep the candidates that do (or do not) mention the follow-up's terms, with no
+    API call; terms must all match unless the message says "or". 'extend' takes a MatchPipeline started on
+    the follow-up, so requirements are extracted from the new message alone: stored candidates are moved
+    by how much the merged requirements change their local rubric score, and only newly shortlisted
+    projects are ranked.
+    """
+    if mode in ('filter', 'exclude'):
+        with span('refine'):
+            ids = [item['id'] for item in conversation.items]
+            by_id = {p.id: p for p in Project.query.options(joinedload(Project.teacher)).filter(Project.id.in_(ids))}
+            terms = refinement_terms(user_input)
+            any_term = ' or ' in f" {user_input.lower()} "
+
+            def mentioned(project):
+                hits = [local_scorer.mentions(project, term) for term in terms]
+                return any(hits) if any_term else all(hits)
+
+            items = [
+                item for item in conversation.items
+                if item['id'] in by_id and mentioned(by_id[item['id']]) == (mode == 'filter')
+            ]
+        return conversation.requirements, items, by_id
+
+    pipeline.load_catalog()
+    delta = pipeline.wait_for_requirements()
+    logger.debug("Follow-up requirement analysis result: %s", lazy_json(delta))
+    requirements = merge_requirements(conversation.requirements, delta)
+    by_id = {p.id: p for p in pipeline.projects}
+    stored = [item for item in conversation.items if item['id'] in by_id]
+    with pipeline.stage('rescore'):
+        previous = [by_id[item['id']] for item in stored]
+        before = {item['id']: item['score'] for item in local_scorer.score(conversation.requirements, previous)}
+        after = {item['id']: item['score'] for item in local_scorer.score(requirements, previous)}
+        items = []
+        for item in stored:
+            change = after[item['id']] - before[item['id']]
+            items.append({
+                'id': item['id'],
+                'score': min(10, max(0, item.get('score', 0) + change)),
+                'reasoning': f"{item.get('reasoning', '')}; follow-up {change:+g}" if change else item.get('reasoning', '')
+            })
+    if delta:
+        shortlist = pipeline.candidates(delta)
+    else:
+        shortlist = [by_id[project_id] for project_id in fuse_rankings([pipeline.lexical_hits, pipeline.semantic_hits]) if project_id in by_id]
+    seen = {item['id'] for item in stored}
+    fresh = [p for p in shortlist if p.id not in seen][:RANK_CHUNK_SIZE]
+    if fresh:
+        with pipeline.stage('rank'):
+            if pipeline.degraded:
+                items.extend(local_scorer.score(requirements, fresh))
+            else:
+                items.extend(score_projects(requirements, fresh, pipeline.catalog_version) or [])
+    items.sort(key=lambda item: -item.get('score', 0))
+    return requirements, items, by_id
+
+def visible_items(items, by_id):
+    """Refined results to show: candidates at or above the score threshold, else every remaining candidate"""
+    present = [item for item in items if item['id'] in by_id]
+    return [item for item in present if item.get('score', 0) >= SCORE_THRESHOLD] or present
+
 @app.route('/api/chat', methods=['POST', 'GET'])
 @login_required
 def chat():
@@ -352,34 +1492,694 @@ def chat():
     if request.method == 'POST':
         # Safely get JSON data
         json_data = request.get_json()
-        if not json_data:
+        if not json_data or not isinstance(json_data, dict):
             return jsonify({'error': 'Invalid JSON data'}), 400
-            
         user_input = json_data.get('message')
-        print(f"\nUser input: {user_input}")
+        if not isinstance(user_input, str) or not user_input.strip():
+            return jsonify({'error': 'Missing message'}), 400
+        logger.debug("User input: %s", user_input)
         
-        requirements = analyze_user_requirements(user_input)
-        print(f"Requirement analysis result: {json.dumps(requirements, ensure_ascii=False)}")
+        conversation, mode = chat_conversation(json_data, user_input)
+        metrics.inc('chat_turns_total', kind=mode or 'search')
+        if mode is not None:
+            pipeline = MatchPipeline(user_input).start() if mode == 'extend' else None
+            requirements, items, by_id = refine_conversation(conversation, user_input, mode, pipeline)
+            ranked_projects = [by_id[item['id']] for item in visible_items(items, by_id)]
+            # A follow-up that rules out every candidate is answered but not kept, so the next one starts from the earlier results
+            if items:
+                conversation = conversation_store.save(
+                    current_user.id, requirements, items, conversation.catalog_version, conversation
+                )
+            logger.debug("Refined (%s) project ids: %s", mode, [p.id for p in ranked_projects])
+            mask = student_skill_mask(requirements)
+            response = jsonify({
+                'projects': [serialize_match(p, mask) for p in ranked_projects],
+                'conversation_id': conversation.id,
+                'refinement': mode
+            })
+            if mode == 'extend':
+                remember_requirements(requirements, db.session.get(StudentProfile, current_user.id))  # type: ignore
+            return response
         
-        projects = Project.query.all()
-        print(f"Projects in database: {[p.name for p in projects]}")
+        pipeline = MatchPipeline(user_input).start()
+        profile = db.session.get(StudentProfile, current_user.id)  # type: ignore
+        pipeline.load_catalog()
+        # With a warm-start list to fall back on, a slow analysis is given up on sooner
+        requirements = pipeline.wait_for_requirements(warm_start_timeout(profile))
+        logger.debug("Requirement analysis result: %s", lazy_json(requirements))
         
-        ranked_projects = rank_projects(requirements, projects)
-        print(f"Matched projects: {[p.name for p in ranked_projects]}")
+        projects = pipeline.candidates(requirements)
+        ranked_items = None
+        with pipeline.stage('rank'):
+            if pipeline.degraded:
+                ranked_projects = pipeline.lexical_projects(warm_start_ids(profile))
+            else:
+                ranked_items = score_projects(requirements, projects, pipeline.catalog_version)
+                ranked_projects = projects if ranked_items is None else apply_ranking(ranked_items, projects)
+        logger.debug("Matched project ids: %s", [p.id for p in ranked_projects])
         
-        return jsonify({
-            'projects': [{
-                'id': p.id,
-                'name': p.name,
-                'description': p.description,
-                'field': p.field,
-                'skill_requirements': p.skill_requirements or '',
-                'teacher_email': User.query.get(p.teacher_id).email  # type: ignore
-            } for p in ranked_projects]
-        })
+        # Only ranked results can be refined; a generic or degraded answer starts afresh next turn
+        conversation_id = None
+        if ranked_items is not None:
+            conversation_id = conversation_store.save(
+                current_user.id, requirements, ranked_items, pipeline.catalog_version, conversation
+            ).id
+        
+        with pipeline.stage('serialize'):
+            mask = student_skill_mask(requirements)
+            response = jsonify({
+                'projects': [serialize_match(p, mask) for p in ranked_projects],
+                'conversation_id': conversation_id,
+                'refinement': None
+            })
+        remember_requirements(requirements, profile)
+        return response
     else:
         return jsonify({'message': 'Only POST method is supported'}), 405
 
+@app.route('/api/chat/stream', methods=['POST'])
+@login_required
+def chat_stream():
+    """Streaming variant of /api/chat that emits NDJSON events as each stage completes"""
+    if current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    json_data = request.get_json(silent=True)
+    if not json_data or not isinstance(json_data, dict):
+        return jsonify({'error': 'Invalid JSON data'}), 400
+    user_input = json_data.get('message')
+    if not isinstance(user_input, str) or not user_input.strip():
+        return jsonify({'error': 'Missing message'}), 400
+    logger.debug("User input (stream): %s", user_input)
+    
+    def event(payload):
+        return json.dumps(payload, ensure_ascii=False) + '\n'
+    
+    conversation, mode = chat_conversation(json_data, user_input)
+    metrics.inc('chat_turns_total', kind=mode or 'search')
+    # Filtering a conversation's candidates needs no requirement analysis, so no pipeline is started for it
+    pipeline = None if mode in ('filter', 'exclude') else MatchPipeline(user_input).start()
+    
+    def cancel():
+        if pipeline is not None:
+            pipeline.cancel()
+    
+    def timings():
+        return pipeline.stage_timings() if pipeline is not None else {}
+    
+    def generate():
+        try:
+            if mode is not None:
+                yield from generate_refinement()
+                return
+            profile = db.session.get(StudentProfile, current_user.id)  # type: ignore
+            pipeline.load_catalog()
+            requirements = pipeline.wait_for_requirements(warm_start_timeout(profile))
+            yield event({'type': 'requirements', 'requirements': requirements})
+            mask = student_skill_mask(requirements)
+            
+            projects = pipeline.candidates(requirements)
+            req_data = requirements if isinstance(requirements, dict) else {}
+            if pipeline.degraded or not (req_data.get('fields') or req_data.get('keywords') or req_data.get('skills')):
+                projects = pipeline.lexical_projects(warm_start_ids(profile)) if pipeline.degraded else projects
+                for p in projects:
+                    yield event({'type': 'project', 'project': serialize_match(p, mask)})
+                yield done([p.id for p in projects])
+                return
+            
+            by_id = {p.id: p for p in projects}
+            scores = {}
+            ranked_items = []
+            with pipeline.stage('rank'):
+                for item in iter_rank_projects(req_data, projects, pipeline.catalog_version):
+                    ranked_items.append(item)
+                    project = by_id.get(item['id'])
+                    if project is None or item.get('score', 0) < SCORE_THRESHOLD or item['id'] in scores:
+                        continue
+                    scores[item['id']] = item.get('score', 0)
+                    yield event({
+                        'type': 'project',
+                        'project': serialize_match(project, mask, score=item.get('score'), reasoning=item.get('reasoning', ''))
+                    })
+            saved = conversation_store.save(
+                current_user.id, req_data, sorted(ranked_items, key=lambda item: -item.get('score', 0)),
+                pipeline.catalog_version, conversation
+            )
+            if not scores:
+                # Same behaviour as rank_projects(): nothing above the threshold means show everything
+                for p in projects:
+                    yield event({'type': 'project', 'project': serialize_match(p, mask)})
+                remember_requirements(req_data, profile)
+                yield done([p.id for p in projects], saved)
+                return
+            remember_requirements(req_data, profile)
+            # Items may arrive out of order; the final order lets the client settle the list
+            order = sorted(scores, key=lambda project_id: -scores[project_id])
+            yield done(order, saved)
+        finally:
+            # Runs on normal completion and when the client disconnects mid-stream
+            cancel()
+    
+    def generate_refinement():
+        requirements, items, by_id = refine_conversation(conversation, user_input, mode, pipeline)
+        yield event({'type': 'requirements', 'requirements': requirements})
+        shown = visible_items(items, by_id)
+        mask = student_skill_mask(requirements)
+        for item in shown:
+            yield event({
+                'type': 'project',
+                'project': serialize_match(by_id[item['id']], mask, score=item.get('score'), reasoning=item.get('reasoning', ''))
+            })
+        saved = conversation
+        if items:
+            saved = conversation_store.save(current_user.id, requirements, items, conversation.catalog_version, conversation)
+        if mode == 'extend':
+            remember_requirements(requirements, db.session.get(StudentProfile, current_user.id))  # type: ignore
+        yield done([item['id'] for item in shown], saved)
+    
+    def done(order, saved=None):
+        return event({
+            'type': 'done',
+            'order': order,
+            'conversation_id': saved.id if saved is not None else None,
+            'refinement': mode,
+            'timings': timings()
+        })
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(cancel)
+    # Ask reverse proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def parse_batch_records(items):
+    """Validate batch input (JSONL lines or dicts), returning (records, error results)"""
+    records, errors = [], []
+    for number, item in enumerate(items, 1):
+        if isinstance(item, str):
+            if not item.strip():
+                continue
+            try:
+                item = json.loads(item)
+            except ValueError:
+                errors.append({'id': None, 'line': number, 'status': 'invalid', 'error': 'Invalid JSON'})
+                continue
+        if not isinstance(item, dict) or not isinstance(item.get('message'), str) or not item['message'].strip():
+            record_id = item.get('id') if isinstance(item, dict) else None
+            errors.append({'id': record_id, 'line': number, 'status': 'invalid', 'error': 'Missing message'})
+            continue
+        records.append(dict(item, id=item.get('id', item.get('email', number))))
+    return records, errors
+
+def message_hash(message):
+    return hashlib.sha256(normalize_message(message).encode('utf-8')).hexdigest()
+
+def run_match_batch(records, workers=None, top_n=None, chunk_size=None, write_back=False, skip_saved=False, stats=None):
+    """Recommend projects for many students, yielding one result per record as each chunk finishes
+
+    Identical messages are analyzed once, extraction runs on `workers` threads, and the distinct
+    requirement sets of a chunk are scored against the catalog in one LocalScorer.score_many() pass.
+    With `write_back`, results for records carrying a student `email` are saved as Recommendation rows;
+    `skip_saved` skips students whose saved recommendation already covers the same message and catalog.
+    `stats` (a dict) receives counts and throughput as the batch progresses.
+    """
+    workers = workers or BATCH_WORKERS
+    top_n = top_n or BATCH_TOP_N
+    chunk_size = chunk_size or BATCH_CHUNK_SIZE
+    stats = {} if stats is None else stats
+    stats.update(students=0, skipped=0, unique_messages=0, unique_requirements=0, unanalyzed=0, saved=0,
+                 elapsed_seconds=0.0, students_per_second=0.0)
+    started = time.perf_counter()
+    catalog_version = get_catalog_version()
+    projects = Project.query.all()
+    sync_project_indexes(projects, catalog_version)
+    by_id = {p.id: p for p in projects}
+    extracted = {}  # normalized message -> requirements, shared by every chunk
+    seen_requirements = set()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='match-batch') as executor:
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            students = resolve_batch_students(chunk) if write_back or skip_saved else {}
+            if skip_saved:
+                saved = {
+                    r.student_id: r for r in Recommendation.query.filter(
+                        Recommendation.student_id.in_([u.id for u in students.values()])
+                    )
+                }
+                remaining = []
+                for record in chunk:
+                    student = students.get(record.get('email'))
+                    existing = saved.get(student.id) if student is not None else None
+                    if (existing is not None and existing.catalog_version == catalog_version
+                            and existing.message_hash == message_hash(record['message'])):
+                        stats['skipped'] += 1
+                        yield {'id': record['id'], 'status': 'skipped'}
+                    else:
+                        remaining.append(record)
+                chunk = remaining
+
+            with span('batch_extract'):
+                pending = {}
+                for record in chunk:
+                    key = normalize_message(record['message'])
+                    if key not in extracted and key not in pending:
+                        pending[key] = executor.submit(contextvars.copy_context().run, analyze_user_requirements, record['message'])
+                for key, future in pending.items():
+                    extracted[key] = future.result()
+                stats['unique_messages'] = len(extracted)
+
+            with span('batch_score'):
+                # One scoring pass per chunk over the distinct requirement sets
+                distinct = {}
+                for record in chunk:
+                    req_data = extracted[normalize_message(record['message'])]
+                    if isinstance(req_data, dict) and (req_data.get('fields') or req_data.get('keywords') or req_data.get('skills')):
+                        distinct.setdefault(json.dumps(canonical_requirements(req_data), sort_keys=True), req_data)
+                seen_requirements.update(distinct)
+                stats['unique_requirements'] = len(seen_requirements)
+                keys = list(distinct)
+                scored = dict(zip(keys, local_scorer.score_many([distinct[key] for key in keys], projects, top_n)))
+
+            results = []
+            for record in chunk:
+                req_data = extracted[normalize_message(record['message'])]
+                key = json.dumps(canonical_requirements(req_data), sort_keys=True) if isinstance(req_data, dict) else None
+                if key in scored:
+                    items = [item for item in scored[key] if item['score'] >= SCORE_THRESHOLD][:top_n]
+                    status = 'ok' if items else 'no_match'
+                else:
+                    # No usable requirements: fall back to lexical and semantic matches on the raw message
+                    fused = fuse_rankings([
+                        project_index.search_terms(tokenize(record['message']), limit=top_n),
+                        semantic_index.search_text(record['message'], limit=top_n)
+                    ])
+                    items = [{'id': project_id} for project_id in fused[:top_n]]
+                    status = 'unanalyzed'
+                    stats['unanalyzed'] += 1
+                results.append({
+                    'id': record['id'],
+                    'status': status,
+                    'requirements': req_data,
+                    'projects': [dict(item, name=by_id[item['id']].name) for item in items if item['id'] in by_id],
+                    'catalog_version': catalog_version
+                })
+
+            if write_back:
+                stats['saved'] += save_recommendations(chunk, results, students, catalog_version)
+            for result in results:
+                stats['students'] += 1
+                metrics.inc('batch_students_total', status=result['status'])
+                yield result
+            elapsed = time.perf_counter() - started
+            stats['elapsed_seconds'] = round(elapsed, 3)
+            stats['students_per_second'] = round(stats['students'] / elapsed, 2) if elapsed else 0.0
+            logger.info("Batch progress: %d students, %.1f students/s", stats['students'], stats['students_per_second'])
+
+def resolve_batch_students(records):
+    """Map the `email` of batch records to student accounts in one query"""
+    emails = {record['email'] for record in records if isinstance(record.get('email'), str)}
+    if not emails:
+        return {}
+    return {u.email: u for u in User.query.filter(User.email.in_(emails), User.is_teacher == False)}  # noqa: E712
+
+def save_recommendations(records, results, students, catalog_version):
+    """Upsert one Recommendation per student in a single transaction; returns the number saved"""
+    existing = {
+        r.student_id: r for r in Recommendation.query.filter(
+            Recommendation.student_id.in_([u.id for u in students.values()])
+        )
+    }
+    saved = 0
+    for record, result in zip(records, results):
+        student = students.get(record.get('email'))
+        result['saved'] = student is not None
+        if student is None:
+            continue
+        recommendation = existing.get(student.id)
+        if recommendation is None:
+            recommendation = existing[student.id] = Recommendation(student_id=student.id)  # type: ignore
+            db.session.add(recommendation)  # type: ignore
+        recommendation.message = record['message']
+        recommendation.message_hash = message_hash(record['message'])
+        recommendation.requirements = json.dumps(result['requirements'], ensure_ascii=False)
+        recommendation.results = json.dumps(result['projects'], ensure_ascii=False)
+        recommendation.catalog_version = catalog_version
+        recommendation.created_at = datetime.utcnow()
+        saved += 1
+    profiles = {
+        p.student_id: p for p in StudentProfile.query.filter(StudentProfile.student_id.in_([u.id for u in students.values()]))
+    }
+    requirements = results_by_email(records, results)
+    changed = [
+        student.id for student in students.values()
+        if set_profile_requirements(student.id, requirements.get(student.email), profiles.get(student.id))
+    ]
+    db.session.commit()  # type: ignore
+    if changed:
+        schedule_warm_refresh(student_ids=changed)
+    return saved
+
+def results_by_email(records, results):
+    """{student email: analyzed requirements} of a batch chunk; a later record for the same email wins"""
+    return {record.get('email'): result['requirements'] for record, result in zip(records, results) if record.get('email')}
+
+def set_profile_requirements(student_id, requirements, profile=None):
+    """Store usable requirements on the student's profile in the current transaction; True when they changed
+
+    `profile` must be the student's existing row when there is one; None creates it. A change marks the
+    warm-start list stale (catalog_version NULL) so the next refresh rescores it.
+    """
+    if not usable_requirements(requirements):
+        return False
+    encoded = json.dumps(requirements, ensure_ascii=False, sort_keys=True)
+    if profile is None:
+        profile = StudentProfile(student_id=student_id)  # type: ignore
+        db.session.add(profile)  # type: ignore
+    elif profile.requirements == encoded:
+        return False
+    profile.requirements = encoded
+    profile.updated_at = datetime.utcnow()
+    profile.catalog_version = None
+    return True
+
+def remember_requirements(requirements, profile=None):
+    """Keep the current student's latest chat requirements and queue their warm-start refresh"""
+    if not set_profile_requirements(current_user.id, requirements, profile):
+        return
+    try:
+        db.session.commit()  # type: ignore
+    except IntegrityError:
+        # Another request of the same student created the profile first; its requirements are as recent
+        db.session.rollback()  # type: ignore
+        return
+    schedule_warm_refresh(student_ids=[current_user.id])
+
+def warm_start_ids(profile):
+    """Project ids of a profile's stored warm-start list, best first (empty without one)"""
+    if profile is None or not profile.warm_results:
+        return []
+    return [item['id'] for item in json.loads(profile.warm_results)]
+
+def warm_start_timeout(profile):
+    """How long chat waits for requirement analysis: less when a warm-start list can answer instead"""
+    return min(WARM_START_FALLBACK_TIMEOUT, EXTRACTION_TIMEOUT) if warm_start_ids(profile) else None
+
+_warm_lock = threading.Lock()
+_warm_pending_students = set()
+
+def schedule_warm_refresh(project_ids=None, version=None, student_ids=None):
+    """Run refresh_warm_starts() on the warm-start thread after the caller's commit; returns the future
+
+    Refreshes for students that are already queued are not queued again.
+    """
+    if student_ids is not None:
+        with _warm_lock:
+            student_ids = set(student_ids) - _warm_pending_students
+            if not student_ids:
+                return None
+            _warm_pending_students.update(student_ids)
+    
+    def run():
+        if student_ids is not None:
+            with _warm_lock:
+                _warm_pending_students.difference_update(student_ids)
+        with app.app_context():
+            try:
+                refresh_warm_starts(project_ids, version, student_ids)
+            except Exception:
+                logger.exception("Warm-start refresh failed")
+    
+    return warm_start_executor.submit(contextvars.copy_context().run, run)
+
+def refresh_warm_starts(project_ids=None, version=None, student_ids=None):
+    """Bring stale warm-start lists up to the current catalog; returns (merged, rescored) list counts
+
+    Lists at catalog `version - 1` only need `project_ids` (the projects changed by `version`) scored and
+    merged in. Every other stale list, or one whose merge cannot tell its new top, is rescored against the
+    whole catalog, a chunk of profiles per LocalScorer.score_many() pass. A list is only written while the
+    profile still has the requirements it was scored for and no newer list was written meanwhile.
+    """
+    catalog_version = get_catalog_version()
+    query = StudentProfile.query.filter(
+        or_(StudentProfile.catalog_version.is_(None), StudentProfile.catalog_version < catalog_version)
+    )
+    if student_ids is not None:
+        query = query.filter(StudentProfile.student_id.in_(list(student_ids)))
+    profiles = query.all()
+    if not profiles:
+        return 0, 0
+    
+    merged, stale = [], []
+    changed_projects = Project.query.filter(Project.id.in_(project_ids)).all() if project_ids and version else []
+    for profile in profiles:
+        requirements = json.loads(profile.requirements)
+        if project_ids and version and profile.catalog_version == version - 1 and profile.warm_results is not None:
+            scored = {item['id']: item for item in local_scorer.score(requirements, changed_projects)}
+            items = merge_changed_scores(
+                json.loads(profile.warm_results), {project_id: scored.get(project_id) for project_id in project_ids},
+                WARM_START_CANDIDATES
+            )
+            if items is not None:
+                merged.append((profile.student_id, profile.requirements, items, version))
+                continue
+        stale.append((profile.student_id, profile.requirements, requirements))
+    
+    with span('warm_start_refresh'):
+        save_warm_results(merged)
+        if stale:
+            projects = Project.query.all()
+            for start in range(0, len(stale), BATCH_CHUNK_SIZE):
+                chunk = stale[start:start + BATCH_CHUNK_SIZE]
+                scored = local_scorer.score_many([requirements for _, _, requirements in chunk], projects, WARM_START_CANDIDATES)
+                save_warm_results([
+                    (student_id, encoded, top_items(items, WARM_START_CANDIDATES), catalog_version)
+                    for (student_id, encoded, _), items in zip(chunk, scored)
+                ])
+    metrics.inc('warm_start_refreshes_total', len(merged), kind='merged')
+    metrics.inc('warm_start_refreshes_total', len(stale), kind='rescored')
+    logger.info("Warm-start lists refreshed: %d merged, %d rescored (catalog %d)", len(merged), len(stale), catalog_version)
+    return len(merged), len(stale)
+
+def save_warm_results(rows):
+    """Write (student id, requirements JSON scored, items, catalog version) warm lists in one statement and commit"""
+    if not rows:
+        return
+    table = StudentProfile.__table__
+    statement = update(table).where(
+        table.c.student_id == bindparam('profile_id'),
+        table.c.requirements == bindparam('scored_requirements'),
+        or_(table.c.catalog_version.is_(None), table.c.catalog_version < bindparam('version'))
+    ).values(warm_results=bindparam('results'), catalog_version=bindparam('version'), refreshed_at=datetime.utcnow())
+    db.session.execute(statement, [  # type: ignore
+        {'profile_id': student_id, 'scored_requirements': encoded,
+         'results': json.dumps(items, ensure_ascii=False), 'version': version}
+        for student_id, encoded, items, version in rows
+    ])
+    db.session.commit()  # type: ignore
+
+@app.route('/api/match/batch', methods=['POST'])
+@login_required
+def match_batch():
+    """Cohort matching: JSONL (or {"students": [...]}) in, NDJSON results and a summary line out"""
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    json_data = request.get_json(silent=True)
+    if isinstance(json_data, dict):
+        items = json_data.get('students')
+        if not isinstance(items, list):
+            return jsonify({'error': 'Invalid JSON data'}), 400
+    else:
+        items = request.get_data(as_text=True).splitlines()
+    records, errors = parse_batch_records(items)
+    if len(records) > BATCH_MAX_RECORDS:
+        return jsonify({'error': f'At most {BATCH_MAX_RECORDS} students per batch'}), 413
+    write_back = request.args.get('write_back') == '1'
+    skip_saved = request.args.get('skip_saved') == '1'
+    
+    def generate():
+        for error in errors:
+            yield json.dumps(error, ensure_ascii=False) + '\n'
+        stats = {}
+        for result in run_match_batch(records, write_back=write_back, skip_saved=skip_saved, stats=stats):
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+        yield json.dumps(dict(stats, type='summary', invalid=len(errors)), ensure_ascii=False) + '\n'
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.cli.command('match-batch')
+@click.argument('input_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', 'output_path', required=True, type=click.Path(dir_okay=False),
+              help='JSONL results file; records already in it are skipped, so an interrupted run can be resumed')
+@click.option('--workers', type=int, default=None, help='Parallel requirement extractions (default BATCH_WORKERS)')
+@click.option('--top', 'top_n', type=int, default=None, help='Projects kept per student (default BATCH_TOP_N)')
+@click.option('--write-back', is_flag=True, help='Save results as Recommendation rows for records with a student email')
+def match_batch_command(input_path, output_path, workers, top_n, write_back):
+    """Recommend projects for every student in a JSONL file of {"id", "email", "message"} records"""
+    done = set()
+    if os.path.exists(output_path):
+        with open(output_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(str(json.loads(line)['id']))
+                except (ValueError, KeyError, TypeError):
+                    continue  # e.g. a line cut short by an interrupted run
+    with open(input_path, encoding='utf-8') as f:
+        records, errors = parse_batch_records(f)
+    for error in errors:
+        click.echo(f"Skipping line {error['line']}: {error['error']}", err=True)
+    pending = [record for record in records if str(record['id']) not in done]
+    click.echo(f"{len(records)} students, {len(records) - len(pending)} already in {output_path}", err=True)
+
+    stats = {}
+    with open(output_path, 'a', encoding='utf-8') as out:
+        for result in run_match_batch(pending, workers=workers, top_n=top_n, write_back=write_back, stats=stats):
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+    click.echo(json.dumps(stats), err=True)
+
+def allocation_weights():
+    """Per-student project weights: saved recommendation scores plus a bonus for the expressed interest"""
+    weights = {}
+    for recommendation in Recommendation.query.all():
+        try:
+            results = json.loads(recommendation.results)
+        except ValueError:
+            continue
+        weights[recommendation.student_id] = {
+            item['id']: float(item['score']) for item in results
+            if isinstance(item, dict) and isinstance(item.get('score'), (int, float)) and item.get('id') is not None
+        }
+    for interest in StudentInterest.query.all():
+        row = weights.setdefault(interest.student_id, {})
+        row[interest.project_id] = row.get(interest.project_id, SCORE_THRESHOLD) + ALLOCATION_INTEREST_BONUS
+    return weights
+
+def serialize_allocation(assignment, weights, names):
+    return [
+        {'student_id': student_id, 'project_id': project_id, 'project': names.get(project_id),
+         'weight': weights[student_id][project_id]}
+        for student_id, project_id in sorted(assignment.items())
+    ]
+
+@app.route('/api/allocation/run', methods=['POST'])
+@login_required
+def run_allocation():
+    """Assign every ranked student to at most one project within project capacities"""
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    json_data = request.get_json(silent=True) or {}
+    method = json_data.get('method', 'stable')
+    if method not in ('stable', 'max_weight'):
+        return jsonify({'error': "method must be 'stable' or 'max_weight'"}), 400
+    
+    projects = Project.query.all()
+    capacities = {p.id: p.capacity for p in projects}
+    names = {p.id: p.name for p in projects}
+    weights = allocation_weights()
+    
+    unstable = None
+    with span('allocation_' + method):
+        started = time.perf_counter()
+        if method == 'stable':
+            preferences, priorities = build_preferences(weights)
+            assignment = deferred_acceptance(preferences, capacities, priorities)
+        else:
+            assignment = max_weight_assignment(weights, capacities)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    if method == 'stable':
+        unstable = len(blocking_pairs(assignment, preferences, capacities, priorities))
+    
+    if json_data.get('apply'):
+        Allocation.query.delete()
+        db.session.add_all([  # type: ignore
+            Allocation(student_id=student_id, project_id=project_id, method=method, weight=weights[student_id][project_id])  # type: ignore
+            for student_id, project_id in assignment.items()
+        ])
+        db.session.commit()  # type: ignore
+    
+    logger.info("Allocation (%s): %d of %d students assigned in %.1f ms", method, len(assignment), len(weights), elapsed_ms)
+    return jsonify({
+        'method': method,
+        'applied': bool(json_data.get('apply')),
+        'students': len(weights),
+        'assigned': len(assignment),
+        'unassigned': sorted(set(weights) - set(assignment)),
+        'total_weight': assignment_weight(assignment, weights),
+        'blocking_pairs': unstable,
+        'elapsed_ms': round(elapsed_ms, 2),
+        'assignments': serialize_allocation(assignment, weights, names)
+    })
+
+@app.route('/api/allocation', methods=['GET'])
+@login_required
+def get_allocation():
+    """Last applied allocation; students only see their own assignment"""
+    query = Allocation.query.options(joinedload(Allocation.project))
+    if not current_user.is_teacher:
+        query = query.filter_by(student_id=current_user.id)
+    return jsonify({'assignments': [
+        {'student_id': a.student_id, 'project_id': a.project_id, 'project': a.project.name,
+         'method': a.method, 'weight': a.weight, 'created_at': a.created_at.isoformat()}
+        for a in query.order_by(Allocation.student_id)
+    ]})
+
+def count_interest_activity(project_id, column):
+    """Add one to today's `selections` or `cancellations` for a project, creating the day's row if needed"""
+    day = datetime.utcnow().date()
+    dialect = db.engine.dialect.name  # type: ignore
+    if dialect in ('sqlite', 'postgresql'):
+        # A single upsert, so concurrent first events of the day cannot collide on the primary key
+        insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        statement = insert(InterestActivity.__table__).values(day=day, project_id=project_id, **{column: 1})
+        db.session.execute(statement.on_conflict_do_update(  # type: ignore
+            index_elements=['day', 'project_id'], set_={column: getattr(InterestActivity, column) + 1}
+        ))
+        return
+    result = db.session.execute(  # type: ignore
+        update(InterestActivity).where(InterestActivity.day == day, InterestActivity.project_id == project_id)
+        .values(**{column: getattr(InterestActivity, column) + 1})
+    )
+    if result.rowcount == 0:
+        db.session.add(InterestActivity(day=day, project_id=project_id, **{column: 1}))  # type: ignore
+
+def count_interest(project_id, change):
+    """Apply a selection (+1) or cancellation (-1) to a project's counters; False if the project does not exist"""
+    result = db.session.execute(  # type: ignore
+        update(Project).where(Project.id == project_id).values(interest_count=Project.interest_count + change)
+    )
+    if result.rowcount == 0:
+        return False
+    count_interest_activity(project_id, 'selections' if change > 0 else 'cancellations')
+    return True
+
+def record_interest(student_id, project_id):
+    """Insert a student's interest in one statement, returning (created, existing)
+
+    The unique constraint on StudentInterest.student_id decides between concurrent requests: the
+    happy path is a single INSERT, and a request that loses gets the row that won as `existing`.
+    Both are None when the insert failed for another reason, such as an unknown project.
+    """
+    interest = StudentInterest(student_id=student_id, project_id=project_id)  # type: ignore
+    db.session.add(interest)  # type: ignore
+    try:
+        # The counter update flushes the INSERT, so a conflict surfaces here or on commit
+        if not count_interest(project_id, 1):
+            db.session.rollback()  # type: ignore
+            return None, None
+        bump_data_version('interests')
+        db.session.commit()  # type: ignore
+    except IntegrityError:
+        db.session.rollback()  # type: ignore
+        metrics.inc('interest_conflicts_total')
+        return None, StudentInterest.query.filter_by(student_id=student_id).first()
+    return interest, None
+
 @app.route('/api/project/interest', methods=['POST'])
 @login_required
 def express_interest():
@@ -394,18 +2194,13 @@ def express_interest():
     if not project_id:
         return jsonify({'error': 'Project ID is required'}), 400
     
-    existing_interest = StudentInterest.query.filter_by(
-        student_id=current_user.id
-    ).first()
-    
+    created, existing_interest = record_interest(current_user.id, project_id)
     if existing_interest:
-        return jsonify({'error': 'You have already expressed interest in a project'}), 400
-    
-    interest = StudentInterest(student_id=current_user.id, project_id=project_id)  # type: ignore
-    db.session.add(interest)  # type: ignore
-    db.session.commit()  # type: ignore
+        return jsonify({'error': 'You have already expressed interest in a project'}), 409
+    if not created:
+        return jsonify({'error': 'Project not found'}), 404
     
-    return jsonify({'message': 'Interest recorded successfully'})
+    return jsonify({'message': 'Interest recorded successfully'}), 201
 
 @app.route('/create_project', methods=['GET', 'POST'])
 @login_required
@@ -419,20 +2214,29 @@ def create_project():
         description = request.form.get('description')
         field = request.form.get('field')
         skill_requirements = request.form.get('skill_requirements', '') # Get skill_requirements
+        capacity = parse_capacity(request.form.get('capacity'))
         
         if not all([name, description, field]): # Skill requirements can be optional
             flash('Project Name, Description, and Field are required.') # Updated flash message
             return redirect(url_for('create_project'))
+        if capacity is None:
+            flash('Capacity must be a positive whole number.')
+            return redirect(url_for('create_project'))
             
         project = Project(  # type: ignore
             name=name,
             description=description,
             field=field,
             skill_requirements=skill_requirements, # Save skill_requirements
+            capacity=capacity,
             teacher_id=current_user.id
         )
         db.session.add(project)  # type: ignore
+        save_project_skills(project)
+        version = bump_catalog_version()
         db.session.commit()  # type: ignore
+        refresh_project_indexes(project)
+        schedule_warm_refresh([project.id], version)
         
         flash('Project created successfully!')
         return redirect(url_for('teacher_dashboard'))
@@ -453,28 +2257,175 @@ def api_create_project(): # This is used by the modal in teacher_dashboard
     description = data.get('description')
     field = data.get('field')
     skill_requirements = data.get('skill_requirements', '')
+    capacity = parse_capacity(data.get('capacity'))
 
     if not all([name, description, field]):
         return jsonify({'error': 'Project Name, Description, and Field are required.'}), 400
+    if capacity is None:
+        return jsonify({'error': 'Capacity must be a positive whole number.'}), 400
 
     project = Project(  # type: ignore
         name=name,
         description=description,
         field=field,
         skill_requirements=skill_requirements,
+        capacity=capacity,
         teacher_id=current_user.id
     )
     db.session.add(project)  # type: ignore
+    save_project_skills(project)
+    version = bump_catalog_version()
     db.session.commit()  # type: ignore
+    refresh_project_indexes(project)
+    schedule_warm_refresh([project.id], version)
     
     return jsonify({
         'id': project.id,
         'name': project.name,
         'description': project.description,
         'field': project.field,
-        'skill_requirements': project.skill_requirements
+        'skill_requirements': project.skill_requirements,
+        'capacity': project.capacity
     }), 201 # Return 201 Created status
 
+def insert_project_batch(batch, teacher_id, aliases):
+    """Insert validated project values with their project_skill rows and one catalog bump, as one transaction"""
+    projects = [Project(teacher_id=teacher_id, interest_count=0, **values) for values in batch]  # type: ignore
+    db.session.add_all(projects)  # type: ignore
+    db.session.flush()  # type: ignore
+    add_project_skills(db.session.connection(), [(p.id, p.skill_requirements) for p in projects], aliases)  # type: ignore
+    bump_catalog_version()
+    db.session.commit()  # type: ignore
+    return [p.id for p in projects]
+
+def import_projects(rows, teacher_id, batch_size=None, skip_existing=False, dry_run=False):
+    """Create projects from iter_project_rows() output in batched transactions; returns a summary with per-row errors
+
+    A batch that fails to commit is retried row by row, so a bad row only fails itself. Search rows are
+    written by the FTS triggers; local match indexes are rebuilt once at the end instead of per project.
+    With `skip_existing`, rows named like one of the teacher's projects (or an earlier row) are skipped.
+    """
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    summary = {'rows': 0, 'valid': 0, 'created': 0, 'skipped': 0, 'invalid': 0, 'failed': 0, 'errors': []}
+    names = set()
+    if skip_existing:
+        names = {name.lower() for (name,) in db.session.query(Project.name).filter_by(teacher_id=teacher_id)}  # type: ignore
+    aliases = load_aliases(db.session.connection())  # type: ignore
+    started = time.perf_counter()
+    batch, lines = [], []
+
+    def flush():
+        try:
+            summary['created'] += len(insert_project_batch(batch, teacher_id, aliases))
+        except SQLAlchemyError:
+            db.session.rollback()  # type: ignore
+            logger.warning("Project import batch of %d failed, retrying row by row", len(batch), exc_info=True)
+            for line, values in zip(lines, batch):
+                try:
+                    summary['created'] += len(insert_project_batch([values], teacher_id, aliases))
+                except SQLAlchemyError as e:
+                    db.session.rollback()  # type: ignore
+                    summary['failed'] += 1
+                    summary['errors'].append({'line': line, 'name': values['name'], 'error': f'Database error: {e.__class__.__name__}'})
+        batch.clear()
+        lines.clear()
+
+    try:
+        for line, row, error in rows:
+            summary['rows'] += 1
+            values = None
+            if error is None:
+                values, error = validate_project_row(row)
+            if error is not None:
+                summary['invalid'] += 1
+                name = row.get('name') if isinstance(row, dict) and isinstance(row.get('name'), str) else None
+                summary['errors'].append({'line': line, 'name': name, 'error': error})
+                continue
+            if skip_existing:
+                if values['name'].lower() in names:
+                    summary['skipped'] += 1
+                    continue
+                names.add(values['name'].lower())
+            summary['valid'] += 1
+            if dry_run:
+                continue
+            batch.append(values)
+            lines.append(line)
+            if len(batch) >= batch_size:
+                flush()
+    except ImportFormatError as e:
+        summary['error'] = str(e)
+    if batch:
+        flush()
+
+    if summary['created']:
+        with span('import_reindex'):
+            sync_project_indexes(Project.query.all(), get_catalog_version())
+        schedule_warm_refresh()
+        metrics.inc('projects_imported_total', summary['created'])
+    summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    logger.info("Imported %d projects (%d invalid, %d failed, %d skipped) in %.2fs", summary['created'],
+                summary['invalid'], summary['failed'], summary['skipped'], summary['elapsed_seconds'])
+    return summary
+
+def export_project_rows(teacher_id=None):
+    """EXPORT_COLUMNS rows in id order, fetched in batches rather than all at once"""
+    query = db.session.query(  # type: ignore
+        Project.id, Project.name, Project.description, Project.field, Project.skill_requirements,
+        Project.capacity, User.email
+    ).join(User, User.id == Project.teacher_id)
+    if teacher_id is not None:
+        query = query.filter(Project.teacher_id == teacher_id)
+    return query.order_by(Project.id).yield_per(500)
+
+@app.route('/api/projects/import', methods=['POST'])
+@login_required
+def api_import_projects():
+    """Create the teacher's projects from a CSV or JSONL upload (multipart `file` or the raw request body)
+
+    ?format=csv|jsonl overrides detection from the file name or Content-Type; ?skip_existing=1 skips
+    rows named like an existing project of the teacher and ?dry_run=1 only validates.
+    """
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    upload = request.files.get('file')
+    if upload is not None:
+        fmt = request.args.get('format') or detect_format(upload.filename, upload.mimetype)
+        stream = upload.stream
+    else:
+        fmt = request.args.get('format') or detect_format(mimetype=request.mimetype)
+        stream = request.stream
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': 'Upload a .csv or .jsonl file, or pass ?format=csv|jsonl'}), 400
+    
+    summary = import_projects(
+        iter_project_rows(stream, fmt),
+        current_user.id,
+        skip_existing=request.args.get('skip_existing') == '1',
+        dry_run=request.args.get('dry_run') == '1'
+    )
+    status = 400 if summary.get('error') and not summary['created'] else 200
+    return jsonify(summary), status
+
+@app.route('/api/projects/export', methods=['GET'])
+@login_required
+def api_export_projects():
+    """The teacher's projects (?all=1: the whole catalog) streamed as CSV or JSONL (?format=, default csv)"""
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Unauthorized'}), 403
+    fmt = request.args.get('format', 'csv')
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    rows = export_project_rows(None if request.args.get('all') == '1' else current_user.id)
+    
+    response = Response(
+        stream_with_context(export_chunks(rows, fmt)),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=projects.{fmt}'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/edit_project/<int:project_id>', methods=['GET', 'POST'])
 @login_required
 def edit_project(project_id):
@@ -491,14 +2442,23 @@ def edit_project(project_id):
         project.description = request.form['description']
         project.field = request.form['field']
         project.skill_requirements = request.form.get('skill_requirements', '') # Get and update skill_requirements
+        capacity = parse_capacity(request.form.get('capacity'))
         
         # Validate required fields again (name, description, field)
         if not all([project.name, project.description, project.field]):
             flash('Project Name, Description, and Field are required.')
             # Pass project object back to template to repopulate form
             return render_template('edit_project.html', project=project) 
+        if capacity is None:
+            flash('Capacity must be a positive whole number.')
+            return render_template('edit_project.html', project=project)
+        project.capacity = capacity
 
+        save_project_skills(project)
+        version = bump_catalog_version()
         db.session.commit()  # type: ignore
+        refresh_project_indexes(project)
+        schedule_warm_refresh([project.id], version)
         flash('Project updated successfully!')
         return redirect(url_for('teacher_dashboard'))
         
@@ -510,18 +2470,16 @@ def student_interest(project_id):
     if current_user.is_teacher:
         return jsonify({'error': 'Teachers cannot express interest'}), 403
         
-    # Check if student has already selected another project
-    existing_interest = StudentInterest.query.filter_by(student_id=current_user.id).first()
+    # Insert first; the unique constraint reports a project the student has already selected
+    created, existing_interest = record_interest(current_user.id, project_id)
     if existing_interest:
         if existing_interest.project_id == project_id:
-            return jsonify({'message': 'You have already selected this project.'}), 400
+            return jsonify({'message': 'You have already selected this project.'}), 409
         else:
-            return jsonify({'message': 'You have already selected another project. Please cancel your previous selection first.'}), 400
-            
-    interest = StudentInterest(student_id=current_user.id, project_id=project_id)  # type: ignore
-    db.session.add(interest)  # type: ignore
-    db.session.commit()  # type: ignore
-    return jsonify({'message': 'Interest expressed successfully!'})
+            return jsonify({'message': 'You have already selected another project. Please cancel your previous selection first.'}), 409
+    if not created:
+        return jsonify({'message': 'Project not found.'}), 404
+    return jsonify({'message': 'Interest expressed successfully!'}), 201
 
 @app.route('/cancel_interest/<int:project_id>', methods=['GET', 'POST'])
 @login_required
@@ -536,6 +2494,8 @@ def cancel_interest(project_id):
     ).first_or_404()
     
     db.session.delete(interest)  # type: ignore
+    count_interest(project_id, -1)
+    bump_data_version('interests')
     db.session.commit()  # type: ignore
     
     if request.method == 'GET':
@@ -544,87 +2504,240 @@ def cancel_interest(project_id):
     
     return jsonify({'message': 'Selection cancelled.'})
 
-def init_db():
-    with app.app_context():
-        # Drop all tables and recreate
-        db.drop_all()
-        db.create_all()
-        
-        # Create test accounts
+# Sample data added by seed_demo_data() (`flask --app app seed`, and `python app.py` in development)
+DEMO_PROJECTS = [
+    {
+        'name': 'AI Image Recognition Project',
+        'description': 'Medical image analysis using deep learning and computer vision technologies, including X-ray analysis and lesion detection. The project will use PyTorch framework and develop interactive visualization interfaces to display analysis results.',
+        'field': 'Healthcare',
+        'skill_requirements': 'Python, PyTorch, Computer Vision, Deep Learning'
+    },
+    {
+        'name': 'Smart Medical Diagnosis Assistant',
+        'description': 'Intelligent consultation system based on natural language processing and machine learning, capable of understanding patient descriptions and providing preliminary diagnostic recommendations. The project uses BERT model to process medical text data.',
+        'field': 'Healthcare',
+        'skill_requirements': 'Python, NLP, Machine Learning, BERT'
+    },
+    {
+        'name': 'Blockchain Medical Data System',
+        'description': 'Build a secure and transparent medical data sharing platform using blockchain technology to ensure patient data privacy and security. Includes smart contract development and web interface implementation.',
+        'field': 'Healthcare',
+        'skill_requirements': 'Blockchain, Solidity, Smart Contracts, Web Development'
+    },
+    {
+        'name': 'Blockchain Application Development',
+        'description': 'Develop Ethereum-based decentralized applications, implementing smart contract deployment and invocation. The project includes DApp frontend development and smart contract programming.',
+        'field': 'Blockchain',
+        'skill_requirements': 'Ethereum, Solidity, Web3.js, JavaScript, DApp Development'
+    },
+    {
+        'name': 'Smart Home Control System',
+        'description': 'IoT-based smart home control system enabling remote control, automation scenarios, and voice interaction. Uses MQTT protocol and ESP32 development board to create a complete smart home solution.',
+        'field': 'IoT',
+        'skill_requirements': 'IoT, MQTT, ESP32, C++, Embedded Systems'
+    },
+    {
+        'name': 'Network Security Vulnerability Detection Platform',
+        'description': 'Automated network security vulnerability scanning and detection platform capable of security assessment and risk analysis for enterprise internal networks. Uses Python and open-source security tools to build a complete security testing framework.',
+        'field': 'Cybersecurity',
+        'skill_requirements': 'Python, Cybersecurity, Network Scanning, Linux'
+    },
+    {
+        'name': 'Big Data Analysis and Visualization Platform',
+        'description': 'Enterprise-level big data processing and analysis platform providing intuitive data visualization interface and predictive analysis functions. Uses Hadoop ecosystem and D3.js visualization library to implement data storage, processing, and display.',
+        'field': 'Big Data',
+        'skill_requirements': 'Big Data, Hadoop, Spark, D3.js, Data Visualization, Python'
+    }
+]
+
+def migrate_database():
+    """Create or upgrade the schema to the latest migration; a single query when it is already current"""
+    applied = migrate(db.engine, db.metadata)  # type: ignore
+    if applied:
+        logger.info("Database migrated to version %d", applied[-1])
+    return applied
+
+def seed_demo_data():
+    """Add the test accounts and sample projects that are missing; existing rows are never touched"""
+    teacher = User.query.filter_by(email='teacher@test.com').first()
+    if teacher is None:
         teacher = User(**{  # type: ignore
             'email': 'teacher@test.com',
-            'password_hash': generate_password_hash('teacher123'),
+            'password_hash': generate_password_hash('teacher123', PASSWORD_HASH_METHOD),
             'is_teacher': True
         })
         db.session.add(teacher)  # type: ignore
-        db.session.commit()  # type: ignore
-        
-        # Add test projects
-        projects = [
-            {
-                'name': 'AI Image Recognition Project',
-                'description': 'Medical image analysis using deep learning and computer vision technologies, including X-ray analysis and lesion detection. The project will use PyTorch framework and develop interactive visualization interfaces to display analysis results.',
-                'field': 'Healthcare',
-                'skill_requirements': 'Python, PyTorch, Computer Vision, Deep Learning'
-            },
-            {
-                'name': 'Smart Medical Diagnosis Assistant',
-                'description': 'Intelligent consultation system based on natural language processing and machine learning, capable of understanding patient descriptions and providing preliminary diagnostic recommendations. The project uses BERT model to process medical text data.',
-                'field': 'Healthcare',
-                'skill_requirements': 'Python, NLP, Machine Learning, BERT'
-            },
-            {
-                'name': 'Blockchain Medical Data System',
-                'description': 'Build a secure and transparent medical data sharing platform using blockchain technology to ensure patient data privacy and security. Includes smart contract development and web interface implementation.',
-                'field': 'Healthcare',
-                'skill_requirements': 'Blockchain, Solidity, Smart Contracts, Web Development'
-            },
-            {
-                'name': 'Blockchain Application Development',
-                'description': 'Develop Ethereum-based decentralized applications, implementing smart contract deployment and invocation. The project includes DApp frontend development and smart contract programming.',
-                'field': 'Blockchain',
-                'skill_requirements': 'Ethereum, Solidity, Web3.js, JavaScript, DApp Development'
-            },
-            {
-                'name': 'Smart Home Control System',
-                'description': 'IoT-based smart home control system enabling remote control, automation scenarios, and voice interaction. Uses MQTT protocol and ESP32 development board to create a complete smart home solution.',
-                'field': 'IoT',
-                'skill_requirements': 'IoT, MQTT, ESP32, C++, Embedded Systems'
-            },
-            {
-                'name': 'Network Security Vulnerability Detection Platform',
-                'description': 'Automated network security vulnerability scanning and detection platform capable of security assessment and risk analysis for enterprise internal networks. Uses Python and open-source security tools to build a complete security testing framework.',
-                'field': 'Cybersecurity',
-                'skill_requirements': 'Python, Cybersecurity, Network Scanning, Linux'
-            },
-            {
-                'name': 'Big Data Analysis and Visualization Platform',
-                'description': 'Enterprise-level big data processing and analysis platform providing intuitive data visualization interface and predictive analysis functions. Uses Hadoop ecosystem and D3.js visualization library to implement data storage, processing, and display.',
-                'field': 'Big Data',
-                'skill_requirements': 'Big Data, Hadoop, Spark, D3.js, Data Visualization, Python'
-            }
-        ]
-        
-        for p_data in projects:  # Renamed loop variable to avoid conflict
-            project = Project(  # type: ignore
-                name=p_data['name'],
-                description=p_data['description'],
-                field=p_data['field'],
-                skill_requirements=p_data.get('skill_requirements', ''),  # Add skill requirements
-                teacher_id=teacher.id
-            )
-            db.session.add(project)  # type: ignore
-        
-        student = User(**{  # type: ignore
+        db.session.flush()  # type: ignore
+    
+    existing = {name for (name,) in db.session.query(Project.name).filter_by(teacher_id=teacher.id)}  # type: ignore
+    added = 0
+    for p_data in DEMO_PROJECTS:
+        if p_data['name'] in existing:
+            continue
+        project = Project(  # type: ignore
+            name=p_data['name'],
+            description=p_data['description'],
+            field=p_data['field'],
+            skill_requirements=p_data.get('skill_requirements', ''),
+            teacher_id=teacher.id
+        )
+        db.session.add(project)  # type: ignore
+        save_project_skills(project)
+        added += 1
+    if added:
+        bump_catalog_version()
+    
+    if User.query.filter_by(email='student@test.com').first() is None:
+        db.session.add(User(**{  # type: ignore
             'email': 'student@test.com',
-            'password_hash': generate_password_hash('student123'),
+            'password_hash': generate_password_hash('student123', PASSWORD_HASH_METHOD),
             'is_teacher': False
-        })
-        db.session.add(student)  # type: ignore
-        
+        }))
+    
+    db.session.commit()  # type: ignore
+    logger.info("Demo data seeded (%d projects added)", added)
+
+def init_db():
+    """Drop every table and rebuild the database from the migrations and demo data (destructive)"""
+    with app.app_context():
+        # Continue the version counters past their old values, so caches, ETags and match indexes built
+        # from the old data (here or in other workers) are not mistaken for current ones
+        try:
+            versions = dict(db.session.query(DataVersion.name, DataVersion.version).all())  # type: ignore
+        except SQLAlchemyError:
+            versions = {}
+        db.session.rollback()  # type: ignore
+        db.drop_all()
+        with db.engine.begin() as connection:  # type: ignore
+            schema_version.drop(connection, checkfirst=True)
+            connection.execute(text('DROP TABLE IF EXISTS project_fts'))
+        migrate_database()
+        for name, version in versions.items():
+            db.session.execute(update(DataVersion).where(DataVersion.name == name).values(version=version + 1))  # type: ignore
+        db.session.commit()  # type: ignore
+        seed_demo_data()
+        logger.info("Database initialized successfully!")
+
+_started = False
+
+def create_app():
+    """WSGI entry point (see wsgi.py): applies pending migrations unless AUTO_MIGRATE=0 and maps the
+    semantic vectors, once per process
+
+    Importing this module only configures objects - no database queries, network connections or files -
+    so gunicorn workers start quickly. Seeding is never done here; run `flask --app app seed` instead.
+    """
+    global _started
+    if not _started:
+        if os.getenv('AUTO_MIGRATE', '1') == '1':
+            with app.app_context():
+                migrate_database()
+        semantic_index.load()
+        _started = True
+    return app
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations"""
+    with app.app_context():
+        applied = migrate_database()
+    click.echo(f"Applied migrations {applied}" if applied else 'Database schema is up to date')
+
+@app.cli.command('seed')
+def seed_command():
+    """Add the demo accounts and sample projects if they are missing"""
+    with app.app_context():
+        migrate_database()
+        seed_demo_data()
+
+@app.cli.command('backfill-skills')
+def backfill_skills_command():
+    """Rebuild the normalized skill rows of every project from its skill_requirements text"""
+    with app.app_context():
+        migrate_database()
+        with db.engine.begin() as connection:  # type: ignore
+            aliases = seed_aliases(connection)
+            projects, links = backfill_project_skills(connection)
+        # Other workers rebuild their skill bitsets when the catalog version moves
+        bump_catalog_version()
         db.session.commit()  # type: ignore
-        print("Database initialized successfully!")
+    click.echo(f"Normalized skills of {projects} projects ({links} project skills, {aliases} new aliases)")
+
+@app.cli.command('recount-interests')
+def recount_interests_command():
+    """Rebuild the per-project and daily interest counters from the interest rows"""
+    with app.app_context():
+        migrate_database()
+        with db.engine.begin() as connection:  # type: ignore
+            interests = recount_interest_counters(connection)
+        bump_data_version('interests')
+        db.session.commit()  # type: ignore
+    click.echo(f"Recounted {interests} interests")
+
+@app.cli.command('import-projects')
+@click.argument('input_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--teacher', 'teacher_email', required=True, help='Email of the teacher account that owns the projects')
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None, help='Default: from the file extension')
+@click.option('--batch-size', type=int, default=None, help='Projects per transaction (default IMPORT_BATCH_SIZE)')
+@click.option('--skip-existing', is_flag=True, help="Skip rows named like one of the teacher's projects")
+@click.option('--dry-run', is_flag=True, help='Only validate the file')
+def import_projects_command(input_path, teacher_email, fmt, batch_size, skip_existing, dry_run):
+    """Create projects from a CSV or JSONL file of {name, description, field, skill_requirements, capacity} rows"""
+    fmt = fmt or detect_format(input_path)
+    if fmt is None:
+        raise click.UsageError('Cannot tell the format from the file name; pass --format')
+    with app.app_context():
+        migrate_database()
+        teacher = User.query.filter_by(email=teacher_email, is_teacher=True).first()
+        if teacher is None:
+            raise click.UsageError(f'No teacher account {teacher_email}')
+        with open(input_path, 'rb') as f:
+            summary = import_projects(iter_project_rows(f, fmt), teacher.id, batch_size=batch_size,
+                                      skip_existing=skip_existing, dry_run=dry_run)
+    for error in summary.pop('errors'):
+        click.echo(f"Line {error['line']}: {error['error']}", err=True)
+    click.echo(json.dumps(summary))
+
+@app.cli.command('export-projects')
+@click.option('--output', '-o', 'output_path', default='-', type=click.Path(dir_okay=False), help='Default: stdout')
+@click.option('--teacher', 'teacher_email', default=None, help="Only this teacher's projects")
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Default: from the output file extension, else csv')
+def export_projects_command(output_path, teacher_email, fmt):
+    """Write projects as CSV or JSONL in the format import-projects reads"""
+    fmt = fmt or detect_format(output_path) or 'csv'
+    with app.app_context():
+        teacher_id = None
+        if teacher_email:
+            teacher = User.query.filter_by(email=teacher_email, is_teacher=True).first()
+            if teacher is None:
+                raise click.UsageError(f'No teacher account {teacher_email}')
+            teacher_id = teacher.id
+        with click.open_file(output_path, 'w', encoding='utf-8') as out:
+            for chunk in export_chunks(export_project_rows(teacher_id), fmt):
+                out.write(chunk)
+
+@app.cli.command('warm-start')
+@click.option('--all', 'rebuild_all', is_flag=True, help='Rescore every profile, not only the stale ones')
+def warm_start_command(rebuild_all):
+    """Precompute the warm-start recommendations of student profiles that are out of date"""
+    with app.app_context():
+        migrate_database()
+        if rebuild_all:
+            StudentProfile.query.update({StudentProfile.catalog_version: None})
+            db.session.commit()  # type: ignore
+        merged, rescored = refresh_warm_starts()
+    click.echo(f"Refreshed {merged + rescored} warm-start lists")
+
+@app.cli.command('reset-db')
+@click.confirmation_option(prompt='This deletes all data. Continue?')
+def reset_db_command():
+    """Drop all tables and recreate them with demo data"""
+    init_db()
 
 if __name__ == '__main__':
-    init_db()  # Reinitialize database on each startup
+    # Development server: upgrade the schema and make sure the test accounts exist, keeping all data
+    create_app()
+    with app.app_context():
+        seed_demo_data()
     app.run(debug=True)
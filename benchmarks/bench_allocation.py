@@ -0,0 +1,127 @@
+"""Scaling benchmark for the allocation solvers in allocation.py
+
+Generates synthetic cohorts (skewed project popularity, rubric-like scores in half points, 1-6 seats per
+project), times deferred acceptance and max-weight assignment at increasing sizes, and checks the results:
+no blocking pairs for deferred acceptance, and max-weight totals equal to a slow reference min-cost-flow
+solver on small instances.
+
+    python benchmarks/bench_allocation.py --sizes 1000 2000 5000 10000 --choices 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from allocation import (assignment_weight, blocking_pairs, build_preferences,  # noqa: E402
+                        deferred_acceptance, max_weight_assignment)
+
+
+def synthetic_cohort(students, choices, seed, seats_per_student=1.1):
+    """weights {student: {project: score}} and capacities with roughly seats_per_student seats per student"""
+    rng = random.Random(seed)
+    capacities = {}
+    total = 0
+    project = 0
+    while total < students * seats_per_student:
+        capacities[project] = rng.randint(1, 6)
+        total += capacities[project]
+        project += 1
+    projects = list(capacities)
+    # Zipf-like popularity: a few projects are ranked by most students
+    popularity = [1.0 / (rank + 1) ** 0.8 for rank in range(len(projects))]
+    weights = {}
+    for student in range(students):
+        picked = set()
+        while len(picked) < min(choices, len(projects)):
+            picked.add(rng.choices(projects, popularity)[0])
+        weights[student] = {p: rng.randint(6, 20) / 2 for p in picked}
+    return weights, capacities
+
+
+def reference_max_weight(weights, capacities):
+    """Max-weight assignment by successive shortest paths with Bellman-Ford (slow, for checking only)"""
+    students = list(weights)
+    projects = sorted(capacities)
+    source, sink = 'S', 'T'
+    graph = {}
+
+    def add_edge(u, v, capacity, cost):
+        graph.setdefault(u, []).append([v, capacity, cost, len(graph.setdefault(v, []))])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+
+    for s in students:
+        add_edge(source, ('s', s), 1, 0)
+        add_edge(('s', s), sink, 1, 0)  # stay unassigned
+        for p, w in weights[s].items():
+            if w > 0 and capacities.get(p, 0) > 0:
+                add_edge(('s', s), ('p', p), 1, -w)
+    for p in projects:
+        add_edge(('p', p), sink, capacities[p], 0)
+
+    total = 0.0
+    for _ in students:
+        dist = {source: 0.0}
+        prev = {}
+        for _ in range(len(graph)):
+            changed = False
+            for u, edges in graph.items():
+                if u not in dist:
+                    continue
+                for index, (v, capacity, cost, _) in enumerate(edges):
+                    if capacity > 0 and dist[u] + cost < dist.get(v, float('inf')) - 1e-9:
+                        dist[v] = dist[u] + cost
+                        prev[v] = (u, index)
+                        changed = True
+            if not changed:
+                break
+        v = sink
+        while v != source:
+            u, index = prev[v]
+            edge = graph[u][index]
+            edge[1] -= 1
+            graph[v][edge[3]][1] += 1
+            v = u
+        total += dist[sink]
+    return -total
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000, 5000, 10000])
+    parser.add_argument('--choices', type=int, default=10, help='ranked projects per student')
+    parser.add_argument('--seats', type=float, default=1.1, help='total seats per student')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--check-size', type=int, default=60, help='instance size checked against the reference solver')
+    args = parser.parse_args()
+
+    for trial in range(3):
+        weights, capacities = synthetic_cohort(args.check_size, min(args.choices, 5), args.seed + trial, args.seats)
+        fast = assignment_weight(max_weight_assignment(weights, capacities), weights)
+        slow = reference_max_weight(weights, capacities)
+        status = 'ok' if abs(fast - slow) < 1e-6 else 'MISMATCH'
+        print(f"check n={args.check_size} seed={args.seed + trial}: max-weight {fast:.1f} reference {slow:.1f} {status}")
+
+    print(f"{'students':>8} {'projects':>8} {'DA ms':>8} {'blocking':>8} {'DA weight':>10} "
+          f"{'MW ms':>8} {'MW weight':>10} {'MW assigned':>11}")
+    for size in args.sizes:
+        weights, capacities = synthetic_cohort(size, args.choices, args.seed, args.seats)
+        preferences, priorities = build_preferences(weights)
+        stable, da_seconds = timed(deferred_acceptance, preferences, capacities, priorities)
+        blocking = len(blocking_pairs(stable, preferences, capacities, priorities))
+        optimal, mw_seconds = timed(max_weight_assignment, weights, capacities)
+        print(f"{size:>8} {len(capacities):>8} {da_seconds * 1000:>8.1f} {blocking:>8} "
+              f"{assignment_weight(stable, weights):>10.1f} {mw_seconds * 1000:>8.1f} "
+              f"{assignment_weight(optimal, weights):>10.1f} {len(optimal):>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Login throughput under concurrent load, and how the password hash cap protects other requests
+
+Boots the app on a threaded local server with a throwaway SQLite database and a cohort of student accounts.
+For each --hash-workers value, --clients threads log in repeatedly as distinct students while --bystanders
+threads poll /api/projects with an existing session, for --seconds each. Reports logins/s, login p50/p95,
+bystander p50/p95 and how many logins were shed with 503. A final phase sends wrong passwords for a single
+account and reports how many the per-email throttle turned away with 429 before they reached the hasher.
+
+    python benchmarks/bench_login.py --hash-workers 1 2 4 16 --clients 32 --seconds 10
+    python benchmarks/bench_login.py --legacy-method pbkdf2:sha256:600000   # also measure rehash on login
+
+With --legacy-method the accounts start with hashes made by that method; the first phase's logins rehash
+them to PASSWORD_HASH_METHOD and the number of rehashed accounts is reported.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from http.cookiejar import CookieJar
+
+from load_test import load_app, percentile
+
+PASSWORD = 'login-bench-password'
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def opener():
+    return urllib.request.build_opener(NoRedirect, urllib.request.HTTPCookieProcessor(CookieJar()))
+
+
+def request(client, url, data=None):
+    """(status, seconds) of one request; redirects are returned rather than followed"""
+    started = time.perf_counter()
+    try:
+        with client.open(url, data=urllib.parse.urlencode(data).encode() if data else None, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def populate(appmod, students, method):
+    """Student accounts sharing one precomputed hash (hashing each would dominate the setup time)"""
+    password_hash = appmod.generate_password_hash(PASSWORD, method)
+    emails = [f'student{i}@login.test' for i in range(students)]
+    with appmod.app.app_context():
+        appmod.db.session.execute(appmod.User.__table__.insert(), [
+            {'email': email, 'password_hash': password_hash, 'is_teacher': False} for email in emails
+        ])
+        appmod.db.session.commit()
+    return emails
+
+
+def phase(base_url, emails, clients, bystanders, seconds):
+    login_url = f"{base_url}/login/student"
+    bystander_clients = []
+    for i in range(bystanders):
+        client = opener()
+        status, _ = request(client, login_url, {'email': emails[-1 - i], 'password': PASSWORD})
+        if status != 302:
+            raise RuntimeError(f'bystander login failed with {status}')
+        bystander_clients.append(client)
+
+    logins, polls = [], []
+    deadline = time.perf_counter() + seconds
+
+    def log_in(index):
+        n = index
+        while time.perf_counter() < deadline:
+            logins.append(request(opener(), login_url, {'email': emails[n % len(emails)], 'password': PASSWORD}))
+            n += clients
+
+    def poll(client):
+        while time.perf_counter() < deadline:
+            polls.append(request(client, f"{base_url}/api/projects?limit=20"))
+
+    threads = [threading.Thread(target=log_in, args=(i,)) for i in range(clients)]
+    threads += [threading.Thread(target=poll, args=(client,)) for client in bystander_clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _ in logins)
+    ok = [seconds for status, seconds in logins if status == 302]
+    return {
+        'logins_per_second': round(len(ok) / elapsed, 1),
+        'login_p50_ms': round(percentile(ok, 0.5) * 1000, 1),
+        'login_p95_ms': round(percentile(ok, 0.95) * 1000, 1),
+        'shed_503': statuses.get(503, 0),
+        'other_errors': sum(count for status, count in statuses.items() if status not in (302, 503)),
+        'bystander_p50_ms': round(percentile([s for _, s in polls], 0.5) * 1000, 1),
+        'bystander_p95_ms': round(percentile([s for _, s in polls], 0.95) * 1000, 1),
+        'bystander_requests': len(polls)
+    }
+
+
+def throttle_phase(appmod, base_url, email, attempts):
+    """Wrong passwords for one account with the default limits: (statuses, hashes actually computed)"""
+    from throttling import TokenBucketLimiter
+    appmod.login_ip_limiter = TokenBucketLimiter(rate=1e6, burst=1e6)  # every request comes from 127.0.0.1
+    appmod.login_email_limiter = TokenBucketLimiter(
+        rate=float(os.getenv('LOGIN_EMAIL_RATE', '0.1')), burst=float(os.getenv('LOGIN_EMAIL_BURST', '5'))
+    )
+    verified = Counter()
+    verify = appmod.password_hasher.verify
+
+    def counting_verify(*args):
+        verified['hashes'] += 1
+        return verify(*args)
+
+    appmod.password_hasher.verify = counting_verify
+    client = opener()
+    statuses = Counter(
+        request(client, f"{base_url}/login/student", {'email': email, 'password': 'wrong'})[0] for _ in range(attempts)
+    )
+    return dict(statuses), verified['hashes']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hash-workers', type=int, nargs='+', default=[1, 2, 4], help='password hash caps, one phase each')
+    parser.add_argument('--queue', type=int, default=64, help='PASSWORD_HASH_QUEUE for every phase')
+    parser.add_argument('--clients', type=int, default=16, help='threads logging in concurrently')
+    parser.add_argument('--bystanders', type=int, default=4, help='threads polling /api/projects meanwhile')
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=8.0, help='length of each phase')
+    parser.add_argument('--legacy-method', help='hash method the accounts start with (default PASSWORD_HASH_METHOD)')
+    parser.add_argument('--throttle-attempts', type=int, default=50, help='wrong passwords sent in the throttle phase')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        appmod = load_app(workdir, 'http://127.0.0.1:9/v1')  # chat is not exercised
+        from passwords import PasswordHasher
+        from throttling import TokenBucketLimiter
+        emails = populate(appmod, args.students, args.legacy_method or appmod.PASSWORD_HASH_METHOD)
+
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, appmod.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        print(f"{os.cpu_count()} CPUs, {args.clients} login clients, {args.bystanders} bystanders, "
+              f"hash method {appmod.PASSWORD_HASH_METHOD}")
+        print(f"{'hash workers':>12} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'503':>5} {'errors':>6} "
+              f"{'bystander p50':>13} {'p95 ms':>8}")
+        for workers in args.hash_workers:
+            appmod.password_hasher = PasswordHasher(appmod.PASSWORD_HASH_METHOD, workers=workers, queue=args.queue)
+            # Every client shares 127.0.0.1 and logs in many times; measure hashing, not the throttle
+            appmod.login_ip_limiter = TokenBucketLimiter(rate=1e6, burst=1e6)
+            appmod.login_email_limiter = TokenBucketLimiter(rate=1e6, burst=1e6)
+            result = phase(base_url, emails, args.clients, args.bystanders, args.seconds)
+            print(f"{workers:>12} {result['logins_per_second']:>9} {result['login_p50_ms']:>8} {result['login_p95_ms']:>8} "
+                  f"{result['shed_503']:>5} {result['other_errors']:>6} {result['bystander_p50_ms']:>13} "
+                  f"{result['bystander_p95_ms']:>8}")
+            if args.legacy_method and workers == args.hash_workers[0]:
+                with appmod.app.app_context():
+                    rehashed = sum(
+                        1 for (password_hash,) in appmod.db.session.query(appmod.User.password_hash)
+                        if not appmod.password_hasher.needs_rehash(password_hash)
+                    )
+                print(f"{'':>12} {rehashed} of {len(emails)} accounts rehashed to {appmod.PASSWORD_HASH_METHOD}")
+            appmod.password_hasher.shutdown()
+
+        appmod.password_hasher = PasswordHasher(appmod.PASSWORD_HASH_METHOD, workers=args.hash_workers[-1], queue=args.queue)
+        statuses, hashes = throttle_phase(appmod, base_url, emails[0], args.throttle_attempts)
+        print(f"\nThrottle: {args.throttle_attempts} wrong passwords for one account -> {statuses}, {hashes} hashes computed")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
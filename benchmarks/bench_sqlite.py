@@ -0,0 +1,134 @@
+"""Multi-threaded SQLite read/write throughput with the default engine and with the tuned pragmas
+
+Mimics the app's hot paths on a throwaway database: reader threads run dashboard-style queries (projects
+joined with their interests) while writer threads insert and delete interest rows, one commit each.
+Each configuration runs for a fixed time and reports operations per second, p99 latency and lock errors.
+
+    python benchmarks/bench_sqlite.py --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import install_sqlite_pragmas, sqlite_pragmas  # noqa: E402
+
+SCHEMA = (
+    "CREATE TABLE project (id INTEGER PRIMARY KEY, name TEXT NOT NULL, description TEXT NOT NULL, teacher_id INTEGER NOT NULL)",
+    "CREATE INDEX ix_project_teacher_id ON project (teacher_id)",
+    "CREATE TABLE student_interest (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL UNIQUE, project_id INTEGER NOT NULL, timestamp TEXT)",
+    "CREATE INDEX ix_student_interest_project_id ON student_interest (project_id)",
+)
+READ_QUERY = text(
+    "SELECT p.id, p.name, p.description, si.student_id FROM project p "
+    "LEFT JOIN student_interest si ON si.project_id = p.id WHERE p.teacher_id = :teacher"
+)
+
+
+def setup(engine, projects, teachers):
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(
+            text("INSERT INTO project (id, name, description, teacher_id) VALUES (:id, :name, :description, :teacher)"),
+            [{'id': i, 'name': f'Project {i}', 'description': 'x' * 400, 'teacher': i % teachers} for i in range(projects)]
+        )
+
+
+def reader(engine, stop, stats, teachers, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(READ_QUERY, {'teacher': rng.randrange(teachers)}).fetchall()
+        except OperationalError:
+            stats['errors'] += 1
+            continue
+        stats['latencies'].append(time.perf_counter() - start)
+
+
+def writer(engine, stop, stats, projects, first_student, seed):
+    rng = random.Random(seed)
+    student = first_student
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                if rng.random() < 0.8:
+                    conn.execute(
+                        text("INSERT INTO student_interest (student_id, project_id, timestamp) VALUES (:s, :p, datetime('now'))"),
+                        {'s': student, 'p': rng.randrange(projects)}
+                    )
+                    student += 1
+                else:
+                    conn.execute(text("DELETE FROM student_interest WHERE student_id = :s"), {'s': student - 1})
+        except OperationalError:
+            stats['errors'] += 1
+            continue
+        stats['latencies'].append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+def run(label, pragmas, args):
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            pool_size=args.readers + args.writers, connect_args={'timeout': args.lock_timeout}
+        )
+        install_sqlite_pragmas(engine, pragmas)
+        setup(engine, args.projects, args.teachers)
+        stop = threading.Event()
+        read_stats = [{'latencies': [], 'errors': 0} for _ in range(args.readers)]
+        write_stats = [{'latencies': [], 'errors': 0} for _ in range(args.writers)]
+        threads = [
+            threading.Thread(target=reader, args=(engine, stop, stats, args.teachers, i))
+            for i, stats in enumerate(read_stats)
+        ] + [
+            threading.Thread(target=writer, args=(engine, stop, stats, args.projects, i * 10_000_000, i))
+            for i, stats in enumerate(write_stats)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    for kind, per_thread in (('reads', read_stats), ('writes', write_stats)):
+        latencies = [latency for stats in per_thread for latency in stats['latencies']]
+        errors = sum(stats['errors'] for stats in per_thread)
+        print(f"{label:>8} {kind:>6} {len(latencies) / args.seconds:>10.0f} {percentile(latencies, 0.5) * 1000:>9.2f}"
+              f" {percentile(latencies, 0.99) * 1000:>9.2f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--projects', type=int, default=500)
+    parser.add_argument('--teachers', type=int, default=50)
+    parser.add_argument('--lock-timeout', type=float, default=5.0, help="sqlite3 driver's busy timeout for the default run")
+    args = parser.parse_args()
+
+    print(f"{'config':>8} {'kind':>6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    run('default', {}, args)
+    run('tuned', sqlite_pragmas(), args)
+
+
+if __name__ == '__main__':
+    main()
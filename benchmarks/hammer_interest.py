@@ -0,0 +1,140 @@
+"""Concurrency check for interest recording: many threads race to select projects for the same students
+
+Starts the app on a threaded local server with a throwaway SQLite database, logs in a cohort of students
+and fires overlapping requests at /student_interest/<id> and /api/project/interest for each of them.
+Passes when every student ends up with exactly one StudentInterest row, exactly one request per student
+succeeded, every other request got 409 Conflict and each project's interest_count matches its rows.
+
+    python benchmarks/hammer_interest.py --students 200 --attempts 8 --threads 32
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(workdir):
+    """Import app.py against a fresh database in `workdir`"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'hammer.db')}"
+    os.environ['SEMANTIC_INDEX_PATH'] = os.path.join(workdir, 'project_vectors')
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'unused')
+    # Every virtual user logs in from 127.0.0.1; keep the per-IP login throttle out of the way
+    os.environ.setdefault('LOGIN_IP_BURST', '1000000')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    sys.path.insert(0, ROOT)
+    import app as appmod
+    appmod.init_db()
+    return appmod
+
+
+def create_students(appmod, count):
+    password_hash = appmod.generate_password_hash('hammer123')
+    with appmod.app.app_context():
+        appmod.db.session.add_all([
+            appmod.User(email=f'hammer{i}@test.com', password_hash=password_hash, is_teacher=False)
+            for i in range(count)
+        ])
+        appmod.db.session.commit()
+        return [p.id for p in appmod.Project.query.all()]
+
+
+def login(base_url, email):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    data = urlencode({'email': email, 'password': 'hammer123'}).encode()
+    opener.open(f"{base_url}/login/student", data=data).read()
+    return opener
+
+
+def post(opener, url, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    req = urllib.request.Request(url, data=body, method='POST', headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with opener.open(req) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--attempts', type=int, default=8, help='concurrent requests per student')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        appmod = load_app(workdir)
+        project_ids = create_students(appmod, args.students)
+
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, appmod.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            openers = list(pool.map(lambda i: login(base_url, f'hammer{i}@test.com'), range(args.students)))
+
+            # Each student's attempts are queued back to back so they overlap on the worker threads
+            tasks = []
+            for opener in openers:
+                for _ in range(args.attempts):
+                    project_id = rng.choice(project_ids)
+                    if rng.random() < 0.5:
+                        tasks.append((opener, f"{base_url}/student_interest/{project_id}", None))
+                    else:
+                        tasks.append((opener, f"{base_url}/api/project/interest", {'project_id': project_id}))
+            started = time.perf_counter()
+            results = list(pool.map(lambda task: post(*task), tasks))
+            elapsed = time.perf_counter() - started
+        server.shutdown()
+
+        statuses = Counter(status for status, _ in results)
+        latencies = [latency for _, latency in results]
+        with appmod.app.app_context():
+            rows = Counter(student_id for (student_id,) in appmod.db.session.query(appmod.StudentInterest.student_id))
+            per_project = Counter(project_id for (project_id,) in appmod.db.session.query(appmod.StudentInterest.project_id))
+            counters = dict(appmod.db.session.query(appmod.Project.id, appmod.Project.interest_count))
+        counters_match = all(counters[project_id] == per_project.get(project_id, 0) for project_id in counters)
+
+        print(f"{len(tasks)} requests from {args.threads} threads in {elapsed:.2f}s ({len(tasks) / elapsed:.0f} req/s)")
+        print(f"status codes: {dict(sorted(statuses.items()))}")
+        print(f"latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+        print(f"students with an interest: {len(rows)}, most rows for one student: {max(rows.values(), default=0)}")
+        print(f"project interest counters match the rows: {counters_match}")
+
+        ok = (
+            len(rows) == args.students
+            and max(rows.values(), default=0) == 1
+            and statuses[201] == args.students
+            and statuses[409] == len(tasks) - args.students
+            and counters_match
+        )
+        print('PASS' if ok else 'FAIL')
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
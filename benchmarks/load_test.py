@@ -0,0 +1,420 @@
+"""Offline load test of the chat, interest and dashboard paths against the stub LLM server
+
+Boots the app on a threaded local server with a throwaway SQLite database and points its DeepSeek client at
+stub_llm_server.py, so no API credits are spent. A synthetic catalog and cohort are generated, then
+concurrent virtual users (students and teachers) run a weighted mix of requests for a fixed time.
+
+Reports, per route: requests/s, p50/p95/p99 latency, errors and SQL statements per request; per chat stage
+(from Server-Timing and the stream's done event): p50/p95 milliseconds; per LLM call type: calls and prompt
+token sizes. Several --projects values run one fresh process each.
+
+    python benchmarks/load_test.py --projects 10 1000 10000 --users 32 --seconds 20 --llm-latency 0.3
+    python benchmarks/load_test.py --projects 500 --seconds 10 --json load.json --max-error-rate 0.01
+
+Exits non-zero when the error rate exceeds --max-error-rate, so it can gate a CI job.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_llm_server import StubLLMServer, call_purpose, default_content  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'load123'
+
+# Per field: skills and topic keywords used to generate projects and student messages
+VOCABULARY = {
+    'Artificial Intelligence': (['Python', 'PyTorch', 'TensorFlow', 'NLP', 'Computer Vision', 'Machine Learning'],
+                                ['image classification', 'chatbot', 'recommendation', 'speech recognition']),
+    'Healthcare': (['Python', 'Data Analysis', 'Machine Learning', 'FHIR', 'R'],
+                   ['patient monitoring', 'diagnosis support', 'medical imaging', 'clinical records']),
+    'Blockchain': (['Solidity', 'Ethereum', 'Web3.js', 'JavaScript', 'Smart Contracts'],
+                   ['supply chain tracking', 'voting', 'digital identity', 'token payments']),
+    'IoT': (['C++', 'ESP32', 'MQTT', 'Embedded Systems', 'Raspberry Pi'],
+            ['smart home', 'environment sensors', 'asset tracking', 'energy metering']),
+    'Big Data': (['Spark', 'Hadoop', 'SQL', 'Python', 'Kafka', 'D3.js'],
+                 ['stream processing', 'data warehouse', 'dashboards', 'log analytics']),
+    'Cloud Computing': (['Docker', 'Kubernetes', 'AWS', 'Go', 'Terraform'],
+                        ['autoscaling', 'serverless api', 'cost monitoring', 'multi-region deployment']),
+    'Cybersecurity': (['Python', 'Linux', 'Network Scanning', 'Cryptography', 'Wireshark'],
+                      ['intrusion detection', 'phishing detection', 'vulnerability scanning', 'password auditing'])
+}
+
+MESSAGE_PATTERN = re.compile(r"I know (?P<skills>.+?) and want an? (?P<field>.+?) project about (?P<keyword>.+?)\.?$")
+
+# Default request mix: scenario -> relative weight
+DEFAULT_MIX = 'chat=4,chat_stream=2,interest=2,student_dashboard=1,projects=1'
+TEACHER_MIX = 'teacher_dashboard=3,teacher_interests=1'
+
+
+class CohortStub(StubLLMServer):
+    """Stub whose requirement analysis echoes the synthetic message, so each student gets distinct requirements"""
+
+    def content_for(self, messages):
+        if self.rules or call_purpose(messages) != 'extract':
+            return super().content_for(messages)
+        match = MESSAGE_PATTERN.match(messages[-1]['content'])
+        if match is None:
+            return default_content(messages)
+        return {
+            'fields': [match.group('field')],
+            'keywords': [match.group('keyword')],
+            'features': [],
+            'skills': [s.strip() for s in match.group('skills').split(',')]
+        }
+
+
+def synthetic_projects(count, teacher_ids, rng):
+    fields = list(VOCABULARY)
+    for i in range(count):
+        field = rng.choice(fields)
+        skills, keywords = VOCABULARY[field]
+        keyword = rng.choice(keywords)
+        yield {
+            'name': f"{keyword.title()} {i}",
+            'description': f"Build a {keyword} system for the {field.lower()} domain. "
+                           f"Students will design, implement and evaluate a prototype using {', '.join(rng.sample(skills, 2))}.",
+            'field': field,
+            'skill_requirements': ', '.join(rng.sample(skills, rng.randint(2, 4))),
+            'capacity': rng.randint(1, 3),
+            'teacher_id': teacher_ids[i % len(teacher_ids)]
+        }
+
+
+def student_message(rng):
+    field = rng.choice(list(VOCABULARY))
+    skills, keywords = VOCABULARY[field]
+    return f"I know {', '.join(rng.sample(skills, 2))} and want a {field} project about {rng.choice(keywords)}."
+
+
+def load_app(workdir, stub_url):
+    """Import app.py against a fresh database in `workdir`, with the DeepSeek client pointed at the stub"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ['SEMANTIC_INDEX_PATH'] = os.path.join(workdir, 'project_vectors')
+    os.environ['DEEPSEEK_BASE_URL'] = stub_url
+    os.environ['DEEPSEEK_API_KEY'] = 'stub'
+    # Every virtual user logs in from 127.0.0.1; keep the per-IP login throttle out of the way
+    os.environ.setdefault('LOGIN_IP_BURST', '1000000')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    sys.path.insert(0, ROOT)
+    import app as appmod
+    with appmod.app.app_context():
+        appmod.migrate_database()
+    return appmod
+
+
+def populate(appmod, projects, students, teachers, rng):
+    """Insert the synthetic accounts and catalog; returns (student emails, teacher emails, project ids)"""
+    from skills import backfill_project_skills
+    password_hash = appmod.generate_password_hash(PASSWORD)
+    with appmod.app.app_context():
+        session = appmod.db.session
+        teacher_emails = [f'teacher{i}@load.test' for i in range(teachers)]
+        student_emails = [f'student{i}@load.test' for i in range(students)]
+        teacher_users = [appmod.User(email=email, password_hash=password_hash, is_teacher=True) for email in teacher_emails]
+        student_users = [appmod.User(email=email, password_hash=password_hash, is_teacher=False) for email in student_emails]
+        session.add_all(teacher_users + student_users)
+        session.flush()
+        session.execute(appmod.Project.__table__.insert(), list(synthetic_projects(projects, [t.id for t in teacher_users], rng)))
+        backfill_project_skills(session.connection())
+        appmod.bump_catalog_version()
+        session.commit()
+        project_ids = [project_id for (project_id,) in session.query(appmod.Project.id)]
+    return student_emails, teacher_emails, project_ids
+
+
+class QueryStats:
+    """Counts SQL statements per request by wrapping the WSGI app and listening on the engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counts = defaultdict(list)  # route -> statements per request
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, *args):
+        if getattr(self._local, 'count', None) is not None:
+            self._local.count += 1
+
+    def _finish(self, route):
+        with self._lock:
+            self.counts[route].append(self._local.count)
+        self._local.count = None
+
+    def wrap(self, wsgi_app):
+        from werkzeug.wsgi import ClosingIterator
+
+        def counted(environ, start_response):
+            route = re.sub(r'/\d+', '/<id>', environ.get('PATH_INFO', ''))
+            self._local.count = 0
+            # Streamed bodies query while they are iterated, so the count closes with the response
+            return ClosingIterator(wsgi_app(environ, start_response), [lambda: self._finish(route)])
+        return counted
+
+
+class VirtualUser:
+    def __init__(self, base_url, email, role, project_ids, rng):
+        self.base_url = base_url
+        self.role = role
+        self.project_ids = project_ids
+        self.rng = rng
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        data = urlencode({'email': email, 'password': PASSWORD}).encode()
+        self.opener.open(f"{base_url}/login/{role}", data=data).read()
+
+    def request(self, method, path, payload=None):
+        """(status, seconds, Server-Timing header, body)"""
+        body = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(f"{self.base_url}{path}", data=body, method=method,
+                                     headers={'Content-Type': 'application/json'} if body is not None else {})
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req) as response:
+                content = response.read()
+                return response.status, time.perf_counter() - start, response.headers.get('Server-Timing', ''), content
+        except urllib.error.HTTPError as e:
+            return e.code, time.perf_counter() - start, '', e.read()
+        except (urllib.error.URLError, OSError):
+            return 0, time.perf_counter() - start, '', b''
+
+    def run(self, scenario):
+        """Yield (route label, status, seconds, {stage: ms}) for each request of one scenario"""
+        if scenario == 'chat':
+            status, seconds, timing, _ = self.request('POST', '/api/chat', {'message': student_message(self.rng)})
+            yield 'POST /api/chat', status, seconds, parse_server_timing(timing)
+        elif scenario == 'chat_stream':
+            status, seconds, _, content = self.request('POST', '/api/chat/stream', {'message': student_message(self.rng)})
+            lines = content.decode('utf-8', 'replace').strip().splitlines()
+            done = json.loads(lines[-1]) if status == 200 and lines else {}
+            yield 'POST /api/chat/stream', status, seconds, done.get('timings') or {}
+        elif scenario == 'interest':
+            project_id = self.rng.choice(self.project_ids)
+            status, seconds, _, _ = self.request('POST', f'/student_interest/{project_id}')
+            yield 'POST /student_interest/<id>', status, seconds, {}
+            if status == 201:
+                status, seconds, _, _ = self.request('POST', f'/cancel_interest/{project_id}')
+                yield 'POST /cancel_interest/<id>', status, seconds, {}
+        else:
+            path = {
+                'student_dashboard': '/student/dashboard',
+                'projects': f"/api/projects?limit=50&after={self.rng.choice(self.project_ids)}",
+                'teacher_dashboard': '/teacher/dashboard',
+                'teacher_interests': '/api/teacher/interests'
+            }[scenario]
+            status, seconds, _, _ = self.request('GET', path)
+            yield f"GET {path.split('?')[0]}", status, seconds, {}
+
+
+def parse_server_timing(header):
+    stages = {}
+    for part in header.split(','):
+        name, _, duration = part.strip().partition(';dur=')
+        if name and duration:
+            stages[name] = float(duration)
+    return stages
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+def drive(user, mix, deadline, results, seed):
+    rng = random.Random(seed)
+    scenarios, weights = zip(*mix.items())
+    while time.perf_counter() < deadline:
+        for sample in user.run(rng.choices(scenarios, weights)[0]):
+            results.append(sample)
+
+
+def summarize(results, queries, stub, elapsed, args):
+    routes = defaultdict(list)
+    stages = defaultdict(list)
+    for route, status, seconds, timings in results:
+        routes[route].append((status, seconds))
+        for stage, ms in timings.items():
+            stages[stage].append(ms)
+    summary = {'projects': args.projects[0], 'users': args.users, 'seconds': round(elapsed, 2), 'routes': {}, 'stages': {}, 'llm': {}}
+    for route, samples in sorted(routes.items()):
+        latencies = [seconds for _, seconds in samples]
+        # A 409 from the interest endpoints is the expected answer to a taken seat, not a failure
+        errors = sum(1 for status, _ in samples if status == 0 or status >= 500)
+        counts = queries.counts.get(route.split(' ', 1)[1], [])
+        summary['routes'][route] = {
+            'requests': len(samples),
+            'rps': round(len(samples) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+            'errors': errors,
+            'queries_avg': round(sum(counts) / len(counts), 1) if counts else 0,
+            'queries_max': max(counts, default=0)
+        }
+    for stage, values in sorted(stages.items()):
+        summary['stages'][stage] = {
+            'samples': len(values), 'p50_ms': round(percentile(values, 0.5), 1), 'p95_ms': round(percentile(values, 0.95), 1)
+        }
+    for purpose, tokens in sorted(stub.prompt_tokens.items()):
+        summary['llm'][purpose] = {
+            'calls': len(tokens),
+            'prompt_tokens_avg': round(sum(tokens) / len(tokens)) if tokens else 0,
+            'prompt_tokens_p95': percentile(tokens, 0.95)
+        }
+    total = sum(r['requests'] for r in summary['routes'].values())
+    summary['error_rate'] = round(sum(r['errors'] for r in summary['routes'].values()) / total, 4) if total else 0.0
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n== {summary['projects']} projects, {summary['users']} users, {summary['seconds']}s "
+          f"(error rate {summary['error_rate']:.2%}) ==")
+    print(f"{'route':<32} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'sql avg':>7} {'sql max':>7}")
+    for route, r in summary['routes'].items():
+        print(f"{route:<32} {r['requests']:>6} {r['rps']:>7.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}"
+              f" {r['errors']:>6} {r['queries_avg']:>7.1f} {r['queries_max']:>7}")
+    print(f"\n{'stage':<32} {'samples':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for stage, s in summary['stages'].items():
+        print(f"{stage:<32} {s['samples']:>7} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f}")
+    print(f"\n{'llm call':<32} {'calls':>7} {'prompt avg':>10} {'prompt p95':>10}")
+    for purpose, c in summary['llm'].items():
+        print(f"{purpose:<32} {c['calls']:>7} {c['prompt_tokens_avg']:>10} {c['prompt_tokens_p95']:>10}")
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    stub = CohortStub(('127.0.0.1', 0), latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.llm_error_rate)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        appmod = load_app(workdir, stub.url)
+        students, teachers, project_ids = populate(appmod, args.projects[0], args.students, args.teachers, rng)
+        with appmod.app.app_context():
+            queries = QueryStats(appmod.db.engine)
+        appmod.app.wsgi_app = queries.wrap(appmod.app.wsgi_app)
+
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, appmod.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        # One logged-in account per virtual user; the rest of the cohort only adds rows
+        teacher_count = min(args.teacher_users, args.users - 1, len(teachers))
+        groups = [
+            (VirtualUser(base_url, teachers[i], 'teacher', project_ids, random.Random(rng.random())), parse_mix(args.teacher_mix))
+            for i in range(teacher_count)
+        ] + [
+            (VirtualUser(base_url, students[i % len(students)], 'student', project_ids, random.Random(rng.random())), parse_mix(args.mix))
+            for i in range(args.users - teacher_count)
+        ]
+        # Warm-up: builds the local indexes and skill bitsets so the first measured request is not an outlier
+        list(groups[-1][0].run('chat'))
+        for counts in queries.counts.values():
+            counts.clear()
+        stub.prompt_tokens.clear()
+
+        results = []
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        threads = [
+            threading.Thread(target=drive, args=(user, mix, deadline, results, args.seed + i))
+            for i, (user, mix) in enumerate(groups)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+    stub.shutdown()
+    return summarize(results, queries, stub, elapsed, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, nargs='+', default=[500], help='catalog sizes, one run each')
+    parser.add_argument('--students', type=int, default=200, help='student accounts in the cohort')
+    parser.add_argument('--teachers', type=int, default=10, help='teacher accounts owning the catalog')
+    parser.add_argument('--users', type=int, default=16, help='concurrent virtual users')
+    parser.add_argument('--teacher-users', type=int, default=2, help='how many of the virtual users are teachers')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'student scenario weights (default {DEFAULT_MIX})')
+    parser.add_argument('--teacher-mix', default=TEACHER_MIX, help=f'teacher scenario weights (default {TEACHER_MIX})')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='stub seconds per LLM call')
+    parser.add_argument('--llm-jitter', type=float, default=0.05)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='write the summaries to this file')
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help='exit 1 when a run exceeds this error rate')
+    args = parser.parse_args()
+
+    if len(args.projects) > 1:
+        # The app binds its database at import time, so each catalog size runs in a fresh process
+        summaries = []
+        for size in args.projects:
+            with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+                path = f.name
+            command = [sys.executable, os.path.abspath(__file__)] + strip_option(sys.argv[1:], '--projects', '--json') + [
+                '--projects', str(size), '--json', path
+            ]
+            subprocess.run(command, check=False)
+            with open(path, encoding='utf-8') as f:
+                content = f.read()
+            os.remove(path)
+            if not content:
+                print(f"FAIL: the run with {size} projects crashed")
+                sys.exit(1)
+            summaries.extend(json.loads(content))
+    else:
+        summaries = [run(args)]
+        print_summary(summaries[0])
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, indent=2)
+    failed = [s for s in summaries if s['error_rate'] > args.max_error_rate]
+    if failed:
+        print(f"FAIL: error rate above {args.max_error_rate:.2%} for {[s['projects'] for s in failed]} projects")
+    sys.exit(1 if failed else 0)
+
+
+def strip_option(argv, *names):
+    """argv without the given options and their values"""
+    result, skipping = [], False
+    for arg in argv:
+        if arg.startswith('--'):
+            skipping = arg.split('=')[0] in names
+            if skipping and '=' in arg:
+                skipping = False
+                continue
+        if not skipping:
+            result.append(arg)
+    return result
+
+
+if __name__ == '__main__':
+    main()
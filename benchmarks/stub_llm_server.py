@@ -0,0 +1,178 @@
+"""OpenAI-compatible stub of /v1/chat/completions that replays canned JSON responses
+
+Point the app at it to exercise the LLM client, retries and circuit breaker without spending credits:
+
+    python benchmarks/stub_llm_server.py --port 8001 --latency 0.5 --error-rate 0.1
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8001/v1 DEEPSEEK_API_KEY=stub python app.py
+
+Canned responses are read from a JSONL file of {"match": "<text in system prompt>", "content": {...}} rules.
+Without a matching rule, requirement analysis gets a fixed answer and ranking calls get every project id
+found in the prompt scored in descending order.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REQUIREMENTS = {
+    'fields': ['Artificial Intelligence'],
+    'keywords': ['machine learning'],
+    'features': [],
+    'skills': ['Python']
+}
+
+
+def load_rules(path):
+    rules = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                rules.append(json.loads(line))
+    return rules
+
+
+def call_purpose(messages):
+    """'extract' for requirement analysis prompts, 'rank' for everything else"""
+    system = messages[0]['content'] if messages else ''
+    return 'extract' if 'Requirements Analysis' in system else 'rank'
+
+
+def default_content(messages):
+    if call_purpose(messages) == 'extract':
+        return DEFAULT_REQUIREMENTS
+    user = messages[-1]['content'] if messages else ''
+    ids = list(dict.fromkeys(int(i) for i in re.findall(r'"id":\s*(\d+)', user)))
+    return {
+        'ranked_projects': [
+            {'id': project_id, 'score': max(10 - rank, 0), 'reasoning': 'stub ranking'}
+            for rank, project_id in enumerate(ids)
+        ]
+    }
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, rules=None, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, chunk_size=16):
+        super().__init__(address, StubHandler)
+        self.rules = rules or []
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.chunk_size = chunk_size
+        self.request_count = 0
+        self.prompt_chars = 0
+        self.prompt_tokens = defaultdict(list)  # call purpose -> prompt tokens of each request
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def content_for(self, messages):
+        system = messages[0]['content'] if messages else ''
+        for rule in self.rules:
+            if rule.get('match', '') in system:
+                return rule['content']
+        return default_content(messages)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        server = self.server
+        messages = request.get('messages', [])
+        prompt_chars = sum(len(m.get('content', '')) for m in messages)
+        with server._lock:
+            server.request_count += 1
+            server.prompt_chars += prompt_chars
+            server.prompt_tokens[call_purpose(messages)].append(prompt_chars // 4)
+
+        time.sleep(max(server.latency + random.uniform(-server.jitter, server.jitter), 0))
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json(server.error_status, {'error': {'message': 'stub failure', 'type': 'server_error'}})
+            return
+
+        content = server.content_for(messages)
+        text = content if isinstance(content, str) else json.dumps(content)
+        usage = {
+            'prompt_tokens': prompt_chars // 4,
+            'completion_tokens': len(text) // 4,
+            'total_tokens': (prompt_chars + len(text)) // 4
+        }
+        base = {'id': f"stub-{server.request_count}", 'created': int(time.time()), 'model': request.get('model', 'stub')}
+        if not request.get('stream'):
+            self._send_json(200, dict(base, object='chat.completion', usage=usage, choices=[
+                {'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}
+            ]))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for i in range(0, len(text), server.chunk_size):
+            chunk = dict(base, object='chat.completion.chunk', choices=[
+                {'index': 0, 'delta': {'content': text[i:i + server.chunk_size]}, 'finish_reason': None}
+            ])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        final = dict(base, object='chat.completion.chunk', choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """Start a stub server on a background thread and return it; `server.url` is the API base URL"""
+    server = StubLLMServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='stub-llm-server', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--responses', help='JSONL file of {"match": ..., "content": ...} rules')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random +/- seconds around --latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of failed requests (e.g. 429)')
+    args = parser.parse_args()
+
+    server = StubLLMServer(
+        (args.host, args.port),
+        rules=load_rules(args.responses) if args.responses else None,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status
+    )
+    print(f"Stub LLM server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
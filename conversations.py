@@ -0,0 +1,143 @@
+"""Per-conversation chat state, so follow-up messages refine the previous results instead of starting over"""
+import re
+import time
+import uuid
+
+from caching import TTLCache
+from matching import STOPWORDS, tokenize
+
+# Words that open a follow-up refining the previous results ("without blockchain", "only Python")
+EXCLUDE_CUES = {'not', 'without', 'except', 'exclude', 'excluding', 'avoid', 'remove', 'drop', "don't", 'dont'}
+FILTER_CUES = {'only', 'just', 'must', 'exclusively', 'require', 'requires', 'required', 'keep'}
+EXTEND_CUES = {'also', 'plus', 'additionally', 'prefer', 'preferably', 'ideally', 'more', 'and', 'with'}
+# Phrases that mark a refinement anywhere in the message. Single words such as 'no', 'one', 'of' or 'any'
+# are too common in new queries ("no experience, want AI") to count on their own.
+EXCLUDE_PHRASES = ('but not', 'but no', 'none of', 'other than', 'anything but', 'no more', 'leave out',
+                   "don't want", 'dont want', 'do not want', "don't like")
+FILTER_PHRASES = ('the ones', 'ones with', 'ones using', 'ones that', 'those with', 'those using', 'those that',
+                  'these with', 'which ones', 'which of', 'any of', 'any with', 'any using', 'of those', 'of these',
+                  'of them', 'only the', 'just the', 'must have', 'must use', 'has to', 'have to')
+EXTEND_PHRASES = ('as well', 'in addition', 'i prefer', "i'd prefer", 'would prefer')
+# Words pointing back at the previous results; never search terms
+REFERENCE_WORDS = {'ones', 'one', 'them', 'those', 'these', 'which', 'any', 'of'}
+# Filler that is neither a cue nor a search term
+FILLER_WORDS = {'show', 'me', 'please', 'can', 'you', 'give', 'list', 'need', 'needs', 'involving', 'involve',
+                'related', 'about', 'something', 'but', 'same', 'results', 'than', 'have', 'has', 'do', 'does'}
+# Skipped before the leading cue word ("ok, only Python")
+LEADING_FILLER = {'ok', 'okay', 'please', 'now', 'then', 'so', 'but', 'hmm'}
+
+# Follow-ups longer than this are treated as a new search
+MAX_REFINEMENT_WORDS = 12
+# Conversation ids are uuid4 hex; anything longer (or not a string) starts a new conversation
+MAX_CONVERSATION_ID_LENGTH = 64
+
+_WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.']*")
+
+
+def classify_refinement(message):
+    """'exclude', 'filter' or 'extend' for a short follow-up message, None for a new search
+
+    A cue counts when it is the message's first word (after filler such as "ok") or part of one of the
+    multi-word phrases above.
+    """
+    words = [w.rstrip('.') for w in _WORD_PATTERN.findall((message or '').lower())]
+    if not words or len(words) > MAX_REFINEMENT_WORDS:
+        return None
+    leading = next((w for w in words if w not in LEADING_FILLER), words[0])
+    text = f" {' '.join(words)} "
+
+    def has_phrase(phrases):
+        return any(f' {phrase} ' in text for phrase in phrases)
+
+    if leading in EXCLUDE_CUES or has_phrase(EXCLUDE_PHRASES):
+        return 'exclude'
+    if leading in FILTER_CUES or has_phrase(FILTER_PHRASES):
+        return 'filter'
+    if leading in EXTEND_CUES or has_phrase(EXTEND_PHRASES):
+        return 'extend'
+    return None
+
+
+def _cue_tokens():
+    words = EXCLUDE_CUES | FILTER_CUES | EXTEND_CUES | REFERENCE_WORDS | FILLER_WORDS | LEADING_FILLER
+    phrases = EXCLUDE_PHRASES + FILTER_PHRASES + EXTEND_PHRASES
+    # tokenize() splits "don't" and "i'd" at the apostrophe
+    return STOPWORDS | words | {token for text in (*words, *phrases) for token in tokenize(text)}
+
+
+_CUE_TOKENS = _cue_tokens()
+
+
+def refinement_terms(message):
+    """Search terms of a follow-up message, without its cue and filler words"""
+    return [t for t in dict.fromkeys(tokenize(message)) if t not in _CUE_TOKENS]
+
+
+def merge_requirements(previous, delta):
+    """Union of two analyze_user_requirements() results, keeping the earlier entries first"""
+    merged = {}
+    for key in ('fields', 'keywords', 'features', 'skills'):
+        values = list((previous or {}).get(key) or []) + list((delta or {}).get(key) or [])
+        seen = set()
+        merged[key] = [v for v in values if isinstance(v, str) and not (v.lower() in seen or seen.add(v.lower()))]
+    return merged
+
+
+class Conversation:
+    """Requirements and ranked candidates ({id, score, reasoning}, best first) of a student's chat"""
+
+    __slots__ = ('id', 'user_id', 'requirements', 'items', 'catalog_version', 'turns', 'updated_at')
+
+    def __init__(self, id, user_id, requirements, items, catalog_version, turns=1):
+        self.id = id
+        self.user_id = user_id
+        self.requirements = requirements
+        self.items = items
+        self.catalog_version = catalog_version
+        self.turns = turns
+        self.updated_at = time.time()
+
+
+class ConversationStore:
+    """Bounded in-process store of recent conversations with LRU and TTL eviction
+
+    Each worker process has its own store; a follow-up that reaches a different worker (or arrives after
+    eviction) is simply answered as a new search.
+    """
+
+    def __init__(self, maxsize=1000, ttl=1800, max_items=50):
+        self.max_items = max_items
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, conversation_id, user_id):
+        """The user's conversation, or None for an unknown, expired or malformed (client-supplied) id"""
+        if not isinstance(conversation_id, str) or not conversation_id or len(conversation_id) > MAX_CONVERSATION_ID_LENGTH:
+            return None
+        conversation = self._cache.get(conversation_id)
+        if conversation is None or conversation.user_id != user_id:
+            return None
+        return conversation
+
+    def save(self, user_id, requirements, items, catalog_version, previous=None):
+        """Store the latest state, continuing `previous` when given, and return the conversation"""
+        kept, seen = [], set()
+        for item in items:
+            if item['id'] not in seen and len(kept) < self.max_items:
+                seen.add(item['id'])
+                kept.append({'id': item['id'], 'score': item.get('score', 0), 'reasoning': item.get('reasoning', '')})
+        conversation = Conversation(
+            previous.id if previous else uuid.uuid4().hex,
+            user_id,
+            requirements,
+            kept,
+            catalog_version,
+            previous.turns + 1 if previous else 1
+        )
+        self._cache.set(conversation.id, conversation)
+        return conversation
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,73 @@
+"""SQLAlchemy engine settings: SQLite pragmas applied on connect and pool options for server databases"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Pragmas that may be set from the environment, with their defaults. WAL lets readers proceed while a
+# writer commits, and NORMAL synchronous is durable in WAL mode except for the last commits on power loss.
+SQLITE_PRAGMA_DEFAULTS = (
+    ('journal_mode', 'SQLITE_JOURNAL_MODE', 'WAL'),
+    ('synchronous', 'SQLITE_SYNCHRONOUS', 'NORMAL'),
+    ('busy_timeout', 'SQLITE_BUSY_TIMEOUT', '5000'),  # milliseconds a writer waits for the lock
+    ('cache_size', 'SQLITE_CACHE_SIZE', '-16000'),  # negative = KiB, i.e. about 16 MB of page cache
+)
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def sqlite_pragmas(env=None):
+    """{pragma: value} from SQLITE_* environment variables; an empty variable leaves that pragma unset"""
+    env = os.environ if env is None else env
+    pragmas = {}
+    for name, variable, default in SQLITE_PRAGMA_DEFAULTS:
+        value = env.get(variable, default).strip()
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def engine_options(url, env=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`; pool settings only apply to server databases such as Postgres"""
+    env = os.environ if env is None else env
+    if is_sqlite(url):
+        return {}
+    return {
+        'pool_size': int(env.get('DB_POOL_SIZE', '5')),
+        'max_overflow': int(env.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(env.get('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(env.get('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': env.get('DB_POOL_PRE_PING', '1') == '1'
+    }
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run `PRAGMA name=value` on every new connection of a SQLite engine; other backends are left alone"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    in_memory = engine.url.database in (None, '', ':memory:')
+    statements = [
+        f"PRAGMA {name}={value}" for name, value in pragmas.items()
+        if not (in_memory and name == 'journal_mode')
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def pool_stats(engine):
+    """Connections checked out of / idle in the engine's pool, for pools that report them"""
+    pool = engine.pool
+    stats = {}
+    for name, attribute in (('checked_out', 'checkedout'), ('idle', 'checkedin')):
+        if hasattr(pool, attribute):
+            stats[name] = getattr(pool, attribute)()
+    return stats
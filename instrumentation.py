@@ -0,0 +1,169 @@
+"""Request-scoped tracing, leveled logging helpers and an in-process metrics registry"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Request id of the request being handled; copied into worker threads via contextvars.copy_context()
+request_id_var = contextvars.ContextVar('request_id', default='-')
+# Spans of the current request: list of (name, duration_ms)
+spans_var = contextvars.ContextVar('spans', default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds %(request_id)s to every log record"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def configure_logging(level='INFO'):
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'))
+    handler.addFilter(RequestIdFilter())
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+class lazy_json:
+    """Defers json.dumps until a log record is actually formatted"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return json.dumps(self.value, ensure_ascii=False, default=str)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + (extra or [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{str(value)}"' for name, value in items) + '}'
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by name and labels, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def register_collector(self, collector):
+        """collector() returns [(name, labels_dict, value)] gauge samples read at scrape time"""
+        self._collectors.append(collector)
+
+    def counter_value(self, name, **labels):
+        return self._counters.get((name, _label_key(labels)), 0)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, key), value in counters:
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(key)} {value}")
+        for (name, key), histogram in histograms:
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(key)} {histogram.total}")
+            lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                header(name, 'gauge')
+                lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+def start_request_trace(request_id):
+    """Begin collecting spans for a new request on the current context"""
+    request_id_var.set(request_id)
+    spans_var.set([])
+
+
+def current_spans():
+    return spans_var.get() or []
+
+
+@contextmanager
+def span(name, histogram='stage_duration_seconds'):
+    """Time a block, record it on the current request's trace and in a latency histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        spans = spans_var.get()
+        if spans is not None:
+            spans.append((name, duration * 1000))
+        metrics.observe(histogram, duration, stage=name)
+
+
+def record_token_usage(usage, call):
+    """Count prompt/completion tokens reported by an API response's usage block"""
+    if usage is None:
+        return
+    metrics.inc('llm_tokens_total', getattr(usage, 'prompt_tokens', 0) or 0, call=call, kind='prompt')
+    metrics.inc('llm_tokens_total', getattr(usage, 'completion_tokens', 0) or 0, call=call, kind='completion')
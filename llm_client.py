@@ -0,0 +1,187 @@
+"""Resilient wrapper around the OpenAI-compatible DeepSeek client"""
+import random
+import threading
+import time
+
+import httpx
+from openai import APIConnectionError, APIStatusError, OpenAI
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+
+class LLMBusyError(Exception):
+    """Raised when no concurrency slot frees up before the call's deadline"""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets one trial call through after `reset_timeout`"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def cancel_trial(self):
+        """Release a half-open trial slot that was reserved but never used"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def _is_retryable(error):
+    if isinstance(error, APIConnectionError):  # includes APITimeoutError
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMClient:
+    """Chat completions with a pooled transport, deadlines, jittered retries, a concurrency cap and a circuit breaker"""
+
+    def __init__(self, api_key, base_url, timeout=20.0, deadline=45.0, max_retries=2, backoff=0.5,
+                 max_concurrency=8, max_connections=20, breaker=None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._api_key = api_key
+        self._base_url = base_url
+        self._max_connections = max_connections
+        self._http = None
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """OpenAI client and connection pool, created on first use so importing the app does no network setup"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._http = httpx.Client(
+                        limits=httpx.Limits(max_connections=self._max_connections, max_keepalive_connections=self._max_connections),
+                        timeout=self.timeout
+                    )
+                    # Retries are handled here so they share the deadline and feed the circuit breaker
+                    self._client = OpenAI(api_key=self._api_key, base_url=self._base_url, http_client=self._http,
+                                          max_retries=0, timeout=self.timeout)
+        return self._client
+
+    def close(self):
+        if self._http is not None:
+            self._http.close()
+
+    def _acquire(self, expires_at):
+        if not self.breaker.allow():
+            raise CircuitOpenError('LLM circuit breaker is open')
+        if not self._semaphore.acquire(timeout=max(expires_at - time.monotonic(), 0)):
+            # The breaker may have reserved its half-open trial for this call
+            self.breaker.cancel_trial()
+            raise LLMBusyError('Timed out waiting for an LLM concurrency slot')
+
+    def _call(self, expires_at, kwargs):
+        """Create a completion, retrying retryable errors until the deadline; the semaphore must be held"""
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic()
+            try:
+                return self.client.chat.completions.create(timeout=max(min(self.timeout, remaining), 0.1), **kwargs)
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                delay = _retry_after(e) or random.uniform(0, self.backoff * (2 ** attempt))
+                if attempt >= self.max_retries or time.monotonic() + delay >= expires_at:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+    def create(self, deadline=None, **kwargs):
+        """chat.completions.create with retries and a total deadline in seconds"""
+        expires_at = time.monotonic() + (deadline or self.deadline)
+        self._acquire(expires_at)
+        try:
+            response = self._call(expires_at, kwargs)
+        except Exception as e:
+            if _is_retryable(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()  # the API answered; the request itself was bad
+            raise
+        finally:
+            self._semaphore.release()
+        self.breaker.record_success()
+        return response
+
+    def stream(self, deadline=None, **kwargs):
+        """Yield streamed chunks; the concurrency slot is held until the stream is exhausted or closed"""
+        expires_at = time.monotonic() + (deadline or self.deadline)
+        self._acquire(expires_at)
+        response = None
+        try:
+            response = self._call(expires_at, dict(kwargs, stream=True))
+            for chunk in response:
+                yield chunk
+        except GeneratorExit:
+            # The consumer stopped early; the API itself was responding
+            self.breaker.record_success()
+            raise
+        except Exception as e:
+            if _is_retryable(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            if response is not None:
+                response.close()
+            self._semaphore.release()
@@ -0,0 +1,544 @@
+"""Local project retrieval and rubric scoring used alongside LLM ranking"""
+import json
+import math
+import re
+import threading
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - listed in requirements.txt; score_many() then loops over projects
+    np = None
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'based', 'by', 'for', 'from', 'i', 'in', 'including',
+    'into', 'is', 'it', 'its', 'of', 'on', 'or', 'project', 'projects', 'that', 'the', 'to', 'use',
+    'uses', 'using', 'want', 'will', 'with'
+}
+
+# Available project fields
+AVAILABLE_FIELDS = ['Healthcare', 'Blockchain', 'Artificial Intelligence', 'IoT', 'Big Data', 'Cloud Computing', 'Cybersecurity']
+
+# Fields that earn partial credit for each other in the ranking rubric (made symmetric below)
+RELATED_FIELDS = {
+    'Healthcare': ['Artificial Intelligence', 'Big Data', 'IoT'],
+    'Blockchain': ['Cybersecurity', 'Cloud Computing'],
+    'Artificial Intelligence': ['Big Data', 'Healthcare'],
+    'IoT': ['Cloud Computing', 'Cybersecurity', 'Big Data', 'Healthcare'],
+    'Big Data': ['Artificial Intelligence', 'Cloud Computing', 'Healthcare', 'IoT'],
+    'Cloud Computing': ['Big Data', 'IoT', 'Blockchain', 'Cybersecurity'],
+    'Cybersecurity': ['Blockchain', 'Cloud Computing', 'IoT']
+}
+
+# Common spellings mapped to one canonical skill name
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'python3': 'python',
+    'ml': 'machine learning',
+    'dl': 'deep learning',
+    'ai': 'artificial intelligence',
+    'cv': 'computer vision',
+    'natural language processing': 'nlp',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'golang': 'go',
+    'k8s': 'kubernetes',
+    'postgres': 'postgresql',
+    'cpp': 'c++',
+    'web3': 'web3.js',
+    'smart contract': 'smart contracts',
+    'data visualisation': 'data visualization'
+}
+
+# Weight of each project attribute when computing term frequencies (BM25F-style)
+FIELD_WEIGHTS = {
+    'field': 3.0,
+    'skills': 2.0,
+    'name': 2.0,
+    'description': 1.0
+}
+
+
+def tokenize(text):
+    """Split text into lowercase search tokens, keeping names like c++ or node.js intact"""
+    if not text:
+        return []
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        token = token.rstrip('.')
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def normalize_field(field):
+    return ' '.join((field or '').lower().split())
+
+
+def _related_field_table():
+    table = {}
+    for field, related in RELATED_FIELDS.items():
+        for other in related:
+            table.setdefault(normalize_field(field), set()).add(normalize_field(other))
+            table.setdefault(normalize_field(other), set()).add(normalize_field(field))
+    return table
+
+
+RELATED_FIELD_TABLE = _related_field_table()
+
+
+def normalize_skill(skill):
+    """Canonical lowercase form of a single skill name"""
+    skill = ' '.join((skill or '').lower().strip(' .').split())
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def parse_skills(text):
+    """Split a free-text skill_requirements value into a set of canonical skills"""
+    if not text:
+        return set()
+    parts = re.split(r'[,;/|\n]|\band\b', text, flags=re.IGNORECASE)
+    return {normalize_skill(part) for part in parts if part.strip(' .')}
+
+
+def requirement_terms(requirements):
+    """Collect query tokens from the fields, keywords, features and skills of a requirements dict"""
+    if not isinstance(requirements, dict):
+        return []
+    terms = []
+    for key in ('fields', 'keywords', 'skills', 'features'):
+        for value in requirements.get(key) or []:
+            if isinstance(value, str):
+                terms.extend(tokenize(value))
+    return terms
+
+
+class ProjectIndex:
+    """In-memory inverted index over project field, skills, name and description with BM25 scoring"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # term -> {project_id: weighted term frequency}
+        self._doc_terms = {}  # project_id -> {term: weighted term frequency}
+        self._doc_lengths = {}
+        self._total_length = 0.0
+        self.built = False
+        self.version = None  # catalog version the index reflects
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _document_terms(self, project):
+        weighted = defaultdict(float)
+        sources = {
+            'field': project.field,
+            'skills': project.skill_requirements,
+            'name': project.name,
+            'description': project.description
+        }
+        for source, text in sources.items():
+            for token in tokenize(text):
+                weighted[token] += FIELD_WEIGHTS[source]
+        return weighted
+
+    def build(self, projects, version=None):
+        """Rebuild the whole index from a list of projects"""
+        with self._lock:
+            self.version = version
+            self._postings = defaultdict(dict)
+            self._doc_terms = {}
+            self._doc_lengths = {}
+            self._total_length = 0.0
+            for project in projects:
+                self._add(project)
+            self.built = True
+
+    def update(self, project):
+        """Insert or replace a single project"""
+        with self._lock:
+            self._remove(project.id)
+            self._add(project)
+
+    def remove(self, project_id):
+        with self._lock:
+            self._remove(project_id)
+
+    def _add(self, project):
+        terms = self._document_terms(project)
+        for term, weight in terms.items():
+            self._postings[term][project.id] = weight
+        length = sum(terms.values())
+        self._doc_terms[project.id] = terms
+        self._doc_lengths[project.id] = length
+        self._total_length += length
+
+    def _remove(self, project_id):
+        terms = self._doc_terms.pop(project_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(project_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(project_id, 0.0)
+
+    def search_terms(self, terms, limit=None):
+        """Score projects against query tokens, returning [(project_id, score)] best first"""
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count or not terms:
+                return []
+            avg_length = self._total_length / doc_count or 1.0
+            scores = defaultdict(float)
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for project_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[project_id] / avg_length)
+                    scores[project_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def search(self, requirements, limit=None):
+        """Score projects against an analyze_user_requirements() result"""
+        return self.search_terms(requirement_terms(requirements), limit)
+
+
+def fuse_rankings(rankings, k=60):
+    """Reciprocal rank fusion of several [(project_id, score)] lists into one ordered id list"""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, (project_id, _) in enumerate(ranking):
+            fused[project_id] += 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda project_id: (-fused[project_id], project_id))
+
+
+def shortlist_projects(index, requirements, projects, limit, extra_rankings=(), scorer=None):
+    """Pick at most `limit` projects for LLM ranking, best lexical matches first
+
+    `extra_rankings` are optional further [(project_id, score)] rankings, e.g. lexical and semantic
+    matches on the raw message, fused with the requirement-based ranking. When nothing matches, the
+    shortlist is the best projects under `scorer` (a LocalScorer, e.g. related fields), else the lowest ids.
+    """
+    if len(projects) <= limit:
+        return projects
+    by_id = {p.id: p for p in projects}
+    rankings = [index.search(requirements)]
+    rankings.extend(ranking for ranking in extra_rankings if ranking)
+    shortlist = [by_id[project_id] for project_id in fuse_rankings(rankings) if project_id in by_id]
+    shortlist = shortlist[:limit]
+    if not shortlist:
+        # Nothing matched lexically; keep the prompt bounded and independent of the database's row order
+        if scorer is not None:
+            return [by_id[item['id']] for item in scorer.score(requirements, projects)[:limit]]
+        return sorted(projects, key=lambda p: p.id)[:limit]
+    return shortlist
+
+
+def estimate_tokens(text):
+    """Rough local token estimate (about 4 characters per token, CJK characters count as one each)"""
+    if not text:
+        return 0
+    wide = sum(1 for char in text if ord(char) > 0x2E80)
+    return (len(text) - wide + 3) // 4 + wide
+
+
+def dedupe_skills(text):
+    """Comma-separated skill list with case-insensitive duplicates removed, original order kept"""
+    seen = set()
+    skills = []
+    for part in re.split(r'[,;/|\n]', text or ''):
+        part = part.strip(' .')
+        if part and normalize_skill(part) not in seen:
+            seen.add(normalize_skill(part))
+            skills.append(part)
+    return ', '.join(skills)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text at a word boundary so it fits roughly within max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ''
+    cut = text[:max_tokens * 4]
+    while cut and estimate_tokens(cut) > max_tokens:
+        cut = cut[:-max(len(cut) // 10, 1)]
+    if ' ' in cut:
+        cut = cut.rsplit(' ', 1)[0]
+    return cut.rstrip(' ,.;') + '...'
+
+
+def compact_project(project, max_tokens):
+    """Prompt representation of a project that fits within max_tokens (description truncated last)"""
+    compact = {
+        'id': project.id,
+        'name': project.name,
+        'field': project.field,
+        'skill_requirements': dedupe_skills(project.skill_requirements),
+        'description': ''
+    }
+    overhead = estimate_tokens(json.dumps(compact, ensure_ascii=False))
+    compact['description'] = truncate_to_tokens(project.description or '', max_tokens - overhead)
+    return compact
+
+
+def pack_chunks(items, max_tokens, max_items):
+    """Greedily split prompt items into chunks of at most max_tokens estimated tokens and max_items entries"""
+    chunks = []
+    current = []
+    used = 0
+    for item in items:
+        size = estimate_tokens(json.dumps(item, ensure_ascii=False))
+        if current and (used + size > max_tokens or len(current) >= max_items):
+            chunks.append(current)
+            current = []
+            used = 0
+        current.append(item)
+        used += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# Minimum rubric score for a project to be recommended (shared with LLM ranking)
+SCORE_THRESHOLD = 3
+
+
+class _ProjectFeatures:
+    __slots__ = ('fingerprint', 'field', 'text', 'tokens', 'skills')
+
+    def __init__(self, project):
+        self.fingerprint = (project.name, project.description, project.field, project.skill_requirements)
+        self.field = normalize_field(project.field)
+        # Space-padded token string: ' phrase ' in text only matches whole tokens ('ai' not in 'blockchain')
+        self.text = f" {' '.join(tokenize(' '.join(filter(None, self.fingerprint))))} "
+        self.tokens = set(self.text.split())
+        self.skills = parse_skills(project.skill_requirements)
+
+
+class _CatalogArrays:
+    """Column view of a project list for scoring many requirement sets at once
+
+    Postings map each token and canonical skill to the rows (positions in the list) containing it, so a
+    requirement set costs a few NumPy operations per term instead of a Python call per project.
+    """
+
+    __slots__ = ('features', 'ids', 'fields', 'field_codes', 'skill_counts', 'tokens', 'skills')
+
+    def __init__(self, projects, features):
+        self.features = features
+        self.ids = np.array([project.id for project in projects])
+        self.fields = {}
+        self.field_codes = np.array([self.fields.setdefault(pf.field, len(self.fields)) for pf in features], dtype=np.intp)
+        self.skill_counts = np.array([len(pf.skills) for pf in features], dtype=np.intp)
+        tokens, skills = defaultdict(list), defaultdict(list)
+        for row, pf in enumerate(features):
+            for token in pf.tokens:
+                tokens[token].append(row)
+            for skill in pf.skills:
+                skills[skill].append(row)
+        self.tokens = {token: np.array(rows, dtype=np.intp) for token, rows in tokens.items()}
+        self.skills = {skill: np.array(rows, dtype=np.intp) for skill, rows in skills.items()}
+
+    def describes(self, features):
+        """Whether these arrays were built from exactly these (unchanged) project features"""
+        return len(features) == len(self.features) and all(a is b for a, b in zip(features, self.features))
+
+    def count(self, postings, terms):
+        """How many of `terms` each row contains"""
+        counts = np.zeros(len(self.features), dtype=np.intp)
+        for term in terms:
+            rows = postings.get(term)
+            if rows is not None:
+                counts[rows] += 1
+        return counts
+
+
+class LocalScorer:
+    """Deterministic implementation of the rank_projects 10-point rubric
+
+    Field 0-4, keywords 0-2, features 0-2, skills 0-2. Per-project features are computed once and
+    reused until the project's text changes. score() returns every project with its reasoning, so it is
+    a Python loop over the catalog. score_many() with a `limit` (batch matching, warm starts) ranks
+    with NumPy instead and only formats the reasoning of the items it returns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._features = {}
+        self._arrays = None  # _CatalogArrays of the last project list score_many() ranked with NumPy
+
+    def _project_features(self, project):
+        features = self._features.get(project.id)
+        fingerprint = (project.name, project.description, project.field, project.skill_requirements)
+        if features is None or features.fingerprint != fingerprint:
+            features = _ProjectFeatures(project)
+            with self._lock:
+                self._features[project.id] = features
+        return features
+
+    def forget(self, project_id):
+        with self._lock:
+            self._features.pop(project_id, None)
+
+    def mentions(self, project, term):
+        """Whether a search token or skill name appears in the project's skills or text"""
+        pf = self._project_features(project)
+        return normalize_skill(term) in pf.skills or term in pf.tokens
+
+    def score(self, requirements, projects):
+        """Score every project, returning [{id, score, reasoning}] sorted best first"""
+        return self.score_many([requirements], projects)[0]
+
+    def score_many(self, requirement_sets, projects, limit=None):
+        """Score several requirement sets in one pass over the catalog, one sorted result list per set
+
+        With `limit`, each list is cut to its best `limit` items.
+        """
+        parsed = [self._parse_requirements(requirements) for requirements in requirement_sets]
+        if limit is not None and np is not None and 0 < limit < len(projects):
+            return self._score_arrays(parsed, projects, limit)
+        results = [[] for _ in parsed]
+        for project in projects:
+            pf = self._project_features(project)
+            for result, query in zip(results, parsed):
+                result.append(self._score_project(project, pf, query))
+        for result in results:
+            result.sort(key=lambda item: (-item['score'], item['id']))
+        return [result[:limit] for result in results] if limit is not None else results
+
+    def _score_arrays(self, parsed, projects, limit):
+        """score_many() with NumPy: rubric totals for every project, reasoning for the best `limit` only"""
+        features = [self._project_features(project) for project in projects]
+        arrays = self._arrays
+        if arrays is None or not arrays.describes(features):
+            arrays = self._arrays = _CatalogArrays(projects, features)
+        results = []
+        for query in parsed:
+            totals = self._total_scores(arrays, query)
+            rows = np.lexsort((arrays.ids, -totals))[:limit]
+            results.append([self._score_project(projects[row], features[row], query) for row in rows])
+        return results
+
+    @staticmethod
+    def _total_scores(arrays, query):
+        """Rubric totals of every row, the same arithmetic as _score_project() on whole columns"""
+        fields, related, keywords, features, skills, skill_tokens = query
+        size = len(arrays.features)
+        table = np.zeros(len(arrays.fields))
+        for field_set, points in ((related, 2), (fields, 4)):
+            for field in field_set:
+                if field in arrays.fields:
+                    table[arrays.fields[field]] = points
+        totals = table[arrays.field_codes]
+
+        keyword_score = np.zeros(size)
+        for phrase, tokens in keywords:
+            present = arrays.count(arrays.tokens, tokens)
+            credit = np.where(present > 0, 0.5, 0.0)
+            # A phrase can only occur where all of its tokens do; only those rows need the substring check
+            candidates = np.flatnonzero(present == len(tokens))
+            if len(tokens) > 1:
+                candidates = [row for row in candidates if phrase in arrays.features[row].text]
+            credit[candidates] = 1.0
+            keyword_score += credit
+        totals += np.minimum(keyword_score, 2)
+
+        if features:
+            coverage = np.zeros(size)
+            for feature in features:
+                coverage += arrays.count(arrays.tokens, feature) / len(feature)
+            coverage /= len(features)
+            totals += np.where(coverage >= 0.75, 2, np.where(coverage >= 0.34, 1, 0))
+
+        if skills:
+            overlap = arrays.count(arrays.skills, skills)
+            ratio = overlap / np.maximum(np.minimum(len(skills), arrays.skill_counts), 1)
+            mentioned = np.zeros(size, dtype=np.intp)
+            for tokens in skill_tokens.values():
+                if tokens:
+                    mentioned += arrays.count(arrays.tokens, tokens) == len(tokens)
+            listed = np.where(overlap > 0, np.where(ratio >= 0.5, 2, 1), np.where(mentioned > 0, 1, 0))
+            unlisted = np.where(mentioned / len(skills) >= 0.5, 2, np.where(mentioned > 0, 1, 0))
+            totals += np.where(arrays.skill_counts > 0, listed, unlisted)
+        return totals
+
+    @staticmethod
+    def _parse_requirements(requirements):
+        requirements = requirements if isinstance(requirements, dict) else {}
+        fields = {normalize_field(f) for f in requirements.get('fields') or [] if isinstance(f, str)}
+        related = set().union(*(RELATED_FIELD_TABLE.get(f, set()) for f in fields)) - fields if fields else set()
+        keywords = [(f" {' '.join(tokenize(k))} ", set(tokenize(k))) for k in requirements.get('keywords') or [] if isinstance(k, str)]
+        keywords = [k for k in keywords if k[1]]
+        features = [set(tokenize(f)) for f in requirements.get('features') or [] if isinstance(f, str)]
+        features = [f for f in features if f]
+        skills = {normalize_skill(s) for s in requirements.get('skills') or [] if isinstance(s, str) and s.strip()}
+        skill_tokens = {s: set(tokenize(s)) for s in skills}
+        return fields, related, keywords, features, skills, skill_tokens
+
+    def _score_project(self, project, pf, query):
+        fields, related, keywords, features, skills, skill_tokens = query
+        field_score = 4 if pf.field in fields else 2 if pf.field in related else 0
+        keyword_score = self._keyword_score(keywords, pf)
+        feature_score = self._feature_score(features, pf)
+        skill_score, skill_note = self._skill_score(skills, skill_tokens, pf)
+        total = field_score + keyword_score + feature_score + skill_score
+        return {
+            'id': project.id,
+            'score': total,
+            'reasoning': f"Field {field_score}/4 ({project.field}); keywords {keyword_score:g}/2; "
+                         f"features {feature_score}/2; skills {skill_score}/2 ({skill_note})"
+        }
+
+    @staticmethod
+    def _keyword_score(keywords, pf):
+        score = 0.0
+        for phrase, tokens in keywords:
+            if phrase in pf.text:
+                score += 1
+            elif tokens & pf.tokens:
+                score += 0.5
+        return min(score, 2)
+
+    @staticmethod
+    def _feature_score(features, pf):
+        if not features:
+            return 0
+        coverage = sum(len(f & pf.tokens) / len(f) for f in features) / len(features)
+        return 2 if coverage >= 0.75 else 1 if coverage >= 0.34 else 0
+
+    @staticmethod
+    def _skill_score(skills, skill_tokens, pf):
+        if not skills:
+            return 0, 'no student skills'
+        if pf.skills:
+            overlap = skills & pf.skills
+            if overlap and len(overlap) / min(len(skills), len(pf.skills)) >= 0.5:
+                return 2, 'overlap: ' + ', '.join(sorted(overlap))
+            if overlap:
+                return 1, 'partial overlap: ' + ', '.join(sorted(overlap))
+            if any(tokens and tokens <= pf.tokens for tokens in skill_tokens.values()):
+                return 1, 'related to project description'
+            return 0, 'no overlap'
+        # Project lists no skills: only credit student skills named in the description
+        mentioned = [s for s, tokens in skill_tokens.items() if tokens and tokens <= pf.tokens]
+        if mentioned and len(mentioned) / len(skills) >= 0.5:
+            return 2, 'mentioned in description: ' + ', '.join(sorted(mentioned))
+        if mentioned:
+            return 1, 'mentioned in description: ' + ', '.join(sorted(mentioned))
+        return 0, 'project lists no skills'
@@ -0,0 +1,243 @@
+"""Versioned, idempotent schema migrations recorded in a `schema_version` table
+
+Each migration is `(version, description, function(connection, metadata))` and runs in its own
+transaction. Functions check the live schema before changing it, so a migration that was partly applied
+by hand, or a database created by an older release with `db.create_all()`, is brought up to date
+rather than failing. Append new migrations to MIGRATIONS; never edit or renumber a released one.
+
+Every migration transaction first takes a database-wide lock (BEGIN IMMEDIATE on SQLite, a transaction
+advisory lock on PostgreSQL) and re-reads the recorded version, so processes migrating the same database
+at once apply each migration exactly once. Other backends get no lock: migrate them from one process.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.exc import OperationalError
+
+from analytics import recount_interest_counters
+from skills import backfill_project_skills, seed_aliases
+
+logger = logging.getLogger('migrations')
+
+version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+def _columns(connection, table):
+    return {column['name'] for column in inspect(connection).get_columns(table)}
+
+
+def _has_unique(connection, table, columns):
+    inspector = inspect(connection)
+    uniques = [c['column_names'] for c in inspector.get_unique_constraints(table)]
+    uniques += [i['column_names'] for i in inspector.get_indexes(table) if i.get('unique')]
+    return any(list(names) == list(columns) for names in uniques)
+
+
+def create_tables(connection, metadata):
+    """Baseline: every model table that does not exist yet"""
+    metadata.create_all(connection, checkfirst=True)
+
+
+def add_project_capacity(connection, metadata):
+    if 'capacity' not in _columns(connection, 'project'):
+        connection.execute(text("ALTER TABLE project ADD COLUMN capacity INTEGER NOT NULL DEFAULT 1"))
+
+
+def unique_student_interest(connection, metadata):
+    """One interest per student: drop later duplicates, then add the unique index"""
+    if _has_unique(connection, 'student_interest', ['student_id']):
+        return
+    removed = connection.execute(text(
+        "DELETE FROM student_interest WHERE id NOT IN "
+        "(SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM student_interest GROUP BY student_id) AS keep)"
+    )).rowcount
+    if removed:
+        logger.warning("Removed %d duplicate student interest rows", removed)
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_student_interest_student_id ON student_interest (student_id)"
+    ))
+
+
+def foreign_key_indexes(connection, metadata):
+    for table, column in (('project', 'teacher_id'), ('student_interest', 'project_id'), ('allocation', 'project_id')):
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+
+PROJECT_FTS_COLUMNS = 'name, description, field, skill_requirements'
+
+
+def project_full_text_search(connection, metadata):
+    """SQLite FTS5 index mirroring the project text columns, kept in sync by triggers
+
+    Other backends (and SQLite builds without FTS5) skip this; project search then uses the in-process index.
+    """
+    if connection.dialect.name != 'sqlite':
+        return
+    try:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS project_fts USING fts5({PROJECT_FTS_COLUMNS}, "
+            "content='project', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+    except OperationalError as e:
+        logger.warning("FTS5 is not available, project search will use the in-process index: %s", e)
+        return
+    new_values = "new.id, new.name, new.description, new.field, new.skill_requirements"
+    old_values = "'delete', old.id, old.name, old.description, old.field, old.skill_requirements"
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS project_fts_insert AFTER INSERT ON project BEGIN "
+        f"INSERT INTO project_fts(rowid, {PROJECT_FTS_COLUMNS}) VALUES ({new_values}); END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS project_fts_delete AFTER DELETE ON project BEGIN "
+        f"INSERT INTO project_fts(project_fts, rowid, {PROJECT_FTS_COLUMNS}) VALUES ({old_values}); END"
+    ))
+    # Only text edits touch the index; e.g. capacity changes do not
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS project_fts_update AFTER UPDATE OF {PROJECT_FTS_COLUMNS} ON project BEGIN "
+        f"INSERT INTO project_fts(project_fts, rowid, {PROJECT_FTS_COLUMNS}) VALUES ({old_values}); "
+        f"INSERT INTO project_fts(rowid, {PROJECT_FTS_COLUMNS}) VALUES ({new_values}); END"
+    ))
+    connection.execute(text("INSERT INTO project_fts(project_fts) VALUES ('rebuild')"))
+
+
+def data_version_counters(connection, metadata):
+    """Create the counter rows up front so concurrent first bumps update a row instead of racing to insert it"""
+    existing = {name for (name,) in connection.execute(text("SELECT name FROM data_version"))}
+    for name in ('catalog', 'interests'):
+        if name not in existing:
+            connection.execute(
+                text("INSERT INTO data_version (name, version, updated_at) VALUES (:name, 0, :now)"),
+                {'name': name, 'now': datetime.utcnow()}
+            )
+
+
+def skill_taxonomy(connection, metadata):
+    """Canonical skill tables, seeded with the built-in aliases and filled from existing projects"""
+    tables = [metadata.tables[name] for name in ('skill', 'skill_alias', 'project_skill')]
+    metadata.create_all(connection, tables=tables, checkfirst=True)
+    seed_aliases(connection)
+    projects, links = backfill_project_skills(connection)
+    logger.info("Normalized skills of %d projects (%d project skills)", projects, links)
+
+
+def interest_counters(connection, metadata):
+    """Materialized interest counts per project and per day, filled from the existing interest rows"""
+    if 'interest_count' not in _columns(connection, 'project'):
+        connection.execute(text("ALTER TABLE project ADD COLUMN interest_count INTEGER NOT NULL DEFAULT 0"))
+    metadata.create_all(connection, tables=[metadata.tables['interest_activity']], checkfirst=True)
+    recount_interest_counters(connection)
+
+
+def widen_password_hash(connection, metadata):
+    """Room for scrypt hashes (about 160 characters); SQLite does not enforce VARCHAR lengths"""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('ALTER TABLE "user" ALTER COLUMN password_hash TYPE VARCHAR(256)'))
+
+
+def student_profiles(connection, metadata):
+    """Warm-start profiles, seeded with the requirements of saved batch recommendations"""
+    metadata.create_all(connection, tables=[metadata.tables['student_profile']], checkfirst=True)
+    connection.execute(text(
+        "INSERT INTO student_profile (student_id, requirements, updated_at) "
+        "SELECT student_id, requirements, created_at FROM recommendation "
+        "WHERE requirements IS NOT NULL AND requirements NOT IN ('null', '{}') "
+        "AND student_id NOT IN (SELECT student_id FROM student_profile)"
+    ))
+
+
+MIGRATIONS = [
+    (1, 'create tables', create_tables),
+    (2, 'project capacity', add_project_capacity),
+    (3, 'unique student interest', unique_student_interest),
+    (4, 'foreign key indexes', foreign_key_indexes),
+    (5, 'project full-text search', project_full_text_search),
+    (6, 'data version counters', data_version_counters),
+    (7, 'skill taxonomy', skill_taxonomy),
+    (8, 'interest counters', interest_counters),
+    (9, 'password hash length', widen_password_hash),
+    (10, 'student profiles', student_profiles),
+]
+
+
+# pg_advisory_xact_lock key shared by every process migrating the same database
+ADVISORY_LOCK_KEY = 329330016
+# Seconds a process waits for another one's migrations before giving up
+LOCK_TIMEOUT = 600
+
+
+def current_version(engine):
+    with engine.connect() as connection:
+        if not inspect(connection).has_table('schema_version'):
+            return 0
+        return connection.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc())).scalar() or 0
+
+
+def _begin_immediate(connection, timeout):
+    """Open a SQLite write transaction, waiting up to `timeout` seconds for other writers
+
+    pysqlite only starts a transaction at the first INSERT/UPDATE/DELETE and runs DDL before it in
+    autocommit mode; an explicit BEGIN IMMEDIATE takes the write lock first, so the DDL is serialized
+    with other processes and rolled back with the rest of the migration.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            return
+        except OperationalError as e:
+            # busy_timeout already waited a few seconds; a long migration elsewhere may need more
+            if 'locked' not in str(e) or time.monotonic() > deadline:
+                raise
+            connection.rollback()
+
+
+@contextmanager
+def locked_transaction(engine, timeout=LOCK_TIMEOUT):
+    """A connection in a transaction holding the migration lock until it commits or rolls back"""
+    with engine.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            _begin_immediate(connection, timeout)
+        elif connection.dialect.name == 'postgresql':
+            connection.execute(text(f"SET LOCAL lock_timeout = '{int(timeout)}s'"))
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': ADVISORY_LOCK_KEY})
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+
+def migrate(engine, metadata, migrations=MIGRATIONS, timeout=LOCK_TIMEOUT):
+    """Apply pending migrations in order and return the versions applied (empty when up to date)
+
+    Safe to run from several workers at once: each migration runs under the migration lock and is
+    skipped when the version recorded by then shows another process already applied it.
+    """
+    version = current_version(engine)
+    applied = []
+    for number, description, function in migrations:
+        if number <= version:
+            continue
+        with locked_transaction(engine, timeout) as connection:
+            version_metadata.create_all(connection, checkfirst=True)
+            version = connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+            if number <= version:
+                logger.info("Migration %d was applied by another process", number)
+                continue
+            function(connection, metadata)
+            connection.execute(schema_version.insert().values(
+                version=number, description=description, applied_at=datetime.utcnow()
+            ))
+        logger.info("Applied migration %d: %s", number, description)
+        applied.append(number)
+    return applied
@@ -0,0 +1,67 @@
+"""Password hashing on a small bounded thread pool, with rehashing to the configured parameters
+
+scrypt and PBKDF2 are CPU-bound (and, for scrypt, memory-heavy). hashlib releases the GIL while hashing,
+so capping how many hashes run at once keeps a burst of logins from taking every core away from the
+threads serving chat and dashboards. Callers past the cap wait in a bounded queue; beyond that they get
+HasherBusy straight away instead of piling up.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Too many password hashes are queued, or one did not finish within the timeout"""
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt:32768:8:1', workers=2, queue=32, timeout=10.0):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        # Running plus waiting hashes; released when a hash finishes, even after its caller gave up
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._lock = threading.Lock()
+        self._prefix = None
+        self.in_flight = 0
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('password hash queue is full')
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HasherBusy('password hash timed out')
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        if not password_hash or not password:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash uses a different method or different parameters than `method`"""
+        if self._prefix is None:
+            # Werkzeug expands e.g. 'scrypt' to 'scrypt:32768:8:1'; compare against the expanded form
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,133 @@
+"""Bulk project import/export: streaming CSV and JSONL parsing, row validation and serialization
+
+Uploads are read one line at a time from a binary stream, so a file is never held in memory as a whole;
+app.import_projects() inserts the validated rows in batched transactions.
+"""
+import csv
+import io
+import json
+import os
+
+from matching import AVAILABLE_FIELDS
+
+FORMATS = ('csv', 'jsonl')
+REQUIRED_COLUMNS = ('name', 'description', 'field')
+EXPORT_COLUMNS = ['id', 'name', 'description', 'field', 'skill_requirements', 'capacity', 'teacher_email']
+NAME_MAX_LENGTH = 100  # Project.name column
+
+_FIELDS = {field.lower(): field for field in AVAILABLE_FIELDS}
+_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+_MIMETYPES = {'text/csv': 'csv', 'application/x-ndjson': 'jsonl', 'application/jsonl': 'jsonl'}
+
+
+class ImportFormatError(ValueError):
+    """The upload cannot be read in the requested format"""
+
+
+def detect_format(filename=None, mimetype=None):
+    """'csv' or 'jsonl' from a file name extension or MIME type, or None"""
+    if filename:
+        fmt = _EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+        if fmt:
+            return fmt
+    return _MIMETYPES.get((mimetype or '').lower())
+
+
+def parse_capacity(value):
+    """Seats per project from form/JSON input; None when it is not a positive integer"""
+    if value is None or value == '':
+        return 1
+    try:
+        capacity = int(value)
+    except (TypeError, ValueError):
+        return None
+    return capacity if capacity > 0 else None
+
+
+def iter_text_lines(binary):
+    """Decoded lines of a binary stream (line endings kept, a UTF-8 BOM dropped)"""
+    for number, raw in enumerate(binary, 1):
+        try:
+            line = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ImportFormatError(f'Line {number} is not valid UTF-8')
+        yield line.lstrip('\ufeff') if number == 1 else line
+
+
+def iter_project_rows(binary, fmt):
+    """(line number, row dict, error) for each record of a CSV or JSONL upload; row is None when error is set
+
+    Raises ImportFormatError when the upload as a whole is unreadable (bad encoding, missing CSV columns).
+    """
+    lines = iter_text_lines(binary)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ImportFormatError(f"Missing CSV columns: {', '.join(missing)}")
+        for row in reader:
+            if any(isinstance(value, str) and value.strip() for value in row.values()):
+                yield reader.line_num, row, None
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON'
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'Expected a JSON object'
+            continue
+        yield number, row, None
+
+
+def validate_project_row(row):
+    """(Project column values, None) for a valid import row, or (None, error message)"""
+    values = {}
+    for column in REQUIRED_COLUMNS:
+        value = row.get(column)
+        if not isinstance(value, str) or not value.strip():
+            return None, f'Missing {column}'
+        values[column] = value.strip()
+    if len(values['name']) > NAME_MAX_LENGTH:
+        return None, f'Name is longer than {NAME_MAX_LENGTH} characters'
+    field = _FIELDS.get(values['field'].lower())
+    if field is None:
+        return None, f"Unknown field '{values['field']}' (expected one of: {', '.join(AVAILABLE_FIELDS)})"
+    values['field'] = field
+
+    skills = row.get('skill_requirements')
+    if isinstance(skills, list) and all(isinstance(skill, str) for skill in skills):
+        skills = ', '.join(skill.strip() for skill in skills if skill.strip())
+    if skills is not None and not isinstance(skills, str):
+        return None, 'skill_requirements must be text or a list of strings'
+    values['skill_requirements'] = (skills or '').strip()
+
+    values['capacity'] = parse_capacity(row.get('capacity'))
+    if values['capacity'] is None:
+        return None, 'Capacity must be a positive whole number.'
+    return values, None
+
+
+def export_chunks(rows, fmt):
+    """CSV (with a header line) or JSONL text for rows of EXPORT_COLUMNS values, one record per chunk"""
+    if fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    def take():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield take()
+    for row in rows:
+        writer.writerow(row)
+        yield take()
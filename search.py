@@ -0,0 +1,60 @@
+"""Project full-text search over the `project_fts` SQLite FTS5 table (created by migration 5)"""
+import re
+
+from sqlalchemy import bindparam, text
+
+FTS_TABLE = 'project_fts'
+# bm25() column weights in table order: name, description, field, skill_requirements
+FTS_BM25_WEIGHTS = (8.0, 1.0, 4.0, 4.0)
+MAX_QUERY_TERMS = 16
+
+_TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def query_terms(text_value):
+    """Lower-cased word tokens of a search box query, deduplicated and capped at MAX_QUERY_TERMS"""
+    return list(dict.fromkeys(_TERM_PATTERN.findall((text_value or '').lower())))[:MAX_QUERY_TERMS]
+
+
+def fts_match_expression(terms, prefix=True, any_term=False):
+    """FTS5 MATCH string for `terms`; every term is quoted so user input cannot inject query syntax
+
+    With `prefix` each term also matches longer words ("mach" finds "machine"); `any_term` ORs the
+    terms instead of requiring all of them.
+    """
+    quoted = [f'"{term}"*' if prefix else f'"{term}"' for term in terms]
+    return (' OR ' if any_term else ' ').join(quoted)
+
+
+def fts_available(connection):
+    if connection.dialect.name != 'sqlite':
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+    ).first() is not None
+
+
+def search_project_ids(connection, match, fields=None, limit=20, offset=0):
+    """([(project id, bm25 score, description snippet)], total matches), best first
+
+    `fields` restricts results to projects whose field equals one of the values, ignoring case.
+    """
+    where = f"{FTS_TABLE} MATCH :match"
+    params = {'match': match}
+    if fields:
+        where += " AND lower(p.field) IN :fields"
+        params['fields'] = [f.lower() for f in fields]
+    base = f"FROM {FTS_TABLE} JOIN project p ON p.id = {FTS_TABLE}.rowid WHERE {where}"
+    weights = ', '.join(str(w) for w in FTS_BM25_WEIGHTS)
+
+    def bind(statement):
+        return statement.bindparams(bindparam('fields', expanding=True)) if fields else statement
+
+    total = connection.execute(bind(text(f"SELECT count(*) {base}")), params).scalar()
+    rows = connection.execute(bind(text(
+        f"SELECT p.id, bm25({FTS_TABLE}, {weights}) AS rank, "
+        f"snippet({FTS_TABLE}, 1, '[', ']', '...', 16) {base} "
+        "ORDER BY rank LIMIT :limit OFFSET :offset"
+    )), dict(params, limit=limit, offset=offset)).all()
+    # bm25() is lower-is-better; report it as a positive relevance score
+    return [(row[0], round(-row[1], 6), row[2]) for row in rows], total
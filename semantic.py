@@ -0,0 +1,410 @@
+"""Offline semantic matching: hashed word and char-n-gram vectors in a memory-mapped matrix
+
+Each project is embedded once when it is written. The vector is stored as one float32 row of
+`<path>.f32`, which is memory-mapped so every worker process shares the same pages and startup
+loads nothing but the small `<path>.json` slot table. A query is a single matrix-vector product
+over the mapped rows followed by top-K selection, done by NumPy (see requirements.txt). Without
+NumPy the product runs row by row over a memoryview of the same mapping, which load() warns about.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import threading
+import zlib
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+
+from matching import FIELD_WEIGHTS, SKILL_ALIASES, tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - listed in requirements.txt; the fallback is much slower
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger('semantic')
+
+FLOAT_SIZE = 4
+NGRAM_SIZES = (3, 4, 5)
+# Share of a token's weight given to its char n-grams (the rest goes to the whole word)
+NGRAM_WEIGHT = 0.5
+
+
+@lru_cache(maxsize=65536)
+def _hash(feature):
+    """Stable 64-bit hash of a feature (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and char n-grams into `dim` buckets, L2-normalized
+
+    Words are alias-normalized (js -> javascript) and n-grams are taken from '<word>' so that prefixes
+    and suffixes are distinct, which lets 'visualisation' and 'visualization' or 'PyTorch' and 'torch'
+    share most of their features.
+    """
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+
+    def _add_token(self, vector, token, weight):
+        token = SKILL_ALIASES.get(token, token)
+        self._add_feature(vector, 'w:' + token, weight * (1 - NGRAM_WEIGHT))
+        padded = f'<{token}>'
+        grams = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+        if grams:
+            share = weight * NGRAM_WEIGHT / math.sqrt(len(grams))
+            for gram in grams:
+                self._add_feature(vector, gram, share)
+
+    def _add_feature(self, vector, feature, weight):
+        h = _hash(feature)
+        vector[h % self.dim] += weight if h >> 63 else -weight
+
+    def embed_text(self, text, weight=1.0, vector=None):
+        """Sparse {bucket: value} vector of `text` (not normalized)"""
+        vector = defaultdict(float) if vector is None else vector
+        for token in tokenize(text):
+            self._add_token(vector, token, weight)
+        return vector
+
+    def embed_project(self, project):
+        vector = defaultdict(float)
+        sources = {
+            'field': project.field,
+            'skills': project.skill_requirements,
+            'name': project.name,
+            'description': project.description
+        }
+        for source, text in sources.items():
+            self.embed_text(text, FIELD_WEIGHTS[source], vector)
+        return normalize(vector)
+
+
+def normalize(vector):
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {bucket: value / norm for bucket, value in vector.items() if value}
+
+
+def project_fingerprint(project):
+    """Changes whenever any embedded attribute of the project changes"""
+    text = '\x1f'.join(str(value or '') for value in (project.field, project.skill_requirements, project.name, project.description))
+    return zlib.crc32(text.encode('utf-8'))
+
+
+class VectorIndex:
+    """Project vectors in a memory-mapped float32 matrix with incremental row updates
+
+    The slot table (project id -> row), per-row fingerprints, per-bucket document frequencies and the
+    catalog version the file reflects are kept in a JSON sidecar. Rows of deleted projects are zeroed
+    and reused. Queries weight buckets by inverse document frequency on the query side, so a row never
+    has to be rewritten when other projects change.
+
+    Nothing touches the disk until load() or the first write. `built` is only set once the vectors were
+    checked against the catalog by build(): vectors mapped by load() may come from an older database
+    that happens to have the same catalog version and project count.
+    """
+
+    def __init__(self, path, dim=1024, embedder=None):
+        self.path = path
+        self.dim = dim
+        self.embedder = embedder or HashingEmbedder(dim)
+        self._lock = threading.RLock()
+        self._file = None
+        self._mmap = None
+        self._floats = None  # memoryview over the mapping, cast to float32
+        self._matrix = None  # NumPy view over the same mapping when NumPy is available
+        self._capacity = 0
+        self._slots = {}  # project_id -> row
+        self._row_ids = []  # row -> project_id or None
+        self._free_rows = []  # unused rows, lowest last
+        self._fingerprints = {}
+        self._df = [0] * dim
+        self._meta_mtime = None
+        self.built = False
+        self.version = None  # catalog version the vectors reflect
+
+    @property
+    def matrix_path(self):
+        return self.path + '.f32'
+
+    @property
+    def meta_path(self):
+        return self.path + '.json'
+
+    def __len__(self):
+        return len(self._slots)
+
+    # -- storage -----------------------------------------------------------
+
+    def _unmap(self):
+        self._matrix = None
+        if self._floats is not None:
+            self._floats.release()
+            self._floats = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._capacity = 0
+
+    def _map(self, capacity):
+        """Map the matrix file, growing it to at least `capacity` rows"""
+        self._unmap()
+        row_bytes = self.dim * FLOAT_SIZE
+        if not os.path.exists(self.matrix_path):
+            open(self.matrix_path, 'wb').close()
+        self._file = open(self.matrix_path, 'r+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < capacity * row_bytes:
+            self._file.truncate(capacity * row_bytes)
+            size = capacity * row_bytes
+        self._capacity = size // row_bytes
+        if not self._capacity:
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity * row_bytes)
+        self._floats = memoryview(self._mmap).cast('f')
+        if np is not None:
+            self._matrix = np.frombuffer(self._mmap, dtype=np.float32).reshape(self._capacity, self.dim)
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers across threads and, where supported, across worker processes"""
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            mtime = os.stat(self.meta_path).st_mtime_ns
+        except (OSError, ValueError):
+            return None, None
+        if meta.get('dim') != self.dim:
+            return None, None  # vectors of another dimension cannot be reused
+        return meta, mtime
+
+    def _apply_meta(self, meta, mtime):
+        self.version = meta.get('version')
+        self._slots = {int(project_id): row for project_id, row in meta.get('slots', {}).items()}
+        self._fingerprints = {int(project_id): fp for project_id, fp in meta.get('fingerprints', {}).items()}
+        self._df = meta.get('df') or [0] * self.dim
+        self._meta_mtime = mtime
+        rows = max(self._slots.values(), default=-1) + 1
+        if rows > self._capacity or self._mmap is None:
+            self._map(rows)
+        self._row_ids = [None] * self._capacity
+        for project_id, row in self._slots.items():
+            self._row_ids[row] = project_id
+        self._free_rows = [row for row in reversed(range(self._capacity)) if self._row_ids[row] is None]
+
+    def _write_meta(self):
+        meta = {
+            'dim': self.dim,
+            'version': self.version,
+            'slots': self._slots,
+            'fingerprints': self._fingerprints,
+            'df': self._df
+        }
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self._meta_mtime = os.stat(self.meta_path).st_mtime_ns
+
+    def _refresh_from_disk(self):
+        """Pick up rows and slots written by another process since we last looked"""
+        meta, mtime = self._read_meta()
+        if meta is not None and mtime != self._meta_mtime:
+            self._apply_meta(meta, mtime)
+
+    def load(self):
+        """Map existing vectors without reading them; returns False if there is nothing reusable
+
+        The next build() re-embeds only the projects whose text differs from the stored fingerprints.
+        """
+        if np is None:
+            logger.warning("NumPy is not installed; semantic search falls back to a much slower pure-Python scan")
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            meta, mtime = self._read_meta()
+            if meta is None:
+                self._map(0)
+                return False
+            self._apply_meta(meta, mtime)
+            return True
+
+    # -- rows ----------------------------------------------------------------
+
+    def _row_buckets(self, row):
+        base = row * self.dim
+        if self._matrix is not None:
+            return np.flatnonzero(self._matrix[row]).tolist()
+        floats = self._floats
+        return [bucket for bucket in range(self.dim) if floats[base + bucket]]
+
+    def _clear_row(self, row):
+        for bucket in self._row_buckets(row):
+            self._df[bucket] -= 1
+        base = row * self.dim * FLOAT_SIZE
+        self._mmap[base:base + self.dim * FLOAT_SIZE] = bytes(self.dim * FLOAT_SIZE)
+
+    def _write_row(self, row, vector):
+        dense = array('f', bytes(self.dim * FLOAT_SIZE))
+        for bucket, value in vector.items():
+            dense[bucket] = value
+            self._df[bucket] += 1
+        base = row * self.dim * FLOAT_SIZE
+        self._mmap[base:base + self.dim * FLOAT_SIZE] = dense.tobytes()
+
+    def _free_row(self):
+        if not self._free_rows:
+            old_capacity = self._capacity
+            self._map(max(old_capacity * 2, 16))
+            self._row_ids.extend([None] * (self._capacity - len(self._row_ids)))
+            self._free_rows = list(reversed(range(old_capacity, self._capacity)))
+        return self._free_rows.pop()
+
+    def _upsert(self, project):
+        """Embed and store one project unless its stored row is already current; True if written"""
+        fingerprint = project_fingerprint(project)
+        row = self._slots.get(project.id)
+        if row is not None and self._fingerprints.get(project.id) == fingerprint:
+            return False
+        if row is None:
+            row = self._free_row()
+            self._slots[project.id] = row
+            self._row_ids[row] = project.id
+        else:
+            self._clear_row(row)
+        self._write_row(row, self.embedder.embed_project(project))
+        self._fingerprints[project.id] = fingerprint
+        return True
+
+    def _remove(self, project_id):
+        row = self._slots.pop(project_id, None)
+        self._fingerprints.pop(project_id, None)
+        if row is None:
+            return False
+        self._clear_row(row)
+        self._row_ids[row] = None
+        self._free_rows.append(row)
+        return True
+
+    def build(self, projects, version=None):
+        """Bring the vectors in line with `projects`, re-embedding only new or changed ones"""
+        with self._write_lock():
+            self._refresh_from_disk()
+            if self._mmap is None:
+                self._map(len(projects))
+                self._row_ids = [None] * self._capacity
+                self._free_rows = list(reversed(range(self._capacity)))
+            current = {project.id for project in projects}
+            changed = 0
+            for project_id in [project_id for project_id in self._slots if project_id not in current]:
+                changed += self._remove(project_id)
+            for project in projects:
+                changed += self._upsert(project)
+            self.version = version
+            if self._mmap is not None:
+                self._mmap.flush()
+            self._write_meta()
+            self.built = True
+            return changed
+
+    def update(self, project, version=None):
+        """Re-embed a single created or edited project in place"""
+        with self._write_lock():
+            self._refresh_from_disk()
+            if self._upsert(project):
+                self._mmap.flush()
+            if version is not None:
+                self.version = version
+            self._write_meta()
+
+    def remove(self, project_id, version=None):
+        with self._write_lock():
+            self._refresh_from_disk()
+            self._remove(project_id)
+            if version is not None:
+                self.version = version
+            self._write_meta()
+
+    # -- queries -------------------------------------------------------------
+
+    def _query_vector(self, text):
+        vector = self.embedder.embed_text(text)
+        doc_count = len(self._slots)
+        # Query-side IDF: rare buckets count more without touching stored rows
+        return {
+            bucket: value * (math.log((doc_count + 1) / (self._df[bucket] + 1)) + 1)
+            for bucket, value in vector.items() if value
+        }
+
+    def search_text(self, text, limit=None):
+        """Score projects by similarity to `text`, returning [(project_id, score)] best first"""
+        with self._lock:
+            if not self._slots or not text:
+                return []
+            query = self._query_vector(text)
+            if not query:
+                return []
+            if self._matrix is not None:
+                scores = self._search_numpy(query, limit)
+            else:
+                scores = self._search_python(query, limit)
+        return [(project_id, score) for project_id, score in scores if score > 0]
+
+    def _search_numpy(self, query, limit):
+        buckets = np.fromiter(query.keys(), dtype=np.intp, count=len(query))
+        weights = np.fromiter(query.values(), dtype=np.float32, count=len(query))
+        rows = len(self._row_ids)
+        scores = self._matrix[:rows, buckets] @ weights
+        occupied = np.array([project_id is not None for project_id in self._row_ids], dtype=bool)
+        scores[~occupied] = -np.inf
+        count = min(limit or rows, int(occupied.sum()))
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self._row_ids[row], float(scores[row])) for row in top]
+
+    def _search_python(self, query, limit):
+        floats = self._floats
+        dim = self.dim
+        terms = list(query.items())
+        scored = []
+        for row, project_id in enumerate(self._row_ids):
+            if project_id is None:
+                continue
+            base = row * dim
+            scored.append((sum(floats[base + bucket] * weight for bucket, weight in terms), project_id))
+        top = heapq.nlargest(limit or len(scored), scored, key=lambda item: (item[0], -item[1]))
+        return [(project_id, score) for score, project_id in top]
+
+    def close(self):
+        with self._lock:
+            self._unmap()
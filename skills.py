@@ -0,0 +1,178 @@
+"""Normalized project skills: `skill`, `skill_alias` and `project_skill` rows plus in-memory bitsets
+
+Project skill_requirements stay free text for display; on every write the text is split into canonical
+skills (see matching.parse_skills) stored as join rows. SkillTaxonomy gives each skill a bit, so a
+student's skill overlap with a project is an AND and a popcount.
+"""
+import threading
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
+
+from matching import SKILL_ALIASES, normalize_skill, parse_skills
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def load_aliases(connection):
+    """{alias: canonical skill name} from the skill_alias table"""
+    return dict(connection.execute(text(
+        "SELECT skill_alias.alias, skill.name FROM skill_alias JOIN skill ON skill.id = skill_alias.skill_id"
+    )).all())
+
+
+def canonical_skill(name, aliases):
+    skill = normalize_skill(name)
+    return aliases.get(skill, skill)
+
+
+def canonical_skills(skill_text, aliases):
+    """Canonical skill names in a free-text skill_requirements value"""
+    return {canonical_skill(skill, aliases) for skill in parse_skills(skill_text)}
+
+
+def ensure_skills(connection, names):
+    """{name: skill id} for `names`, inserting the skills that do not exist yet"""
+    names = set(names)
+    if not names:
+        return {}
+    select_ids = text("SELECT name, id FROM skill WHERE name IN :names").bindparams(bindparam('names', expanding=True))
+    ids = dict(connection.execute(select_ids, {'names': sorted(names)}).all())
+    for name in sorted(names - set(ids)):
+        try:
+            # Savepoint, so a skill inserted concurrently by another worker only loses this row
+            with connection.begin_nested():
+                connection.execute(text("INSERT INTO skill (name) VALUES (:name)"), {'name': name})
+        except IntegrityError:
+            pass
+    if len(ids) < len(names):
+        ids = dict(connection.execute(select_ids, {'names': sorted(names)}).all())
+    return ids
+
+
+def seed_aliases(connection, aliases=SKILL_ALIASES):
+    """Add the built-in aliases to skill_alias (existing aliases are kept); returns how many were added"""
+    existing = set(load_aliases(connection))
+    missing = {alias: name for alias, name in aliases.items() if alias not in existing}
+    ids = ensure_skills(connection, set(missing.values()))
+    for alias, name in missing.items():
+        connection.execute(
+            text("INSERT INTO skill_alias (alias, skill_id) VALUES (:alias, :skill_id)"),
+            {'alias': alias, 'skill_id': ids[name]}
+        )
+    return len(missing)
+
+
+def set_project_skills(connection, project_id, skill_text, aliases):
+    """Replace a project's project_skill rows with the canonical skills of `skill_text`"""
+    ids = ensure_skills(connection, canonical_skills(skill_text, aliases))
+    connection.execute(text("DELETE FROM project_skill WHERE project_id = :project_id"), {'project_id': project_id})
+    if ids:
+        connection.execute(
+            text("INSERT INTO project_skill (project_id, skill_id) VALUES (:project_id, :skill_id)"),
+            [{'project_id': project_id, 'skill_id': skill_id} for skill_id in ids.values()]
+        )
+    return set(ids)
+
+
+def add_project_skills(connection, projects, aliases):
+    """Insert project_skill rows for new (project id, skill text) pairs in one statement; returns the rows added"""
+    skills = {project_id: canonical_skills(skill_text, aliases) for project_id, skill_text in projects}
+    ids = ensure_skills(connection, set().union(*skills.values()))
+    rows = [{'project_id': project_id, 'skill_id': ids[name]} for project_id, names in skills.items() for name in names]
+    if rows:
+        connection.execute(text("INSERT INTO project_skill (project_id, skill_id) VALUES (:project_id, :skill_id)"), rows)
+    return len(rows)
+
+
+def backfill_project_skills(connection):
+    """Rebuild project_skill for every project from its skill_requirements; returns (projects, links)"""
+    aliases = load_aliases(connection)
+    projects = links = 0
+    for project_id, skill_text in connection.execute(text("SELECT id, skill_requirements FROM project")).all():
+        links += len(set_project_skills(connection, project_id, skill_text, aliases))
+        projects += 1
+    return projects, links
+
+
+def project_skill_rows(connection):
+    """(project id, canonical skill name) for every project_skill row"""
+    return connection.execute(text(
+        "SELECT project_skill.project_id, skill.name FROM project_skill JOIN skill ON skill.id = project_skill.skill_id"
+    )).all()
+
+
+class SkillTaxonomy:
+    """One bit per canonical skill and one skill bitmask per project, rebuilt when the catalog version changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.built = False
+        self.version = None
+        self._bits = {}  # skill name -> bit position
+        self._names = []  # bit position -> skill name
+        self._aliases = {}
+        self._projects = {}  # project id -> bitmask
+
+    def __len__(self):
+        return len(self._names)
+
+    def _bit(self, name):
+        bit = self._bits.get(name)
+        if bit is None:
+            bit = self._bits[name] = len(self._names)
+            self._names.append(name)
+        return bit
+
+    def build(self, rows, aliases, version=None):
+        """Load (project id, skill name) rows, e.g. from project_skill_rows()"""
+        with self._lock:
+            self._bits, self._names, self._projects = {}, [], {}
+            self._aliases = dict(aliases)
+            for project_id, name in rows:
+                self._projects[project_id] = self._projects.get(project_id, 0) | (1 << self._bit(name))
+            self.version = version
+            self.built = True
+
+    def set_project(self, project_id, names):
+        with self._lock:
+            mask = 0
+            for name in names:
+                mask |= 1 << self._bit(name)
+            self._projects[project_id] = mask
+
+    def mask(self, skills):
+        """Bitmask of a student's skills; skills no project requires are ignored"""
+        mask = 0
+        for skill in skills or []:
+            if isinstance(skill, str) and skill.strip():
+                bit = self._bits.get(canonical_skill(skill, self._aliases))
+                if bit is not None:
+                    mask |= 1 << bit
+        return mask
+
+    def _names_of(self, mask):
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self._names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def skills(self, project_id):
+        return self._names_of(self._projects.get(project_id, 0))
+
+    def coverage(self, project_id, student_mask):
+        """{matched, required, ratio} of a project's skills held by the student, or None if it lists none"""
+        required = self._projects.get(project_id, 0)
+        if not required:
+            return None
+        overlap = required & student_mask
+        count = popcount(required)
+        return {
+            'matched': self._names_of(overlap),
+            'required': count,
+            'ratio': round(popcount(overlap) / count, 2)
+        }
@@ -0,0 +1,74 @@
+"""Shared fixtures: app.py imported once against a throwaway SQLite database that every test resets
+
+The environment is set before anything imports app, so tests never touch instance/ or the DeepSeek API;
+the `llm` fixture stands in for the API with deterministic answers.
+"""
+import atexit
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import pytest
+
+_workdir = tempfile.mkdtemp(prefix='project-match-tests-')
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_workdir, 'test.db')}",
+    'SEMANTIC_INDEX_PATH': os.path.join(_workdir, 'project_vectors'),
+    'DEEPSEEK_API_KEY': 'test',
+    'DEEPSEEK_BASE_URL': 'http://127.0.0.1:9/v1',  # unreachable; the llm fixture replaces the API calls
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',  # fast hashes for the test accounts
+    'LOG_LEVEL': 'WARNING',
+})
+
+
+@pytest.fixture(scope='session')
+def appmod():
+    import app
+    return app
+
+
+@pytest.fixture
+def app_db(appmod):
+    """The app module with a freshly reset database holding the demo accounts and projects"""
+    # Let warm-start refreshes queued by the previous test finish before their tables are dropped
+    appmod.warm_start_executor.submit(lambda: None).result()
+    appmod.init_db()
+    yield appmod
+    appmod.warm_start_executor.submit(lambda: None).result()
+
+
+def login(appmod, email, password, role):
+    client = appmod.app.test_client()
+    response = client.post(f'/login/{role}', data={'email': email, 'password': password})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+@pytest.fixture
+def student_client(app_db):
+    return login(app_db, 'student@test.com', 'student123', 'student')
+
+
+@pytest.fixture
+def teacher_client(app_db):
+    return login(app_db, 'teacher@test.com', 'teacher123', 'teacher')
+
+
+def fake_deepseek(messages, purpose='chat'):
+    """Requirement analysis naming AI and Python; rankings score the prompt's projects in order"""
+    if purpose == 'extract':
+        return json.dumps({'fields': ['Artificial Intelligence'], 'keywords': ['machine learning'],
+                           'features': [], 'skills': ['Python']})
+    ids = [int(project_id) for project_id in re.findall(r'"id": (\d+)', messages[-1]['content'])]
+    return json.dumps({'ranked_projects': [
+        {'id': project_id, 'score': max(10 - rank, 3), 'reasoning': 'test'} for rank, project_id in enumerate(ids)
+    ]})
+
+
+@pytest.fixture
+def llm(appmod, monkeypatch):
+    monkeypatch.setattr(appmod, 'call_deepseek_api', fake_deepseek)
+    return fake_deepseek
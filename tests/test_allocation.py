@@ -0,0 +1,102 @@
+"""Allocation solvers against brute force on small random instances"""
+import itertools
+import random
+
+import pytest
+
+from allocation import assignment_weight, blocking_pairs, build_preferences, deferred_acceptance, max_weight_assignment
+
+CASES = 750  # per seed; 3,000 instances per solver
+
+
+def random_instance(rng):
+    """{student: {project: weight}} with ties and missing edges, and capacities including closed projects"""
+    students = [f's{i}' for i in range(rng.randint(1, 5))]
+    projects = [f'p{i}' for i in range(rng.randint(1, 3))]
+    weights = {
+        student: {project: rng.randint(0, 5) for project in projects if rng.random() < 0.8}
+        for student in students
+    }
+    capacities = {project: rng.randint(0, 2) for project in projects}
+    return weights, capacities
+
+
+def feasible_assignments(weights, capacities):
+    """Every {student: project} that respects capacities, using only edges the student ranks"""
+    students = list(weights)
+    options = [[None] + [project for project in weights[student] if capacities.get(project, 0) > 0] for student in students]
+    for choice in itertools.product(*options):
+        load = {}
+        for project in choice:
+            if project is not None:
+                load[project] = load.get(project, 0) + 1
+        if all(count <= capacities[project] for project, count in load.items()):
+            yield {student: project for student, project in zip(students, choice) if project is not None}
+
+
+def stronger(priority, student, other):
+    """Whether `student` has a stronger claim than `other` (higher weight, then the smaller key)"""
+    return (priority.get(student, 0), other) > (priority.get(other, 0), student)
+
+
+def is_stable(assignment, preferences, priorities, capacities):
+    """No student and project both prefer each other to the assignment (ties go to the smaller key)"""
+    members = {}
+    for student, project in assignment.items():
+        members.setdefault(project, []).append(student)
+    for student, choices in preferences.items():
+        current = assignment.get(student)
+        better = choices[:choices.index(current)] if current is not None else choices
+        for project in better:
+            seats = capacities.get(project, 0)
+            held = members.get(project, [])
+            if seats <= 0:
+                continue
+            if len(held) < seats:
+                return False
+            if any(stronger(priorities[project], student, other) for other in held):
+                return False
+    return True
+
+
+def rank(preferences, student, project):
+    return preferences[student].index(project) if project is not None else len(preferences[student])
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_max_weight_assignment_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        weights, capacities = random_instance(rng)
+        assignment = max_weight_assignment(weights, capacities)
+        best = max(assignment_weight(candidate, weights) for candidate in feasible_assignments(weights, capacities))
+        assert assignment_weight(assignment, weights) == best, (weights, capacities, assignment)
+        load = {}
+        for student, project in assignment.items():
+            assert project in weights[student]
+            load[project] = load.get(project, 0) + 1
+        assert all(count <= capacities[project] for project, count in load.items())
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_deferred_acceptance_is_the_student_optimal_stable_matching(seed):
+    rng = random.Random(100 + seed)
+    for _ in range(CASES):
+        weights, capacities = random_instance(rng)
+        preferences, priorities = build_preferences(weights)
+        assignment = deferred_acceptance(preferences, capacities, priorities)
+        assert is_stable(assignment, preferences, priorities, capacities), (weights, capacities, assignment)
+        assert blocking_pairs(assignment, preferences, capacities, priorities) == []
+        # Every student does at least as well as in any other stable matching
+        for candidate in feasible_assignments(weights, capacities):
+            if is_stable(candidate, preferences, priorities, capacities):
+                for student in weights:
+                    assert rank(preferences, student, assignment.get(student)) <= rank(preferences, student, candidate.get(student))
+
+
+def test_blocking_pairs_reports_an_unstable_assignment():
+    weights = {'a': {'x': 5, 'y': 1}, 'b': {'x': 1, 'y': 5}}
+    preferences, priorities = build_preferences(weights)
+    swapped = {'a': 'y', 'b': 'x'}
+    assert sorted(blocking_pairs(swapped, preferences, {'x': 1, 'y': 1}, priorities)) == [('a', 'x'), ('b', 'y')]
+    assert deferred_acceptance(preferences, {'x': 1, 'y': 1}, priorities) == {'a': 'x', 'b': 'y'}
@@ -0,0 +1,96 @@
+"""Interest demand counters: kept in step with selections and cancellations, served by /api/teacher/analytics"""
+from datetime import date, datetime
+
+from analytics import timeline
+
+
+def counters(appmod):
+    """({project id: interest_count}, {project id: (selections, cancellations)} for today) from the counter tables"""
+    with appmod.app.app_context():
+        counts = {p.id: p.interest_count for p in appmod.Project.query.all()}
+        today = datetime.utcnow().date()
+        activity = {a.project_id: (a.selections, a.cancellations)
+                    for a in appmod.InterestActivity.query.filter_by(day=today)}
+    return counts, activity
+
+
+def test_select_cancel_and_switch_update_the_counters(app_db, student_client):
+    assert student_client.post('/student_interest/1').status_code == 201
+    counts, activity = counters(app_db)
+    assert counts[1] == 1 and sum(counts.values()) == 1
+    assert activity == {1: (1, 0)}
+
+    # Switching is a cancellation of one project and a selection of another
+    assert student_client.post('/cancel_interest/1').status_code == 200
+    assert student_client.post('/student_interest/2').status_code == 201
+    counts, activity = counters(app_db)
+    assert (counts[1], counts[2]) == (0, 1)
+    assert activity == {1: (1, 1), 2: (1, 0)}
+
+
+def test_rejected_selections_leave_the_counters_alone(app_db, student_client):
+    assert student_client.post('/student_interest/1').status_code == 201
+    before = counters(app_db)
+    assert student_client.post('/student_interest/1').status_code == 409
+    assert student_client.post('/student_interest/2').status_code == 409
+    assert student_client.post('/student_interest/9999').status_code == 409
+    assert counters(app_db) == before
+
+    student_client.post('/cancel_interest/1')
+    assert student_client.post('/student_interest/9999').status_code == 404
+    assert student_client.post('/cancel_interest/1').status_code == 404
+    counts, activity = counters(app_db)
+    assert sum(counts.values()) == 0
+    assert activity == {1: (1, 1)}
+
+
+def test_analytics_reports_the_counters(app_db, student_client, teacher_client):
+    assert student_client.post('/student_interest/1').status_code == 201
+    assert student_client.post('/cancel_interest/1').status_code == 200
+    assert student_client.post('/student_interest/2').status_code == 201
+
+    report = teacher_client.get('/api/teacher/analytics?days=3').get_json()
+    projects = {p['id']: p for p in report['projects']}
+    assert report['projects'][0]['id'] == 2
+    assert (projects[1]['interest_count'], projects[2]['interest_count']) == (0, 1)
+    assert projects[2]['demand_ratio'] == round(1 / projects[2]['capacity'], 2)
+    assert sum(field['interest_count'] for field in report['fields']) == 1
+    assert len(report['timeline']) == 3
+    assert report['timeline'][-1] == {'date': datetime.utcnow().date().isoformat(),
+                                      'selections': 2, 'cancellations': 1, 'net': 1}
+
+    narrowed = teacher_client.get('/api/teacher/analytics?days=1&project_id=1').get_json()
+    assert narrowed['timeline'][0]['net'] == 0
+
+
+def test_analytics_rejects_bad_parameters(app_db, student_client, teacher_client):
+    assert teacher_client.get('/api/teacher/analytics?days=0').status_code == 400
+    assert teacher_client.get('/api/teacher/analytics?days=367').status_code == 400
+    assert teacher_client.get('/api/teacher/analytics?project_id=x').status_code == 400
+    assert student_client.get('/api/teacher/analytics').status_code == 403
+
+
+def test_recount_rebuilds_drifted_counters(app_db, student_client):
+    assert student_client.post('/student_interest/2').status_code == 201
+    with app_db.app.app_context():
+        app_db.Project.query.update({app_db.Project.interest_count: 7})
+        app_db.InterestActivity.query.delete()
+        app_db.db.session.commit()
+
+    result = app_db.app.test_cli_runner().invoke(args=['recount-interests'])
+    assert result.exit_code == 0, result.output
+    assert 'Recounted 1 interests' in result.output
+    counts, activity = counters(app_db)
+    assert counts[2] == 1 and sum(counts.values()) == 1
+    # Cancellations are not stored with the interests, so a rebuilt day only has selections
+    assert activity == {2: (1, 0)}
+
+
+def test_timeline_fills_missing_days():
+    rows = [('2026-03-02', 2, 1), (date(2026, 3, 2), 1, 0), (datetime(2026, 3, 4, 12), 0, 3)]
+    assert timeline(rows, date(2026, 3, 1), date(2026, 3, 4)) == [
+        {'date': '2026-03-01', 'selections': 0, 'cancellations': 0, 'net': 0},
+        {'date': '2026-03-02', 'selections': 3, 'cancellations': 1, 'net': 2},
+        {'date': '2026-03-03', 'selections': 0, 'cancellations': 0, 'net': 0},
+        {'date': '2026-03-04', 'selections': 0, 'cancellations': 3, 'net': -3},
+    ]
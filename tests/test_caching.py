@@ -0,0 +1,14 @@
+"""Persistent cache tier: the SQLite file is created on first use, not when the tier is constructed"""
+from caching import SQLiteCacheTier, TieredCache, TTLCache
+
+
+def test_sqlite_tier_opens_its_file_on_first_use(tmp_path):
+    path = tmp_path / 'cache' / 'requirements.sqlite3'
+    tier = SQLiteCacheTier(str(path), ttl=60)
+    cache = TieredCache(TTLCache(maxsize=4, ttl=60), tier)
+    assert not path.parent.exists()
+
+    cache.set('ai', {'skills': ['Python']})
+    assert path.exists()
+    assert SQLiteCacheTier(str(path)).get('ai') == {'skills': ['Python']}
+    assert tier.stats()['size'] == 1
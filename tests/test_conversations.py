@@ -0,0 +1,90 @@
+"""Follow-up classification and conversation lookup, including malformed client-supplied ids"""
+import json
+
+import pytest
+
+from conftest import fake_deepseek
+from conversations import MAX_CONVERSATION_ID_LENGTH, ConversationStore, classify_refinement, refinement_terms
+
+
+@pytest.mark.parametrize('message, kind', [
+    ('without blockchain', 'exclude'),
+    ("ok, don't want Java", 'exclude'),
+    ('anything but healthcare', 'exclude'),
+    ('only Python', 'filter'),
+    ('the ones with PyTorch', 'filter'),
+    ('also cloud computing', 'extend'),
+    ('and IoT as well', 'extend'),
+    # New searches that merely contain common words
+    ('I have no experience but want to do AI', None),
+    ('machine learning with medical images for one semester', None),
+    ('any project on cybersecurity', None),
+    ('', None),
+])
+def test_classify_refinement(message, kind):
+    assert classify_refinement(message) == kind
+
+
+def test_refinement_terms_drop_cues_and_filler():
+    assert refinement_terms("ok, don't want the ones using Java") == ['java']
+    assert refinement_terms('only the ones with PyTorch please') == ['pytorch']
+
+
+def test_store_ignores_malformed_ids():
+    store = ConversationStore()
+    conversation = store.save(1, {}, [{'id': 3, 'score': 8}], catalog_version=1)
+    assert store.get(conversation.id, 1) is conversation
+    assert store.get(conversation.id, 2) is None
+    for bad in (None, '', 42, ['x'], {'id': conversation.id}, 'x' * (MAX_CONVERSATION_ID_LENGTH + 1)):
+        assert store.get(bad, 1) is None
+
+
+@pytest.mark.parametrize('payload', [
+    {'message': 'only python', 'conversation_id': ['not', 'hashable']},
+    {'message': 'only python', 'conversation_id': {'a': 1}},
+])
+def test_chat_treats_malformed_conversation_ids_as_new(app_db, student_client, llm, payload):
+    response = student_client.post('/api/chat', json=payload)
+    assert response.status_code == 200
+    assert response.get_json()['refinement'] is None
+
+
+@pytest.mark.parametrize('url', ['/api/chat', '/api/chat/stream'])
+def test_chat_rejects_non_object_json(app_db, student_client, llm, url):
+    assert student_client.post(url, json=['only python']).status_code == 400
+
+
+@pytest.mark.parametrize('url', ['/api/chat', '/api/chat/stream'])
+@pytest.mark.parametrize('message', [123, None, ['AI'], '   '])
+def test_chat_rejects_missing_or_non_text_messages(app_db, student_client, llm, url, message):
+    response = student_client.post(url, json={'message': message})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Missing message'}
+
+
+def extract_docker(messages, purpose='chat'):
+    """fake_deepseek, plus Docker for messages that mention it"""
+    answer = fake_deepseek(messages, purpose)
+    if purpose == 'extract' and 'docker' in messages[-1]['content'].lower():
+        requirements = json.loads(answer)
+        requirements['skills'] = ['Docker']
+        answer = json.dumps(requirements)
+    return answer
+
+
+def stored_skills(appmod):
+    with appmod.app.app_context():
+        profile = appmod.db.session.get(appmod.StudentProfile, appmod.User.query.filter_by(email='student@test.com').one().id)
+        return json.loads(profile.requirements)['skills']
+
+
+@pytest.mark.parametrize('url', ['/api/chat', '/api/chat/stream'])
+def test_extend_refinement_updates_the_stored_profile(app_db, student_client, monkeypatch, url):
+    monkeypatch.setattr(app_db, 'call_deepseek_api', extract_docker)
+    first = student_client.post('/api/chat', json={'message': 'I like machine learning'}).get_json()
+    assert stored_skills(app_db) == ['Python']
+
+    response = student_client.post(url, json={'message': 'also docker', 'conversation_id': first['conversation_id']})
+    assert response.status_code == 200
+    assert b'extend' in response.data
+    assert stored_skills(app_db) == ['Python', 'Docker']
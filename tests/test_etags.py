@@ -0,0 +1,85 @@
+"""Conditional GETs: list endpoints answer 304 until the data-version counters behind them change"""
+import pytest
+
+NEW_PROJECT = {'name': 'Sensor fusion', 'description': 'Fuse IMU and GPS readings', 'field': 'Robotics'}
+
+
+def revalidate(client, url, response):
+    return client.get(url, headers={'If-None-Match': response.headers['ETag']})
+
+
+@pytest.mark.parametrize('url', ['/api/projects', '/api/projects?fields=id,name&limit=2'])
+def test_project_list_is_not_modified_until_the_catalog_changes(app_db, student_client, teacher_client, url):
+    first = student_client.get(url)
+    assert first.status_code == 200
+    assert first.headers['ETag'].startswith('W/')
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    repeat = revalidate(student_client, url, first)
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+    assert repeat.headers['ETag'] == first.headers['ETag']
+
+    assert teacher_client.post('/api/projects', json=NEW_PROJECT).status_code == 201
+    changed = revalidate(student_client, url, first)
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != first.headers['ETag']
+    assert revalidate(student_client, url, changed).status_code == 304
+
+
+def test_project_list_etag_covers_the_query_string(app_db, student_client):
+    first = student_client.get('/api/projects?limit=1')
+    other = student_client.get('/api/projects?limit=2', headers={'If-None-Match': first.headers['ETag']})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != first.headers['ETag']
+
+
+def test_last_modified_answers_if_modified_since(app_db, student_client):
+    first = student_client.get('/api/projects')
+    assert first.last_modified is not None
+    repeat = student_client.get('/api/projects', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert repeat.status_code == 304
+
+
+def test_not_modified_skips_the_listing_queries(app_db, student_client):
+    first = student_client.get('/api/projects')
+    # The session's user and the version counters; the catalog itself is never read
+    with app_db.QueryCounter() as queries:
+        assert revalidate(student_client, '/api/projects', first).status_code == 304
+    queries.assert_count(2)
+
+
+def test_student_selection_changes_with_the_students_interest(app_db, student_client):
+    first = student_client.get('/api/student/selection')
+    assert first.get_json() == {'selection': None}
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert revalidate(student_client, '/api/student/selection', first).status_code == 304
+
+    assert student_client.post('/student_interest/1').status_code == 201
+    selected = revalidate(student_client, '/api/student/selection', first)
+    assert selected.status_code == 200
+    assert selected.get_json()['selection']['id'] == 1
+
+    assert student_client.post('/cancel_interest/1').status_code == 200
+    cancelled = revalidate(student_client, '/api/student/selection', selected)
+    assert cancelled.status_code == 200
+    assert cancelled.get_json() == {'selection': None}
+
+
+def test_teacher_interests_change_when_a_student_selects(app_db, student_client, teacher_client):
+    first = teacher_client.get('/api/teacher/interests')
+    assert first.get_json()['interests'] == []
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert revalidate(teacher_client, '/api/teacher/interests', first).status_code == 304
+
+    assert student_client.post('/student_interest/1').status_code == 201
+    changed = revalidate(teacher_client, '/api/teacher/interests', first)
+    assert changed.status_code == 200
+    assert [interest['project_id'] for interest in changed.get_json()['interests']] == [1]
+
+
+def test_per_user_etags_differ_for_the_same_data(app_db, student_client, teacher_client):
+    # Same counters, different user: a cached response must not validate for someone else
+    student = student_client.get('/api/student/selection')
+    teacher = teacher_client.get('/api/teacher/interests')
+    assert student.headers['ETag'] != teacher.headers['ETag']
@@ -0,0 +1,52 @@
+"""One interest per student under concurrent requests: exactly one 201, every other request 409"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import login
+
+THREADS = 16
+
+
+def post_selection(client, path, project_id):
+    if path == 'api':
+        return client.post('/api/project/interest', json={'project_id': project_id})
+    return client.post(f'/student_interest/{project_id}')
+
+
+@pytest.mark.parametrize('path', ['form', 'api'])
+def test_parallel_selections_record_one_interest(app_db, path):
+    with app_db.app.app_context():
+        project_ids = [project_id for (project_id,) in app_db.db.session.query(app_db.Project.id).order_by(app_db.Project.id)]
+        student_id = app_db.User.query.filter_by(email='student@test.com').first().id
+    # One session per thread, as with several browser tabs or a double-click
+    clients = [login(app_db, 'student@test.com', 'student123', 'student') for _ in range(THREADS)]
+    barrier = threading.Barrier(THREADS)
+
+    def select(i):
+        barrier.wait()
+        # Half the requests race for the same project, the rest for different ones
+        return post_selection(clients[i], path, project_ids[0] if i % 2 else project_ids[i % len(project_ids)]).status_code
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        statuses = list(executor.map(select, range(THREADS)))
+
+    assert statuses.count(201) == 1
+    assert statuses.count(409) == THREADS - 1
+    with app_db.app.app_context():
+        interests = app_db.StudentInterest.query.filter_by(student_id=student_id).all()
+        assert len(interests) == 1
+        counts = dict(app_db.db.session.query(app_db.Project.id, app_db.Project.interest_count))
+    assert counts[interests[0].project_id] == 1
+    assert sum(counts.values()) == 1
+
+
+def test_second_selection_conflicts_until_cancelled(app_db, student_client):
+    assert student_client.post('/student_interest/1').status_code == 201
+    assert student_client.post('/student_interest/1').get_json()['message'] == 'You have already selected this project.'
+    response = student_client.post('/student_interest/2')
+    assert response.status_code == 409
+    assert 'another project' in response.get_json()['message']
+    assert student_client.post('/cancel_interest/1').status_code == 200
+    assert student_client.post('/student_interest/2').status_code == 201
@@ -0,0 +1,102 @@
+"""Local rubric scoring and shortlisting on plain project objects (no database)"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from matching import LocalScorer, ProjectIndex, shortlist_projects
+
+
+def project(id, name, description='', field='Healthcare', skills=''):
+    return SimpleNamespace(id=id, name=name, description=description, field=field, skill_requirements=skills)
+
+
+def keyword_points(requirements, project_):
+    item = LocalScorer().score(requirements, [project_])[0]
+    return float(item['reasoning'].split('keywords ')[1].split('/')[0])
+
+
+def test_keywords_match_whole_tokens_only():
+    ledger = project(1, 'Supply chain ledger', 'A blockchain for hospital suppliers', field='Blockchain')
+    assert keyword_points({'keywords': ['ai']}, ledger) == 0
+    assert keyword_points({'keywords': ['chain']}, ledger) == 1
+    assert keyword_points({'keywords': ['AI']}, project(2, 'AI triage', 'Rank patients by urgency')) == 1
+
+
+def test_keyword_phrases_need_adjacent_tokens():
+    vision = project(1, 'Retina scans', 'Machine learning for retina scans')
+    assert keyword_points({'keywords': ['machine learning']}, vision) == 1
+    # Both words present but not as the phrase: partial credit
+    apart = project(2, 'Learning tools', 'A machine that grades essays')
+    assert keyword_points({'keywords': ['machine learning']}, apart) == 0.5
+    # A phrase must not match across a token boundary ('learn' is not 'learning')
+    assert keyword_points({'keywords': ['machine learn']}, vision) == 0.5
+
+
+def test_shortlist_without_matches_is_the_scorers_best_regardless_of_row_order():
+    catalog = [project(id, f'Project {id}', 'Patient records', field=field)
+               for id, field in [(5, 'Blockchain'), (3, 'Big Data'), (9, 'Healthcare'), (1, 'Cybersecurity'), (7, 'Big Data')]]
+    index = ProjectIndex()
+    index.build(catalog)
+    # No project mentions quantum, but Big Data is related to Artificial Intelligence
+    requirements = {'fields': ['Artificial Intelligence'], 'keywords': ['quantum']}
+    for rows in (catalog, catalog[::-1]):
+        assert [p.id for p in shortlist_projects(index, requirements, rows, 3, scorer=LocalScorer())] == [3, 7, 9]
+        assert [p.id for p in shortlist_projects(index, requirements, rows, 3)] == [1, 3, 5]
+
+
+WORDS = ('machine learning sensor data blockchain ledger medical image cloud edge security network privacy '
+         'patient vision robot stream graph model deep neural').split()
+SKILLS = ['Python', 'Java', 'PyTorch', 'Docker', 'SQL', 'React', 'C++', 'Solidity']
+FIELDS = ['Healthcare', 'Blockchain', 'Artificial Intelligence', 'IoT', 'Big Data', 'Robotics']
+
+
+def random_catalog(rng, size):
+    return [project(id, ' '.join(rng.sample(WORDS, 2)), ' '.join(rng.choices(WORDS, k=rng.randint(0, 12))),
+                    field=rng.choice(FIELDS), skills=', '.join(rng.sample(SKILLS, rng.randint(0, 3))))
+            for id in rng.sample(range(1, 10 * size), size)]
+
+
+def random_requirements(rng):
+    return {
+        'fields': rng.sample(FIELDS, rng.randint(0, 2)),
+        'keywords': [' '.join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(rng.randint(0, 3))],
+        'features': [' '.join(rng.sample(WORDS, 3)) for _ in range(rng.randint(0, 2))],
+        'skills': rng.sample(SKILLS + ['Go'], rng.randint(0, 3)),
+    }
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_score_many_matches_score_for_every_set(seed, monkeypatch):
+    rng = random.Random(seed)
+    scorer = LocalScorer()
+    catalog = random_catalog(rng, 60)
+    requirement_sets = [random_requirements(rng) for _ in range(40)]
+    full = scorer.score_many(requirement_sets, catalog)
+    assert full == [scorer.score(requirements, catalog) for requirements in requirement_sets]
+    # NumPy ranking of the best few agrees exactly (order, scores, reasoning) with the per-project loop
+    for limit in (1, 5, 59):
+        assert scorer.score_many(requirement_sets, catalog, limit) == [items[:limit] for items in full]
+    monkeypatch.setattr('matching.np', None)
+    assert LocalScorer().score_many(requirement_sets, catalog, 5) == [items[:5] for items in full]
+
+
+def test_score_many_reuses_catalog_arrays_until_a_project_changes():
+    scorer = LocalScorer()
+    catalog = [project(1, 'Ledger', 'blockchain audit', field='Blockchain', skills='Solidity'),
+               project(2, 'Vision', 'medical image model', field='Healthcare', skills='Python'),
+               project(3, 'Sensors', 'edge sensor data', field='IoT')]
+    requirements = {'fields': ['Healthcare'], 'keywords': ['medical image'], 'skills': ['Python']}
+    before = scorer.score_many([requirements], catalog, 2)[0]
+    assert [item['id'] for item in before] == [2, 3]
+    arrays = scorer._arrays
+    scorer.score_many([requirements], catalog, 2)
+    assert scorer._arrays is arrays
+
+    catalog[2].description = 'medical image sensors'
+    catalog[2].field = 'Healthcare'
+    after = scorer.score_many([requirements], catalog, 2)[0]
+    assert scorer._arrays is not arrays
+    assert after == scorer.score(requirements, catalog)[:2]
+    assert after[1]['score'] > before[1]['score']
+    assert scorer.score_many([requirements], [], 2) == [[]]
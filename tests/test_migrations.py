@@ -0,0 +1,81 @@
+"""Schema migrations: idempotent, rolled back as a unit, and applied once when several processes start together"""
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from database import install_sqlite_pragmas, sqlite_pragmas
+from migrations import MIGRATIONS, current_version, migrate, schema_version
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LATEST = MIGRATIONS[-1][0]
+WORKERS = 4
+
+# What a gunicorn worker does on start (wsgi.py)
+BOOT = 'import app; app.create_app()'
+
+
+def sqlite_engine(path):
+    engine = create_engine(f'sqlite:///{path}')
+    install_sqlite_pragmas(engine, sqlite_pragmas({}))
+    return engine
+
+
+def recorded_versions(engine):
+    with engine.connect() as connection:
+        return [version for (version,) in connection.execute(select(schema_version.c.version).order_by(schema_version.c.version))]
+
+
+def test_migrate_is_idempotent(appmod, tmp_path):
+    engine = sqlite_engine(tmp_path / 'fresh.db')
+    assert migrate(engine, appmod.db.metadata) == [number for number, _, _ in MIGRATIONS]
+    assert migrate(engine, appmod.db.metadata) == []
+    assert recorded_versions(engine) == [number for number, _, _ in MIGRATIONS]
+    assert current_version(engine) == LATEST
+
+
+def test_a_migration_recorded_by_another_process_is_skipped(appmod, tmp_path, monkeypatch):
+    engine = sqlite_engine(tmp_path / 'raced.db')
+    migrate(engine, appmod.db.metadata)
+    # A worker that read version 0 just before another one finished re-checks under the lock
+    monkeypatch.setattr('migrations.current_version', lambda engine: 0)
+    assert migrate(engine, appmod.db.metadata) == []
+    assert recorded_versions(engine) == [number for number, _, _ in MIGRATIONS]
+
+
+def test_a_failed_migration_rolls_back_its_ddl(appmod, tmp_path):
+    engine = sqlite_engine(tmp_path / 'failed.db')
+    migrate(engine, appmod.db.metadata)
+
+    def half_done(connection, metadata):
+        connection.execute(text('CREATE TABLE half_done (id INTEGER PRIMARY KEY)'))
+        raise RuntimeError('migration bug')
+
+    with pytest.raises(RuntimeError):
+        migrate(engine, appmod.db.metadata, MIGRATIONS + [(LATEST + 1, 'broken', half_done)])
+    assert current_version(engine) == LATEST
+    with engine.connect() as connection:
+        assert not inspect(connection).has_table('half_done')
+
+
+@pytest.mark.parametrize('round_', range(3))
+def test_workers_starting_together_migrate_once(tmp_path, round_):
+    path = tmp_path / 'shared.db'
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}', SEMANTIC_INDEX_PATH=str(tmp_path / 'vectors'),
+               LOG_LEVEL='ERROR')
+    workers = [
+        subprocess.Popen([sys.executable, '-c', BOOT], cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        for _ in range(WORKERS)
+    ]
+    for worker in workers:
+        output, _ = worker.communicate(timeout=120)
+        assert worker.returncode == 0, output.decode('utf-8', 'replace')
+
+    engine = sqlite_engine(path)
+    assert recorded_versions(engine) == [number for number, _, _ in MIGRATIONS]
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT name, version FROM data_version ORDER BY name')).all() == [
+            ('catalog', 0), ('interests', 0)
+        ]
@@ -0,0 +1,112 @@
+"""Bulk import validation: row checks, stream parsing, and the per-row summary of /api/projects/import"""
+import io
+import json
+
+import pytest
+
+from project_io import ImportFormatError, NAME_MAX_LENGTH, detect_format, iter_project_rows, validate_project_row
+
+VALID = {'name': 'Sensor fusion', 'description': 'Fuse IMU and GPS readings', 'field': 'IoT'}
+
+
+def rows(text, fmt):
+    return list(iter_project_rows(io.BytesIO(text.encode('utf-8')), fmt))
+
+
+def test_validate_accepts_and_normalizes_a_row():
+    values, error = validate_project_row(dict(VALID, name='  Sensor fusion ', field='iot',
+                                              skill_requirements=['Python', ' ', 'C++'], capacity='3'))
+    assert error is None
+    assert values == {'name': 'Sensor fusion', 'description': 'Fuse IMU and GPS readings', 'field': 'IoT',
+                      'skill_requirements': 'Python, C++', 'capacity': 3}
+    assert validate_project_row(VALID)[0]['capacity'] == 1
+
+
+@pytest.mark.parametrize('change, message', [
+    ({'name': '   '}, 'Missing name'),
+    ({'description': None}, 'Missing description'),
+    ({'field': 7}, 'Missing field'),
+    ({'name': 'x' * (NAME_MAX_LENGTH + 1)}, f'Name is longer than {NAME_MAX_LENGTH} characters'),
+    ({'field': 'Astrology'}, "Unknown field 'Astrology'"),
+    ({'skill_requirements': {'Python': 1}}, 'skill_requirements must be text or a list of strings'),
+    ({'skill_requirements': ['Python', 3]}, 'skill_requirements must be text or a list of strings'),
+    ({'capacity': '0'}, 'Capacity must be a positive whole number.'),
+    ({'capacity': 'two'}, 'Capacity must be a positive whole number.'),
+])
+def test_validate_rejects_bad_rows(change, message):
+    values, error = validate_project_row(dict(VALID, **change))
+    assert values is None
+    assert error.startswith(message)
+
+
+def test_detect_format():
+    assert detect_format('projects.CSV') == 'csv'
+    assert detect_format('projects.ndjson') == 'jsonl'
+    assert detect_format('projects.txt', 'application/x-ndjson') == 'jsonl'
+    assert detect_format('projects.txt') is None
+
+
+def test_csv_rows_carry_line_numbers_and_skip_blank_records():
+    parsed = rows('\ufeffname,description,field\nA,First,IoT\n,,\n"B","Two\nlines",Healthcare\n', 'csv')
+    assert [(line, row['name']) for line, row, _ in parsed] == [(2, 'A'), (5, 'B')]
+    assert parsed[1][1]['description'] == 'Two\nlines'
+
+
+def test_csv_without_required_columns_is_unreadable():
+    with pytest.raises(ImportFormatError, match='Missing CSV columns: description, field'):
+        rows('name\nA\n', 'csv')
+
+
+def test_jsonl_reports_bad_lines_without_stopping():
+    parsed = rows('{"name": "A"}\n\nnot json\n[1, 2]\n{"name": "B"}\n', 'jsonl')
+    assert [(line, error) for line, _, error in parsed] == [
+        (1, None), (3, 'Invalid JSON'), (4, 'Expected a JSON object'), (5, None)
+    ]
+
+
+def test_invalid_utf8_is_unreadable():
+    with pytest.raises(ImportFormatError, match='Line 2 is not valid UTF-8'):
+        list(iter_project_rows(io.BytesIO(b'{"name": "A"}\n\xff\n'), 'jsonl'))
+
+
+def upload(client, text, filename='projects.jsonl', query=''):
+    return client.post(f'/api/projects/import{query}', data={'file': (io.BytesIO(text.encode('utf-8')), filename)},
+                       content_type='multipart/form-data')
+
+
+def jsonl(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def test_import_creates_valid_rows_and_reports_the_rest(app_db, teacher_client):
+    before = teacher_client.get('/api/projects?limit=200').get_json()['projects']
+    response = upload(teacher_client, jsonl(VALID, dict(VALID, field='Astrology'), dict(VALID, name='Edge AI')) + '{oops\n')
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert {key: summary[key] for key in ('rows', 'valid', 'created', 'invalid', 'failed')} == {
+        'rows': 4, 'valid': 2, 'created': 2, 'invalid': 2, 'failed': 0
+    }
+    assert [(error['line'], error['name']) for error in summary['errors']] == [(2, 'Sensor fusion'), (4, None)]
+    after = teacher_client.get('/api/projects?limit=200').get_json()['projects']
+    assert len(after) == len(before) + 2
+
+
+def test_import_dry_run_and_skip_existing(app_db, teacher_client):
+    dry = upload(teacher_client, jsonl(VALID), query='?dry_run=1').get_json()
+    assert (dry['valid'], dry['created']) == (1, 0)
+
+    assert upload(teacher_client, jsonl(VALID)).get_json()['created'] == 1
+    again = upload(teacher_client, jsonl(dict(VALID, name='SENSOR FUSION'), dict(VALID, name='Edge AI'),
+                                         dict(VALID, name='edge ai')), query='?skip_existing=1').get_json()
+    assert (again['created'], again['skipped']) == (1, 2)
+
+
+def test_import_rejects_unreadable_uploads(app_db, teacher_client, student_client):
+    assert upload(teacher_client, 'name\n', filename='projects.txt').status_code == 400
+    response = upload(teacher_client, 'name\nA\n', filename='projects.csv')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Missing CSV columns: description, field'
+    # A raw body with ?format= works without multipart
+    raw = teacher_client.post('/api/projects/import?format=jsonl', data=jsonl(VALID))
+    assert raw.get_json()['created'] == 1
+    assert upload(student_client, jsonl(VALID)).status_code == 403
@@ -0,0 +1,71 @@
+"""Routes run a fixed number of SQL statements however large the catalog grows (QueryCounter)"""
+import pytest
+
+
+def add_projects(appmod, count):
+    with appmod.app.app_context():
+        teacher = appmod.User.query.filter_by(email='teacher@test.com').first()
+        appmod.db.session.add_all([
+            appmod.Project(name=f'Extra project {i}', description='Machine learning on sensor data',
+                           field='Artificial Intelligence', skill_requirements='Python, PyTorch', teacher_id=teacher.id)
+            for i in range(count)
+        ])
+        appmod.db.session.flush()
+        appmod.bump_catalog_version()
+        appmod.db.session.commit()
+
+
+# selectinload() batches 500 parent ids per IN query, so the counts hold for teachers with up to 500 projects
+CATALOG_SIZES = [0, 50, 400]
+
+
+@pytest.mark.parametrize('extra_projects', CATALOG_SIZES)
+def test_teacher_dashboard_runs_constant_queries(app_db, teacher_client, student_client, extra_projects):
+    add_projects(app_db, extra_projects)
+    # An interest gives the dashboard a student row to load
+    assert student_client.post('/student_interest/1').status_code == 201
+
+    with app_db.QueryCounter() as queries:
+        assert teacher_client.get('/teacher/dashboard').status_code == 200
+    queries.assert_count(3)
+
+
+@pytest.mark.parametrize('extra_projects', CATALOG_SIZES)
+def test_student_dashboard_runs_constant_queries(app_db, student_client, llm, extra_projects):
+    add_projects(app_db, extra_projects)
+    assert student_client.post('/student_interest/1').status_code == 201
+
+    with app_db.QueryCounter() as queries:
+        assert student_client.get('/student/dashboard').status_code == 200
+    queries.assert_count(3)
+
+    # With a profile, the warm-start list adds a catalog version check and one query for its projects
+    assert student_client.post('/api/chat', json={'message': 'I like machine learning'}).status_code == 200
+    app_db.warm_start_executor.submit(lambda: None).result()
+    with app_db.QueryCounter() as queries:
+        assert student_client.get('/student/dashboard').status_code == 200
+    queries.assert_count(5)
+
+
+@pytest.mark.parametrize('extra_projects', CATALOG_SIZES)
+def test_chat_runs_constant_queries(app_db, student_client, llm, extra_projects):
+    add_projects(app_db, extra_projects)
+
+    # The first message builds the match indexes and saves the student's profile
+    with app_db.QueryCounter() as queries:
+        response = student_client.post('/api/chat', json={'message': 'I like machine learning'})
+    assert response.status_code == 200
+    queries.assert_at_most(8)
+
+    with app_db.QueryCounter() as queries:
+        response = student_client.post('/api/chat', json={'message': 'I like machine learning'})
+    assert response.status_code == 200
+    queries.assert_count(4)
+
+    # Filtering the previous results needs neither requirement analysis nor ranking
+    with app_db.QueryCounter() as queries:
+        response = student_client.post('/api/chat', json={
+            'message': 'only python', 'conversation_id': response.get_json()['conversation_id']
+        })
+    assert response.get_json()['refinement'] == 'filter'
+    queries.assert_count(3)
@@ -0,0 +1,94 @@
+"""Ranking: LLM answers that are cut off, unparseable or partly failed fall back locally and are never cached"""
+import itertools
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import fake_deepseek
+
+REQUIREMENTS = {'fields': ['Artificial Intelligence'], 'keywords': ['machine learning'], 'skills': ['Python']}
+PROJECTS = [
+    SimpleNamespace(id=id, name=f'Project {id}', description='Machine learning on sensor data',
+                    field=field, skill_requirements='Python')
+    for id, field in [(1, 'Artificial Intelligence'), (2, 'Healthcare'), (3, 'Blockchain')]
+]
+_versions = itertools.count(1000)
+
+
+def ranking(*ids):
+    return json.dumps({'ranked_projects': [{'id': id, 'score': 9 - rank, 'reasoning': 'llm'} for rank, id in enumerate(ids)]})
+
+
+FULL = ranking(3, 1, 2)
+
+
+def fragments(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def stream_of(parts, error=None):
+    def stream(messages, purpose='rank_stream'):
+        yield from parts
+        if error is not None:
+            raise error
+    return stream
+
+
+def streamed(appmod, monkeypatch, stream):
+    monkeypatch.setattr(appmod, 'stream_deepseek_api', stream)
+    version = next(_versions)
+    items = list(appmod.iter_rank_projects(REQUIREMENTS, PROJECTS, version))
+    cached = appmod.ranking_cache.get(appmod.ranking_cache_key(REQUIREMENTS, PROJECTS, version))
+    return items, cached
+
+
+def test_complete_stream_is_cached(appmod, monkeypatch):
+    items, cached = streamed(appmod, monkeypatch, stream_of(fragments(FULL)))
+    assert [item['id'] for item in items] == [3, 1, 2]
+    assert cached == items
+
+
+@pytest.mark.parametrize('parts', [
+    fragments(FULL[:FULL.index('}') + 1]),  # cut off after the first item
+    fragments(ranking(3)),  # complete, but leaves projects out
+])
+def test_partial_stream_is_completed_locally_and_not_cached(appmod, monkeypatch, parts):
+    items, cached = streamed(appmod, monkeypatch, stream_of(parts))
+    assert items[0] == {'id': 3, 'score': 9, 'reasoning': 'llm'}
+    assert sorted(item['id'] for item in items) == [1, 2, 3]
+    assert [item['id'] for item in items[1:]] == [1, 2]  # local rubric order
+    assert cached is None
+
+
+@pytest.mark.parametrize('stream', [
+    stream_of(['I cannot help with that.']),
+    stream_of(fragments(json.dumps({'ranked_projects': []}))),
+    stream_of(fragments(FULL)[:3], error=ConnectionError('reset')),
+])
+def test_unusable_stream_falls_back_to_local_scores(appmod, monkeypatch, stream):
+    items, cached = streamed(appmod, monkeypatch, stream)
+    assert items == appmod.local_scorer.score(REQUIREMENTS, PROJECTS)
+    assert cached is None
+
+
+def failing_chunk(failed_id):
+    """fake_deepseek, except that the ranking call for the chunk holding `failed_id` fails"""
+    def call(messages, purpose='chat'):
+        if purpose == 'rank' and f'"id": {failed_id},' in messages[-1]['content']:
+            return None
+        return fake_deepseek(messages, purpose)
+    return call
+
+
+@pytest.mark.parametrize('failed_id, cached', [(None, True), (2, False)])
+def test_partly_local_chunked_ranking_is_not_cached(appmod, monkeypatch, failed_id, cached):
+    monkeypatch.setattr(appmod, 'RANK_CHUNK_SIZE', 1)
+    monkeypatch.setattr(appmod, 'call_deepseek_api', failing_chunk(failed_id))
+    for rank in (appmod.score_projects, lambda *args: list(appmod.iter_rank_projects(*args))):
+        version = next(_versions)
+        items = rank(REQUIREMENTS, PROJECTS, version)
+        assert sorted(item['id'] for item in items) == [1, 2, 3]
+        assert ('Field' in {item['id']: item for item in items}[2]['reasoning']) is not cached
+        key = appmod.ranking_cache_key(REQUIREMENTS, PROJECTS, version)
+        assert (appmod.ranking_cache.get(key) == items) is cached
@@ -0,0 +1,41 @@
+"""Memory-mapped project vectors: reuse across processes and re-embedding of changed projects"""
+from types import SimpleNamespace
+
+from semantic import VectorIndex
+
+
+def project(id, name, description, field='IoT', skills='Python'):
+    return SimpleNamespace(id=id, name=name, description=description, field=field, skill_requirements=skills)
+
+
+CATALOG = [
+    project(1, 'Greenhouse sensors', 'Soil moisture sensors that water plants automatically'),
+    project(2, 'Fleet tracker', 'GPS tracking of delivery vans with route history'),
+]
+
+
+def test_loaded_vectors_are_checked_against_the_projects_text(tmp_path):
+    path = str(tmp_path / 'vectors')
+    first = VectorIndex(path, dim=256)
+    assert first.load() is False
+    assert first.build(CATALOG, version=5) == 2
+    first.close()
+
+    # Same catalog version and project count, but another database's text (e.g. after a reset)
+    edited = [CATALOG[0], project(2, 'Loom controller', 'Quantum knitting loom for wool socks')]
+    second = VectorIndex(path, dim=256)
+    assert second.load() is True
+    assert (second.version, len(second), second.built) == (5, 2, False)
+    assert second.build(edited, version=5) == 1
+    assert second.built
+    assert second.search_text('knitting wool socks', 1)[0][0] == 2
+    assert second.build(edited, version=5) == 0
+    second.close()
+
+
+def test_vectors_of_another_dimension_are_not_reused(tmp_path):
+    path = str(tmp_path / 'vectors')
+    index = VectorIndex(path, dim=256)
+    index.build(CATALOG, version=1)
+    index.close()
+    assert VectorIndex(path, dim=128).load() is False
@@ -0,0 +1,77 @@
+"""Login throttling: token buckets on a fake clock, and which login attempts spend tokens"""
+import pytest
+
+from throttling import TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_refills_at_the_rate():
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=0.5, burst=2, clock=clock)
+    assert limiter.acquire('a') == (True, 0.0)
+    assert limiter.acquire('a') == (True, 0.0)
+    assert limiter.acquire('a') == (False, 2.0)
+    clock.now = 2.0
+    assert limiter.acquire('a')[0]
+
+
+def test_refund_returns_a_token_and_marks_the_key_recently_used():
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=1, burst=3, maxsize=2, clock=clock)
+    limiter.acquire('a', 2)
+    limiter.acquire('b')
+    limiter.refund('a')
+    # 'b' is now the least recently used key and the one evicted for 'c'
+    limiter.acquire('c')
+    assert list(limiter._buckets) == ['a', 'c']
+    assert limiter._buckets['a'][0] == 2
+
+
+def test_full_buckets_are_dropped():
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=1, burst=2, clock=clock)
+    limiter.acquire('a')
+    clock.now = 5.0
+    limiter.acquire('b')
+    assert len(limiter) == 1
+
+
+@pytest.fixture
+def limiters(appmod, monkeypatch):
+    clock = Clock()
+    ip = TokenBucketLimiter(rate=1, burst=3, clock=clock)
+    email = TokenBucketLimiter(rate=0.1, burst=2, clock=clock)
+    monkeypatch.setattr(appmod, 'login_ip_limiter', ip)
+    monkeypatch.setattr(appmod, 'login_email_limiter', email)
+    return ip, email
+
+
+def attempt(client, email, password='wrong'):
+    return client.post('/login/student', data={'email': email, 'password': password})
+
+
+def test_successful_logins_spend_no_tokens(app_db, limiters):
+    client = app_db.app.test_client()
+    for _ in range(5):
+        assert attempt(client, 'student@test.com', 'student123').status_code == 302
+
+
+def test_locked_account_does_not_drain_the_ip_budget(app_db, limiters):
+    client = app_db.app.test_client()
+    assert attempt(client, 'student@test.com').status_code == 200
+    assert attempt(client, 'student@test.com').status_code == 200
+    throttled = attempt(client, 'student@test.com')
+    assert throttled.status_code == 429
+    assert int(throttled.headers['Retry-After']) >= 1
+    # Two failures spent IP tokens; the throttled attempts were refunded, so other accounts still get in
+    for _ in range(3):
+        assert attempt(client, 'student@test.com').status_code == 429
+    assert attempt(client, 'teacher@test.com').status_code == 200
+    assert attempt(client, 'nobody@test.com').status_code == 429
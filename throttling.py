@@ -0,0 +1,64 @@
+"""In-memory token-bucket rate limiting, keyed by e.g. client IP or account email
+
+Each key gets a bucket of `burst` tokens refilled at `rate` tokens per second. Buckets live in an LRU
+dict capped at `maxsize`; a bucket idle long enough to have refilled is indistinguishable from a new one,
+so it is dropped on access. Limits are per process: with N workers, a client gets up to N times the rate.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate, burst, maxsize=10000, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.maxsize = maxsize
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _tokens(self, key, now):
+        entry = self._buckets.get(key)
+        if entry is None:
+            return self.burst
+        tokens, updated_at = entry
+        return min(self.burst, tokens + (now - updated_at) * self.rate)
+
+    def acquire(self, key, tokens=1):
+        """(allowed, retry_after seconds); takes `tokens` from the key's bucket when allowed"""
+        with self._lock:
+            now = self._clock()
+            available = self._tokens(key, now)
+            if available < tokens:
+                self.rejected += 1
+                self._buckets[key] = (available, now)
+                self._buckets.move_to_end(key)
+                return False, (tokens - available) / self.rate if self.rate else float('inf')
+            self._buckets[key] = (available - tokens, now)
+            self._buckets.move_to_end(key)
+            self._evict(now)
+            return True, 0.0
+
+    def refund(self, key, tokens=1):
+        """Give tokens back, e.g. after a successful login"""
+        with self._lock:
+            if key in self._buckets:
+                now = self._clock()
+                available = min(self.burst, self._tokens(key, now) + tokens)
+                self._buckets[key] = (available, now)
+                self._buckets.move_to_end(key)
+
+    def _evict(self, now):
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        # The least recently used bucket is the most likely to have refilled completely
+        while self._buckets:
+            key = next(iter(self._buckets))
+            if self._tokens(key, now) < self.burst:
+                break
+            del self._buckets[key]
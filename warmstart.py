@@ -0,0 +1,43 @@
+"""Warm-start recommendations: a precomputed top list per student profile, kept current as projects change
+
+A profile holds the student's latest requirements (from chat or batch matching) and the best `limit`
+projects for them under the local rubric. A project's rubric score does not depend on the rest of the
+catalog, so after a project is created or edited only that project needs rescoring against each list;
+merge_changed_scores() folds it in and tells when the list has to be rebuilt from the whole catalog.
+"""
+from matching import SCORE_THRESHOLD
+
+
+def usable_requirements(requirements):
+    """Whether analyzed requirements name anything to score against (fields, keywords or skills)"""
+    return isinstance(requirements, dict) and bool(
+        requirements.get('fields') or requirements.get('keywords') or requirements.get('skills')
+    )
+
+
+def top_items(items, limit):
+    """The first `limit` scored items at or above the match threshold, as stored in a warm list"""
+    return [
+        {'id': item['id'], 'score': item['score'], 'reasoning': item.get('reasoning', '')}
+        for item in items if item.get('score', 0) >= SCORE_THRESHOLD
+    ][:limit]
+
+
+def merge_changed_scores(items, changed, limit):
+    """Warm list `items` (best first) with rescored projects folded in, or None when it must be rebuilt
+
+    `changed` maps each changed project id to its new scored item (None for a removed project). A list
+    shorter than `limit` held every project above the threshold, so the merge is exact. A full list only
+    says that projects outside it score at most its last score; when fewer than `limit` items stay at or
+    above that floor, the missing places may belong to projects outside the list.
+    """
+    complete = len(items) < limit
+    floor = items[-1]['score'] if items else SCORE_THRESHOLD
+    merged = [item for item in items if item['id'] not in changed]
+    merged += top_items([item for item in changed.values() if item is not None], limit)
+    merged.sort(key=lambda item: (-item['score'], item['id']))
+    if not complete:
+        merged = [item for item in merged if item['score'] >= floor]
+        if len(merged) < limit:
+            return None
+    return merged[:limit]
@@ -0,0 +1,8 @@
+"""Production entry point, e.g. `gunicorn -w 4 wsgi:app`
+
+Run `flask --app app migrate` once before starting several workers (and set AUTO_MIGRATE=0), or let
+the workers migrate on startup: they take turns under a database lock and skip what another applied.
+"""
+from app import create_app
+
+app = create_app()